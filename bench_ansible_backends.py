@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+NetMan Ansible Backend Benchmark
+
+This script measures the per-job overhead of each Ansible execution backend by
+running a trivial playbook against localhost (local connection, no devices
+needed) several times through AnsibleRunner.
+
+Usage:
+    python bench_ansible_backends.py [--runs N] [--backends subprocess,forkserver]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+from lib.ansible_backends import BACKENDS
+from lib.ansible_runner import AnsibleRunner
+
+# Playbook doing as little as possible, so the timing is the job overhead
+PLAYBOOK = """---
+- name: Backend benchmark
+  hosts: "{{ target_host }}"
+  gather_facts: no
+  tasks:
+    - name: Set result
+      set_fact:
+        ansible_result:
+          success: true
+"""
+
+INVENTORY = "localhost ansible_connection=local ansible_python_interpreter={python}\n"
+
+def time_backend(backend, runs, work_dir):
+    """
+    Run the benchmark playbook several times with one backend.
+
+    Returns:
+        tuple: (first run in ms, timings of the following runs in ms)
+    """
+    runner = AnsibleRunner(
+        inventory_file=os.path.join(work_dir, "inventory"),
+        log_dir=os.path.join(work_dir, "logs"),
+        backend=backend
+    )
+    playbook = os.path.join(work_dir, "bench.yml")
+
+    timings = []
+    for _ in range(runs + 1):
+        start_time = time.perf_counter()
+        result = runner.run_playbook(playbook, {"target_host": "localhost"})
+        timings.append((time.perf_counter() - start_time) * 1000)
+        if not result.get("success"):
+            sys.exit(f"{backend} run failed: {result.get('error')}")
+
+    # The first run includes starting the forkserver worker
+    return timings[0], timings[1:]
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Timed runs per backend")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated backends to compare")
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        with open(os.path.join(work_dir, "bench.yml"), "w") as f:
+            f.write(PLAYBOOK)
+        with open(os.path.join(work_dir, "inventory"), "w") as f:
+            f.write(INVENTORY.format(python=sys.executable))
+
+        print(f"{'Backend':<12} {'first':>9} {'min':>9} {'median':>9} {'max':>9}")
+        for backend in options.backends.split(","):
+            first, timings = time_backend(backend, options.runs, work_dir)
+            print(f"{backend:<12} {first:>7.1f}ms {min(timings):>7.1f}ms "
+                  f"{statistics.median(timings):>7.1f}ms {max(timings):>7.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+NetMan Interface Parser Benchmark
+
+This script measures how fast lib/interface_parser.py parses the interface
+status output of a large chassis. It generates the output of each vendor's
+interface command for the given number of interfaces, with distinct names and
+counters, parses it several times and checks that every interface was found.
+
+Usage:
+    python bench_interface_parser.py [--interfaces N] [--runs N] [--vendors ios,junos]
+"""
+import sys
+import time
+import argparse
+import statistics
+
+from lib.interface_parser import VENDOR_RULES, InterfaceParser
+
+# One interface of each vendor's output; {n} is the interface number and
+# {c} a counter value
+SAMPLES = {
+    "ios": """GigabitEthernet{slot}/{port} is up, line protocol is up
+  Hardware is CN Gigabit Ethernet, address is aabb.cc00.{n:04x} (bia aabb.cc00.{n:04x})
+  Description: Access port {n}
+  Internet address is 10.{slot}.{port}.1/24
+  MTU 1500 bytes, BW 1000000 Kbit/sec, DLY 10 usec,
+     reliability 255/255, txload 1/255, rxload 1/255
+  Encapsulation ARPA, loopback not set
+  Keepalive set (10 sec)
+  Full-duplex, 1000Mb/s, media type is RJ45
+  output flow-control is off, input flow-control is off
+  ARP type: ARPA, ARP Timeout 04:00:00
+  Last input 00:00:05, output 00:00:01, output hang never
+  Last clearing of "show interface" counters never
+  Input queue: 0/75/{n}/0 (size/max/drops/flushes); Total output drops: {n}
+  Queueing strategy: fifo
+  Output queue: 0/40 (size/max)
+  5 minute input rate {c} bits/sec, 40 packets/sec
+  5 minute output rate {c} bits/sec, 35 packets/sec
+     {c} packets input, {c}000 bytes, 0 no buffer
+     Received 650 broadcasts (0 IP multicasts)
+     0 runts, 0 giants, 0 throttles
+     {n} input errors, 0 CRC, 0 frame, 0 overrun, 0 ignored
+     0 watchdog, 650 multicast, 0 pause input
+     {c} packets output, {c}000 bytes, 0 underruns
+     0 output errors, 0 collisions, 1 interface resets
+     0 unknown protocol drops
+     0 babbles, 0 late collision, 0 deferred
+     0 lost carrier, 0 no carrier, 0 pause output
+     0 output buffer failures, 0 output buffers swapped out
+""",
+    "eos": """Ethernet{n} is up, line protocol is up (connected)
+  Hardware is Ethernet, address is 001c.7300.{n:04x} (bia 001c.7300.{n:04x})
+  Description: Server port {n}
+  Internet address is 10.{slot}.{port}.1/31
+  Broadcast address is 255.255.255.255
+  Ethernet MTU 9214 bytes , BW 10000000 kbit
+  Full-duplex, 10Gb/s, auto negotiation: off, uni-link: n/a
+  Up 3 days, 2 hours, 1 minutes, 5 seconds
+  Loopback Mode : None
+  2 link status changes since last clear
+  Last clearing of "show interface" counters never
+  5 minutes input rate 1.23 Mbps (0.0% with framing overhead), 2 packets/sec
+  5 minutes output rate 645 bps (0.0% with framing overhead), 1 packets/sec
+     {c} packets input, {c}000 bytes
+     Received 10 broadcasts, 2000 multicast
+     0 runts, 0 giants
+     {n} input errors, 0 CRC, 0 alignment, 0 symbol, 3 input discards
+     0 PAUSE input
+     {c} packets output, {c}000 bytes
+     Sent 5 broadcasts, 3000 multicast
+     0 output errors, 0 collisions
+     0 late collision, 0 deferred, 4 output discards
+     0 PAUSE output
+""",
+    "junos": """Physical interface: ge-{slot}/0/{port}, Enabled, Physical link is Up
+  Interface index: {n}, SNMP ifIndex: {n}, Generation: 151
+  Description: Uplink {n}
+  Link-level type: Ethernet, MTU: 1514, Speed: 1000mbps, BPDU Error: None, Loop Detect PDU Error: None,
+  Duplex: Full-Duplex, MAC-REWRITE Error: None, Loopback: Disabled, Source filtering: Disabled,
+  Flow control: Enabled, Auto-negotiation: Enabled, Remote fault: Online
+  Current address: 00:05:86:71:{slot:02x}:{port:02x}, Hardware address: 00:05:86:71:{slot:02x}:{port:02x}
+  Last flapped   : 2024-01-01 10:00:00 UTC (1w0d 01:00 ago)
+  Statistics last cleared: Never
+  Traffic statistics:
+   Input  bytes  :          {c}000                 2032 bps
+   Output bytes  :          {c}000                 1688 bps
+   Input  packets:             {c}                    3 pps
+   Output packets:             {c}                    2 pps
+  Input errors:
+    Errors: {n}, Drops: 0, Framing errors: 0, Runts: 0, Policed discards: 0, L3 incompletes: 0,
+    L2 channel errors: 0, L2 mismatch timeouts: 0, FIFO errors: 0, Resource errors: 0
+  Output errors:
+    Carrier transitions: 1, Errors: 0, Drops: 0, Collisions: 0, Aged packets: 0, FIFO errors: 0,
+    HS link CRC errors: 0, MTU errors: 0, Resource errors: 0
+  Input rate     : 2032 bps (3 pps)
+  Output rate    : 1688 bps (2 pps)
+
+  Logical interface ge-{slot}/0/{port}.0 (Index 70) (SNMP ifIndex 527) (Generation 135)
+    Flags: Up SNMP-Traps 0x4004000 Encapsulation: ENET2
+    Input packets : 1234
+    Output packets: 2345
+    Protocol inet, MTU: 1500
+      Flags: Sendbcast-pkt-to-re
+      Addresses, Flags: Is-Preferred Is-Primary
+        Destination: 10.{slot}.{port}.0/24, Local: 10.{slot}.{port}.1, Broadcast: 10.{slot}.{port}.255
+
+""",
+    "panos": """--------------------------------------------------------------------------------
+Name: ethernet{slot}/{port}, ID: {n}
+Link status:
+  Runtime link speed/duplex/state: 1000/full/up
+  Configured link speed/duplex/state: auto/auto/auto
+MAC address:
+  Port MAC address 00:1b:17:00:{slot:02x}:{port:02x}
+Operation mode: layer3
+--------------------------------------------------------------------------------
+Name: ethernet{slot}/{port}, ID: {n}
+Operation mode: layer3
+Virtual router default
+Interface MTU 1500
+Interface IP address: 10.{slot}.{port}.1/24
+Interface management profile: allow-ping
+--------------------------------------------------------------------------------
+Logical interface counters read from CPU:
+--------------------------------------------------------------------------------
+bytes received                {c}000
+bytes transmitted             {c}000
+packets received              {c}
+packets transmitted           {c}
+receive errors                {n}
+packets dropped               0
+--------------------------------------------------------------------------------
+""",
+    "nxos": """Ethernet{slot}/{port} is up
+admin state is up, Dedicated Interface
+  Hardware: 100/1000/10000/25000 Ethernet, address: 0022.bdf8.{n:04x} (bia 0022.bdf8.{n:04x})
+  Description: Leaf port {n}
+  MTU 9000 bytes, BW 10000000 Kbit, DLY 1 usec
+  reliability 255/255, txload 1/255, rxload 1/255
+  Encapsulation ARPA, medium is broadcast
+  full-duplex, 10 Gb/s, media type is 10G
+  30 seconds input rate {c} bits/sec, 2 packets/sec
+  30 seconds output rate {c} bits/sec, 3 packets/sec
+  RX
+    {c} unicast packets  0 multicast packets  0 broadcast packets
+    {c} input packets  {c}000 bytes
+    {n} input error  0 short frame  0 overrun   0 underrun  0 ignored
+    0 input with dribble  0 input discard
+  TX
+    {c} unicast packets  0 multicast packets  0 broadcast packets
+    {c} output packets  {c}000 bytes
+    0 output error  0 collision  0 deferred  0 late collision
+    0 lost carrier  0 no carrier  0 babble  0 output discard
+  1 interface resets
+"""
+}
+
+def generate_output(vendor, interfaces):
+    """
+    Generate a vendor's interface command output.
+
+    Returns:
+        str: Output describing the given number of interfaces
+    """
+    sample = SAMPLES[vendor]
+    return "".join(
+        sample.format(n=n, slot=n // 48 + 1, port=n % 48, c=1000003 * (n + 1))
+        for n in range(interfaces)
+    )
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--interfaces", type=int, default=4000, help="Interfaces per output")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per vendor")
+    parser.add_argument("--vendors", default=",".join(VENDOR_RULES), help="Comma-separated vendors to parse")
+    options = parser.parse_args()
+
+    print(f"{'Vendor':<8} {'size':>8} {'median':>9} {'MB/s':>7} {'interfaces/s':>13}")
+    for vendor in options.vendors.split(","):
+        output = generate_output(vendor, options.interfaces)
+        interface_parser = InterfaceParser(VENDOR_RULES[vendor])
+
+        timings = []
+        for _ in range(options.runs):
+            start_time = time.perf_counter()
+            interfaces = interface_parser.parse(output)
+            timings.append(time.perf_counter() - start_time)
+
+        if len(interfaces) != options.interfaces:
+            sys.exit(f"{vendor}: parsed {len(interfaces)} of {options.interfaces} interfaces")
+
+        median = statistics.median(timings)
+        megabytes = len(output) / 1000000
+        print(f"{vendor:<8} {megabytes:>6.1f}MB {median * 1000:>7.1f}ms {megabytes / median:>7.1f} "
+              f"{options.interfaces / median:>13,.0f}")
+
+if __name__ == "__main__":
+    main()
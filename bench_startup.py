@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+NetMan CLI Startup Benchmark
+
+This script measures the wall-clock time of short NetMan commands, which is
+dominated by interpreter startup, imports and manager construction.
+
+Usage:
+    python bench_startup.py [--runs N] [--imports]
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+# Commands timed by default, in the order they are reported
+COMMANDS = [
+    ["--help"],
+    ["inventory", "list"],
+    ["template", "list"],
+]
+
+# Budget for `netman inventory list`, in milliseconds
+TARGET_MS = 150
+
+def time_command(args, runs):
+    """Run a NetMan command several times and return the timings in ms."""
+    timings = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "netman.py"] + args,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return timings
+
+def show_imports(args):
+    """Print the slowest imports of a NetMan command using -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "netman.py"] + args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+
+    print(f"\nSlowest imports for `netman {' '.join(args)}` (cumulative us):")
+    for cumulative, module in sorted(rows, reverse=True)[:15]:
+        print(f"{cumulative:>10}  {module}")
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command")
+    parser.add_argument("--imports", action="store_true", help="Show the slowest imports")
+    options = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    print(f"{'Command':<30} {'min':>8} {'median':>8} {'max':>8}")
+    for args in COMMANDS:
+        timings = time_command(args, options.runs)
+        label = "netman " + " ".join(args)
+        print(f"{label:<30} {min(timings):>7.1f}ms {statistics.median(timings):>7.1f}ms {max(timings):>7.1f}ms")
+
+        if args == ["inventory", "list"]:
+            verdict = "OK" if statistics.median(timings) < TARGET_MS else "SLOW"
+            inventory_median = statistics.median(timings)
+
+    print(f"\ninventory list median {inventory_median:.1f}ms vs target {TARGET_MS}ms: {verdict}")
+
+    if options.imports:
+        show_imports(["inventory", "list"])
+
+if __name__ == "__main__":
+    main()
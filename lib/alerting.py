@@ -0,0 +1,489 @@
+"""
+Alerting module for the Network Device Management tool.
+
+This module turns device probe results into notifications. Each device has a
+small state machine:
+
+    unknown -> up         first answered probe (no notification)
+    up -> down            alerting.down_after failed probes in a row
+    down -> up            alerting.up_after answered probes in a row
+    any -> flapping       alerting.flap_changes result changes within
+                          alerting.flap_window seconds
+    flapping -> up/down   no result change for flap_window seconds
+
+Single lost probes therefore do not page anyone, and a device bouncing
+between answering and not gives one 'flapping' notification instead of one
+per bounce. Every state change is a notification, except that a device's
+last notification is not repeated within alerting.repeat_after seconds;
+after that, a device still down or flapping gets a reminder. At most
+alerting.rate_limit notifications go out per minute; the rest are summed up
+in a single notification once sending is allowed again, and a device still
+down or flapping then gets a reminder.
+
+Processing a result only updates memory. Notifications are queued and sent
+to the sinks (file, webhook, syslog) in batches by flush(), which also saves
+the device states now and then, so a result never causes a disk write.
+"""
+import os
+import abc
+import json
+import time
+import atexit
+import tempfile
+import threading
+from collections import deque
+from .settings import get_setting
+
+# Default file keeping the device states between runs
+ALERT_STATE_FILE = os.path.join('data', 'alert_state.json')
+
+# Settings of the alerting section and their defaults
+DEFAULT_OPTIONS = {
+    'down_after': 3,
+    'up_after': 2,
+    'flap_changes': 4,
+    'flap_window': 600,
+    'repeat_after': 3600,
+    'rate_limit': 60,
+    'state_save_interval': 60
+}
+
+# Severity and message of the notification for entering each state
+STATE_ALERTS = {
+    'down': ('critical', "Device {hostname} is down"),
+    'flapping': ('warning', "Device {hostname} is flapping"),
+    'up': ('info', "Device {hostname} is up again")
+}
+
+class DeviceState:
+    """Alert state of one device."""
+
+    __slots__ = ('state', 'since', 'last', 'streak', 'changes')
+
+    def __init__(self, flap_changes, state='unknown', since=0.0, last=None, streak=0, changes=()):
+        self.state = state
+        self.since = since
+        # Result of the last probe and how many probes in a row had it
+        self.last = last
+        self.streak = streak
+        # Times the probe result changed, the latest flap_changes of them
+        self.changes = deque(changes, maxlen=flap_changes)
+
+class AlertManager:
+    """Tracks device states and sends notifications about their changes."""
+
+    def __init__(self, sinks=(), state_file=None, options=None):
+        """
+        Initialize the alert manager, loading the device states of earlier runs.
+
+        Args:
+            sinks (iterable): AlertSink instances notifications are sent to
+            state_file (str, optional): File keeping the device states
+                (default: alerting.state_file)
+            options (dict, optional): Settings overriding the alerting
+                section, see DEFAULT_OPTIONS
+        """
+        self.sinks = list(sinks)
+        self.state_file = state_file or get_setting('alerting', 'state_file', ALERT_STATE_FILE)
+        self.options = {key: get_setting('alerting', key, default) for key, default in DEFAULT_OPTIONS.items()}
+        self.options.update(options or {})
+
+        self.devices = {}
+        self._pending = []
+        # State and time of the last notification about each device
+        self._last_sent = {}
+        # Token bucket of the rate limit, and devices whose notifications it held back
+        self._tokens = float(self.options['rate_limit'])
+        self._refilled = time.monotonic()
+        self._suppressed = set()
+
+        self._dirty = False
+        self._saved = time.monotonic()
+        self._lock = threading.Lock()
+        self._load_state()
+
+    def process(self, hostname, up, timestamp=None):
+        """
+        Process the result of a device probe.
+
+        Args:
+            hostname (str): Hostname of the device
+            up (bool): Whether the device answered
+            timestamp (float, optional): Time of the probe (default: now)
+
+        Returns:
+            str: The device's new state if it changed, else None
+        """
+        timestamp = timestamp or time.time()
+        options = self.options
+
+        with self._lock:
+            device = self.devices.get(hostname)
+            if device is None:
+                device = self.devices[hostname] = DeviceState(options['flap_changes'])
+            self._dirty = True
+
+            if up == device.last:
+                device.streak += 1
+            else:
+                if device.last is not None:
+                    device.changes.append(timestamp)
+                device.last = up
+                device.streak = 1
+
+            new_state = self._next_state(device, up, timestamp)
+            if new_state is None:
+                if device.state in ('down', 'flapping'):
+                    self._queue(hostname, device.state, device.state, timestamp, reminder=True)
+                return None
+
+            previous = device.state
+            device.state = new_state
+            device.since = timestamp
+            # A device seen for the first time is assumed to have been up
+            if not (previous == 'unknown' and new_state == 'up'):
+                self._queue(hostname, new_state, previous, timestamp)
+            return new_state
+
+    def _next_state(self, device, up, timestamp):
+        """Get the state a device enters after a probe, or None if it stays."""
+        options = self.options
+        changes = device.changes
+
+        if device.state == 'flapping':
+            if changes and timestamp - changes[-1] <= options['flap_window']:
+                return None
+            return 'up' if up else 'down'
+        if len(changes) == changes.maxlen and timestamp - changes[0] <= options['flap_window']:
+            return 'flapping'
+        if up:
+            if device.state == 'up' or (device.state == 'down' and device.streak < options['up_after']):
+                return None
+            return 'up'
+        if device.state == 'down' or device.streak < options['down_after']:
+            return None
+        return 'down'
+
+    def process_many(self, results):
+        """
+        Process many probe results.
+
+        Args:
+            results (iterable): (hostname, up, timestamp) tuples
+
+        Returns:
+            int: Number of state changes
+        """
+        changed = 0
+        for hostname, up, timestamp in results:
+            if self.process(hostname, up, timestamp):
+                changed += 1
+        return changed
+
+    def _queue(self, hostname, state, previous, timestamp, reminder=False):
+        """
+        Queue a notification, unless it is a duplicate or over the rate limit.
+
+        A notification repeating the device's last one within repeat_after
+        seconds is a duplicate. Reminders are only queued once the last
+        notification is repeat_after seconds old. A notification held back
+        by the rate limit does not count as sent, so a device still down or
+        flapping gets a reminder once sending is allowed again.
+        """
+        last = self._last_sent.get(hostname)
+        if last is not None and last[0] == state and timestamp - last[1] < self.options['repeat_after']:
+            return
+
+        if not self._take_token():
+            self._suppressed.add(hostname)
+            return
+        self._last_sent[hostname] = (state, timestamp)
+        self._suppressed.discard(hostname)
+
+        severity, message = STATE_ALERTS[state]
+        if reminder:
+            message = message.replace(' is ', ' is still ', 1).replace(' again', '')
+        self._pending.append({
+            'hostname': hostname,
+            'state': state,
+            'previous': previous,
+            'severity': severity,
+            'message': message.format(hostname=hostname),
+            'timestamp': timestamp,
+            'reminder': reminder
+        })
+
+    def _take_token(self):
+        """Take a notification from the rate limit, if one is left."""
+        now = time.monotonic()
+        rate_limit = self.options['rate_limit']
+        self._tokens = min(rate_limit, self._tokens + (now - self._refilled) * rate_limit / 60)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def flush(self):
+        """
+        Send the queued notifications and save the device states if due.
+
+        Returns:
+            int: Number of notifications sent
+        """
+        with self._lock:
+            alerts, self._pending = self._pending, []
+            if self._suppressed and self._take_token():
+                alerts.append({
+                    'hostname': '',
+                    'state': 'suppressed',
+                    'previous': '',
+                    'severity': 'warning',
+                    'message': (f"Notifications about {len(self._suppressed)} devices "
+                                "were held back by the rate limit"),
+                    'timestamp': time.time(),
+                    'reminder': False
+                })
+                self._suppressed = set()
+            save = self._dirty and time.monotonic() - self._saved >= self.options['state_save_interval']
+
+        if alerts:
+            for sink in self.sinks:
+                try:
+                    sink.send(alerts)
+                except Exception as e:
+                    print(f"Error sending alerts to {type(sink).__name__}: {str(e)}")
+        if save:
+            self.save_state()
+        return len(alerts)
+
+    def close(self):
+        """Send what is queued, save the device states and close the sinks."""
+        self.flush()
+        if self._dirty:
+            self.save_state()
+        for sink in self.sinks:
+            sink.close()
+
+    def states(self):
+        """
+        Get the alert state of every device.
+
+        Returns:
+            dict: Hostname mapped to its state, the time it was entered and
+                the result of the last probe
+        """
+        with self._lock:
+            return {hostname: {'state': device.state, 'since': device.since, 'up': device.last}
+                    for hostname, device in self.devices.items()}
+
+    def save_state(self):
+        """
+        Write the device states to the state file.
+
+        Returns:
+            bool: True if the file was written
+        """
+        with self._lock:
+            data = {
+                'devices': {hostname: [device.state, device.since, device.last, device.streak, list(device.changes)]
+                            for hostname, device in self.devices.items()},
+                'last_sent': {hostname: list(last) for hostname, last in self._last_sent.items()}
+            }
+            self._dirty = False
+            self._saved = time.monotonic()
+
+        directory = os.path.dirname(os.path.abspath(self.state_file))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f)
+                os.replace(temp_path, self.state_file)
+            except Exception:
+                os.remove(temp_path)
+                raise
+            return True
+        except Exception as e:
+            print(f"Error saving alert state: {str(e)}")
+            return False
+
+    def _load_state(self):
+        """Load the device states; a missing or unreadable file leaves none."""
+        try:
+            with open(self.state_file) as f:
+                data = json.load(f)
+            flap_changes = self.options['flap_changes']
+            self.devices = {hostname: DeviceState(flap_changes, *values)
+                            for hostname, values in data.get('devices', {}).items()}
+            self._last_sent = {hostname: tuple(last) for hostname, last in data.get('last_sent', {}).items()}
+        except (OSError, ValueError, TypeError):
+            self.devices = {}
+            self._last_sent = {}
+
+class AlertSink(abc.ABC):
+    """Destination of notifications."""
+
+    @abc.abstractmethod
+    def send(self, alerts):
+        """
+        Send a batch of notifications.
+
+        Args:
+            alerts (list): Notification dicts with hostname, state, previous,
+                severity, message, timestamp and reminder (True if the state
+                did not change since the last notification)
+        """
+
+    def close(self):
+        """Release what the sink holds open."""
+
+class FileSink(AlertSink):
+    """Appends notifications to a file as JSON lines."""
+
+    def __init__(self, path='logs/alerts.log'):
+        self.path = path
+
+    def send(self, alerts):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(''.join(json.dumps(alert) + '\n' for alert in alerts))
+
+class WebhookSink(AlertSink):
+    """Posts each batch of notifications as JSON to a URL."""
+
+    def __init__(self, url, timeout=10, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+
+    def send(self, alerts):
+        from urllib.request import Request, urlopen
+
+        body = json.dumps({'alerts': alerts}).encode('utf-8')
+        request = Request(self.url, data=body, method='POST',
+                          headers=dict(self.headers, **{'Content-Type': 'application/json'}))
+        with urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+class SyslogSink(AlertSink):
+    """Sends notifications to a syslog server or socket."""
+
+    # Syslog levels of the notification severities
+    LEVELS = {'critical': 'CRITICAL', 'warning': 'WARNING', 'info': 'INFO'}
+
+    def __init__(self, address='localhost:514', facility='user'):
+        """
+        Initialize the sink.
+
+        Args:
+            address (str): host:port of a syslog server (UDP), or the path
+                of a local syslog socket such as /dev/log
+            facility (str): Syslog facility
+        """
+        import logging
+        import logging.handlers
+
+        if address.startswith('/'):
+            target = address
+        else:
+            host, _, port = address.rpartition(':')
+            target = (host or 'localhost', int(port or 514))
+
+        self.handler = logging.handlers.SysLogHandler(address=target, facility=facility)
+        self.handler.setFormatter(logging.Formatter('netman: %(message)s'))
+        self.logger = logging.getLogger(f'netman.alerts.{id(self)}')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(self.handler)
+
+    def send(self, alerts):
+        import logging
+
+        for alert in alerts:
+            level = getattr(logging, self.LEVELS.get(alert['severity'], 'WARNING'))
+            self.logger.log(level, alert['message'])
+
+    def close(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+SINK_TYPES = {
+    'file': FileSink,
+    'webhook': WebhookSink,
+    'syslog': SyslogSink
+}
+
+def create_sink(config):
+    """
+    Create a sink from its settings.
+
+    Args:
+        config (dict): 'type' (key of SINK_TYPES) and the sink's arguments,
+            e.g. {'type': 'webhook', 'url': 'http://127.0.0.1:9000/alerts'}
+
+    Returns:
+        AlertSink: The sink
+
+    Raises:
+        ValueError: If the type is unknown
+    """
+    options = dict(config)
+    sink_type = options.pop('type', None)
+    if sink_type not in SINK_TYPES:
+        raise ValueError(f"Unknown alert sink type: {sink_type}")
+    return SINK_TYPES[sink_type](**options)
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_alert_manager():
+    """
+    Get the shared alert manager.
+
+    Created on first use with the sinks of alerting.sinks; whatever is still
+    queued is sent when the process exits.
+
+    Returns:
+        AlertManager: The manager, or None if monitoring.alert_on_failure is off
+    """
+    global _manager
+
+    if not get_setting('monitoring', 'alert_on_failure', False):
+        return None
+
+    with _manager_lock:
+        if _manager is None:
+            sinks = []
+            for config in get_setting('alerting', 'sinks', None) or [{'type': 'file'}]:
+                try:
+                    sinks.append(create_sink(config))
+                except Exception as e:
+                    print(f"Error creating alert sink: {str(e)}")
+            _manager = AlertManager(sinks)
+            atexit.register(_manager.close)
+    return _manager
+
+def observe_probe(hostname, up, timestamp=None):
+    """
+    Feed a probe result to the shared alert manager, if alerting is on.
+
+    Args:
+        hostname (str): Hostname of the device
+        up (bool): Whether the device answered
+        timestamp (float, optional): Time of the probe (default: now)
+    """
+    manager = get_alert_manager()
+    if manager is not None:
+        manager.process(hostname, up, timestamp)
+
+def flush_alerts():
+    """
+    Send the queued notifications of the shared alert manager.
+
+    Returns:
+        int: Number of notifications sent
+    """
+    manager = get_alert_manager()
+    return manager.flush() if manager is not None else 0
@@ -0,0 +1,325 @@
+"""
+Ansible execution backends for the Network Device Management tool.
+
+A backend starts an `ansible` or `ansible-playbook` job and hands back an
+object with the parts of the subprocess.Popen interface AnsibleRunner uses
+(`stdout`, `poll()`, `wait()`, `kill()`, `returncode`):
+
+- ``subprocess`` runs every job as a fresh process, importing Ansible anew.
+- ``forkserver`` forks every job from a worker process that imported Ansible
+  once, so jobs skip the import cost. It pays off in long-lived processes
+  (`netman serve`, `netman shell`, runs made of many jobs).
+"""
+import os
+import sys
+import json
+import select
+import signal
+import socket
+import struct
+import threading
+import traceback
+import importlib
+import importlib.util
+import contextlib
+import subprocess
+from functools import lru_cache
+
+# Directory holding the lib package, for the forkserver worker's imports
+_PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Ansible command line tools and the CLI class behind each
+ANSIBLE_CLIS = {
+    'ansible-playbook': ('ansible.cli.playbook', 'PlaybookCLI'),
+    'ansible': ('ansible.cli.adhoc', 'AdHocCLI')
+}
+
+class SubprocessBackend:
+    """Runs every job as a new ansible/ansible-playbook process."""
+
+    name = 'subprocess'
+
+    def start(self, cmd, env, stderr_file):
+        """
+        Start a job.
+
+        Args:
+            cmd (list): Command line, starting with 'ansible' or 'ansible-playbook'
+            env (dict): Environment to run with
+            stderr_file (file): File receiving the job's stderr
+
+        Returns:
+            subprocess.Popen: The running job, with binary stdout
+        """
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file, env=env)
+
+class ForkserverBackend:
+    """Runs jobs in processes forked from a worker with Ansible already imported."""
+
+    name = 'forkserver'
+
+    def __init__(self):
+        """Initialize without starting the worker; it starts with the first job."""
+        self._server = None
+        self._control = None
+        self._server_vars = None
+
+        # Job requests are several writes on one socket
+        self._lock = threading.Lock()
+
+    def start(self, cmd, env, stderr_file):
+        """
+        Start a job.
+
+        Ansible reads part of its configuration from the environment when it
+        is imported, so the worker starts with the environment of the first
+        job. Jobs that need different ANSIBLE_* values, or a command the
+        worker cannot run, fall back to a new process.
+
+        Args:
+            cmd (list): Command line, starting with 'ansible' or 'ansible-playbook'
+            env (dict): Environment to run with
+            stderr_file (file): File receiving the job's stderr
+
+        Returns:
+            ForkserverJob or subprocess.Popen: The running job, with binary stdout
+
+        Raises:
+            RuntimeError: If Ansible cannot be imported
+        """
+        if cmd[0] not in ANSIBLE_CLIS:
+            return SubprocessBackend().start(cmd, env, stderr_file)
+
+        with self._lock:
+            if self._server is None or self._server.poll() is not None:
+                self._start_server(env)
+            elif _ansible_vars(env) != self._server_vars:
+                return SubprocessBackend().start(cmd, env, stderr_file)
+
+            request = json.dumps([cmd[0], cmd[1:], env, os.getcwd()]).encode('utf-8')
+            read_fd, write_fd = os.pipe()
+            status, job_status = socket.socketpair()
+            try:
+                socket.send_fds(self._control, [struct.pack('Q', len(request))],
+                                [write_fd, stderr_file.fileno(), job_status.fileno()])
+                self._control.sendall(request)
+            except Exception:
+                os.close(read_fd)
+                status.close()
+                raise
+            finally:
+                # The worker has its own copies; ours would keep stdout from ending
+                os.close(write_fd)
+                job_status.close()
+
+        return ForkserverJob(status, os.fdopen(read_fd, 'rb'))
+
+    def _start_server(self, env):
+        """Start the worker process and import Ansible in it."""
+        if importlib.util.find_spec('ansible') is None:
+            raise RuntimeError("The forkserver backend needs Ansible installed in NetMan's Python environment")
+
+        if self._control is not None:
+            self._control.close()
+        control, server_control = socket.socketpair()
+        code = (f"import sys; sys.path.insert(0, {_PACKAGE_ROOT!r}); "
+                f"from {__name__} import _fork_server; _fork_server({server_control.fileno()})")
+        try:
+            # The worker gets the job's environment from the start, as
+            # Ansible reads it on import; this process's own is left alone
+            self._server = subprocess.Popen([sys.executable, '-c', code], env=env, stdin=subprocess.DEVNULL,
+                                            pass_fds=(server_control.fileno(),))
+        except Exception:
+            control.close()
+            raise
+        finally:
+            server_control.close()
+
+        self._control = control
+        self._server_vars = _ansible_vars(env)
+
+class ForkserverJob:
+    """An Ansible job running in a process forked from the forkserver worker."""
+
+    def __init__(self, status, stdout):
+        """
+        Initialize the job.
+
+        Args:
+            status (socket.socket): Socket the job reports its process group
+                and exit code on
+            stdout (file): Binary read end of the job's stdout
+        """
+        self.status = status
+        self.stdout = stdout
+        self.returncode = None
+        self.pid = _receive_int(status)
+
+    def poll(self):
+        """Return the exit code if the job has finished, None otherwise."""
+        if self.returncode is None and select.select([self.status], [], [], 0)[0]:
+            self._collect()
+        return self.returncode
+
+    def wait(self):
+        """Wait for the job to finish and return its exit code."""
+        if self.returncode is None:
+            self._collect()
+        return self.returncode
+
+    def kill(self):
+        """Kill the job and the Ansible workers it started."""
+        if self.pid is not None:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(self.pid, signal.SIGKILL)
+
+    def _collect(self):
+        """Receive the exit code; a job that could not report it was killed."""
+        returncode = _receive_int(self.status)
+        self.returncode = -signal.SIGKILL if returncode is None else returncode
+        self.status.close()
+
+    def __enter__(self):
+        """Use the job as a context manager, like subprocess.Popen."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close stdout and wait for the job."""
+        self.stdout.close()
+        self.wait()
+
+def _receive_int(sock):
+    """Read one integer from a job status socket, None at end of stream."""
+    data = b''
+    while len(data) < 8:
+        chunk = sock.recv(8 - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return struct.unpack('q', data)[0]
+
+def _fork_server(control_fd):
+    """
+    Main loop of the forkserver worker: fork a job for every request.
+
+    Each request is a length, sent with the job's stdout, stderr and status
+    descriptors, followed by the JSON encoded [cli, args, env, cwd]. The
+    worker exits when the backend closes its end of the control socket.
+
+    Args:
+        control_fd (int): Descriptor of the worker's end of the control socket
+    """
+    # Ctrl+C in the shell reaches the jobs, not the worker; the worker never
+    # waits for its children, so the kernel reaps them
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+    cli_classes = {cli: getattr(importlib.import_module(module_name), class_name)
+                   for cli, (module_name, class_name) in ANSIBLE_CLIS.items()}
+    control = socket.socket(fileno=control_fd)
+
+    while True:
+        try:
+            header, fds, _, _ = socket.recv_fds(control, 8, 3)
+        except OSError:
+            break
+        if not header:
+            break
+        header += control.recv(8 - len(header), socket.MSG_WAITALL)
+        request = control.recv(struct.unpack('Q', header)[0], socket.MSG_WAITALL)
+        cli, args, env, cwd = json.loads(request)
+
+        if os.fork() == 0:
+            control.close()
+            _supervise_job(cli_classes[cli], [cli] + args, env, cwd, *fds)
+        for fd in fds:
+            os.close(fd)
+
+def _supervise_job(cli_class, argv, env, cwd, stdout_fd, stderr_fd, status_fd):
+    """
+    Run one job in a child of the forkserver worker and report how it ended.
+
+    The job runs in a grandchild so that this process can wait for it and
+    send its exit code. Both are in a new process group, whose id is sent
+    first, so ForkserverJob.kill() reaches the Ansible workers too.
+    """
+    try:
+        os.setsid()
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        os.write(status_fd, struct.pack('q', os.getpid()))
+
+        pid = os.fork()
+        if pid == 0:
+            os.close(status_fd)
+            _run_ansible_cli(cli_class, argv, env, cwd, stdout_fd, stderr_fd)
+
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+        _, status = os.waitpid(pid, 0)
+        os.write(status_fd, struct.pack('q', os.waitstatus_to_exitcode(status)))
+    finally:
+        os._exit(0)
+
+def _run_ansible_cli(cli_class, argv, env, cwd, stdout_fd, stderr_fd):
+    """
+    Run an Ansible CLI in the current process and exit with its exit code.
+
+    Args:
+        cli_class (type): Ansible CLI class, e.g. PlaybookCLI
+        argv (list): Command line, starting with the program name
+        env (dict): Environment to run with
+        cwd (str): Directory to run in
+        stdout_fd (int): Descriptor to use as stdout
+        stderr_fd (int): Descriptor to use as stderr
+    """
+    exit_code = 1
+    try:
+        os.chdir(cwd)
+        os.environ.clear()
+        os.environ.update(env)
+
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+        sys.stdout.reconfigure(line_buffering=True)
+
+        cli_class.cli_executor(argv)
+        exit_code = 0
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(exit_code)
+
+def _ansible_vars(env):
+    """Get the ANSIBLE_* variables of an environment."""
+    return {key: value for key, value in env.items() if key.startswith('ANSIBLE_')}
+
+# Backends by name, as used by the ansible.backend setting
+BACKENDS = {
+    'subprocess': SubprocessBackend,
+    'forkserver': ForkserverBackend
+}
+
+@lru_cache(maxsize=None)
+def get_backend(name):
+    """
+    Get the shared backend with a given name.
+
+    Args:
+        name (str): Backend name, see BACKENDS
+
+    Returns:
+        The backend
+
+    Raises:
+        ValueError: If there is no backend with that name
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown Ansible backend: {name}")
+    return BACKENDS[name]()
@@ -0,0 +1,295 @@
+"""
+Ansible result parsing module for the Network Device Management tool.
+
+This module configures Ansible to report results in a machine-readable form,
+turns that output into a stream of NetMan events line by line, and collects
+per-host results from the events, so NetMan never has to scrape
+human-oriented stdout or hold a whole run's output in memory.
+
+Events are dictionaries with a 'type' key:
+
+- ``play_start``: 'play'
+- ``task_start``: 'play', 'task'
+- ``host_ok``, ``host_changed``, ``host_failed``, ``host_unreachable``,
+  ``host_skipped``: 'play', 'task', 'host', 'result'
+- ``recap``: 'stats', the play recap counters per host
+- ``run_end``: 'returncode', 'error', 'log_file' (added by AnsibleRunner)
+"""
+import json
+
+# Stdout callback emitting one JSON document per event
+RESULT_CALLBACK = 'ansible.posix.jsonl'
+
+# Environment forcing the structured callback for ansible and ansible-playbook
+CALLBACK_ENV = {
+    'ANSIBLE_STDOUT_CALLBACK': RESULT_CALLBACK,
+    # Ad-hoc `ansible` ignores the stdout callback unless this is set
+    'ANSIBLE_LOAD_CALLBACK_PLUGINS': '1',
+    'ANSIBLE_NOCOLOR': '1',
+    'ANSIBLE_RETRY_FILES_ENABLED': '0'
+}
+
+# Callback runner events and the NetMan event they become
+RUNNER_EVENTS = {
+    'v2_runner_on_ok': 'host_ok',
+    'v2_runner_on_failed': 'host_failed',
+    'v2_runner_on_unreachable': 'host_unreachable',
+    'v2_runner_on_skipped': 'host_skipped'
+}
+
+# Host events and the per-host counter they increment
+HOST_EVENTS = {
+    'host_ok': 'ok',
+    'host_changed': 'ok',
+    'host_failed': 'failed',
+    'host_unreachable': 'unreachable',
+    'host_skipped': 'skipped'
+}
+
+# Play recap keys as reported by Ansible's stats, mapped to NetMan's names
+STATS_KEYS = {
+    'ok': 'ok',
+    'changed': 'changed',
+    'failures': 'failed',
+    'unreachable': 'unreachable',
+    'skipped': 'skipped',
+    'rescued': 'rescued',
+    'ignored': 'ignored'
+}
+
+class EventParser:
+    """Turns structured Ansible callback output into NetMan events."""
+
+    def __init__(self):
+        """Initialize the parser."""
+        self._pending = []
+        self._play = ''
+        self._task = ''
+
+    def parse(self, line):
+        """
+        Parse one line of callback output.
+
+        Lines of the jsonl callback produce their events immediately. A JSON
+        document spanning several lines (the output of the plain json
+        callback) is kept until finish(). Other lines, such as warnings, are
+        ignored.
+
+        Args:
+            line (str): A line of ansible/ansible-playbook stdout
+
+        Returns:
+            list: Events described by the line, possibly none
+        """
+        text = line.strip()
+        if not text:
+            return []
+
+        if not self._pending:
+            if not text.startswith('{'):
+                return []
+            try:
+                return self._from_callback_event(json.loads(text))
+            except ValueError:
+                pass
+        self._pending.append(line)
+        return []
+
+    def finish(self):
+        """
+        Parse whatever output was kept back.
+
+        Returns:
+            list: Events from the output of the non-streaming json callback
+        """
+        if not self._pending:
+            return []
+
+        try:
+            document = json.loads(''.join(self._pending))
+        except ValueError:
+            document = None
+        self._pending = []
+
+        if not isinstance(document, dict):
+            return []
+
+        events = []
+        for play in document.get('plays', []):
+            self._play = play.get('play', {}).get('name', '')
+            events.append({'type': 'play_start', 'play': self._play})
+            for task in play.get('tasks', []):
+                self._task = task.get('task', {}).get('name', '')
+                events.append({'type': 'task_start', 'play': self._play, 'task': self._task})
+                for hostname, host_result in task.get('hosts', {}).items():
+                    events.append(self._host_event(_runner_event_for(host_result), hostname, host_result))
+        if 'stats' in document:
+            events.append(_recap_event(document['stats']))
+        return events
+
+    def _from_callback_event(self, event):
+        """Translate one jsonl callback event."""
+        event_name = event.get('_event', '')
+
+        if event_name == 'v2_playbook_on_play_start':
+            self._play = event.get('play', {}).get('name', '')
+            return [{'type': 'play_start', 'play': self._play}]
+
+        if event_name == 'v2_playbook_on_task_start':
+            self._task = event.get('task', {}).get('name', '')
+            return [{'type': 'task_start', 'play': self._play, 'task': self._task}]
+
+        if event_name in RUNNER_EVENTS:
+            if 'task' in event:
+                self._task = event['task'].get('name', self._task)
+            return [self._host_event(event_name, hostname, host_result)
+                    for hostname, host_result in event.get('hosts', {}).items()]
+
+        if event_name == 'v2_playbook_on_stats':
+            return [_recap_event(event.get('stats', {}))]
+
+        return []
+
+    def _host_event(self, event_name, hostname, host_result):
+        """Build the event for one task result on one host."""
+        event_type = RUNNER_EVENTS[event_name]
+        if event_type == 'host_ok' and host_result.get('changed'):
+            event_type = 'host_changed'
+
+        return {
+            'type': event_type,
+            'play': self._play,
+            'task': self._task,
+            'host': hostname,
+            'result': host_result
+        }
+
+class ResultCollector:
+    """Collects per-host results from NetMan events."""
+
+    def __init__(self):
+        """Initialize an empty collection."""
+        self.hosts = {}
+        self._parser = EventParser()
+
+    def feed(self, line):
+        """
+        Consume one line of callback output.
+
+        Args:
+            line (str): A line of ansible/ansible-playbook stdout
+        """
+        for event in self._parser.parse(line):
+            self.add(event)
+
+    def finish(self):
+        """
+        Finish collecting and return the per-host results.
+
+        Returns:
+            dict: Result record per hostname (see _host_record)
+        """
+        for event in self._parser.finish():
+            self.add(event)
+        return self.hosts
+
+    def add(self, event):
+        """
+        Apply one event.
+
+        Only counters, failures and each host's latest result are kept, so
+        memory stays bounded however many tasks a run has.
+
+        Args:
+            event (dict): A NetMan event
+        """
+        event_type = event['type']
+
+        if event_type in HOST_EVENTS:
+            record = self._host_record(event['host'])
+            host_result = event['result']
+
+            record[HOST_EVENTS[event_type]] += 1
+            if event_type == 'host_changed':
+                record['changed'] += 1
+
+            if event_type in ('host_failed', 'host_unreachable'):
+                if not host_result.get('ignore_errors'):
+                    record['success'] = False
+                record['failures'].append({
+                    'task': event.get('task', ''),
+                    'status': HOST_EVENTS[event_type],
+                    'msg': host_result.get('msg', '')
+                })
+
+            if event_type == 'host_skipped':
+                return
+
+            record['result'] = host_result
+
+            # NetMan playbooks publish their outcome with set_fact: ansible_result
+            ansible_result = host_result.get('ansible_facts', {}).get('ansible_result')
+            if ansible_result is not None:
+                record['ansible_result'] = ansible_result
+
+        elif event_type == 'recap':
+            # Ansible's own recap replaces the counted totals
+            for hostname, host_stats in event['stats'].items():
+                record = self._host_record(hostname)
+                record.update(host_stats)
+                record['success'] = record['failed'] == 0 and record['unreachable'] == 0
+
+    def _host_record(self, hostname):
+        """Get or create the result record for a host."""
+        if hostname not in self.hosts:
+            self.hosts[hostname] = {
+                'success': True,
+                'ok': 0,
+                'changed': 0,
+                'failed': 0,
+                'unreachable': 0,
+                'skipped': 0,
+                'failures': [],
+                'result': {},
+                'ansible_result': None
+            }
+        return self.hosts[hostname]
+
+def host_finished(event):
+    """
+    Check whether an event marks the end of a host's part in a NetMan playbook.
+
+    NetMan playbooks end by setting the ansible_result fact; a host that fails
+    or becomes unreachable is dropped from the play.
+
+    Args:
+        event (dict): A NetMan event
+
+    Returns:
+        bool: True if the host has nothing left to run
+    """
+    if event['type'] in ('host_failed', 'host_unreachable'):
+        return not event['result'].get('ignore_errors')
+    if event['type'] in ('host_ok', 'host_changed'):
+        return 'ansible_result' in event['result'].get('ansible_facts', {})
+    return False
+
+def _recap_event(stats):
+    """Build a recap event from Ansible's stats."""
+    return {
+        'type': 'recap',
+        'stats': {
+            hostname: {name: host_stats[key] for key, name in STATS_KEYS.items() if key in host_stats}
+            for hostname, host_stats in stats.items()
+        }
+    }
+
+def _runner_event_for(host_result):
+    """Work out the runner event for a result from the plain json callback."""
+    if host_result.get('unreachable'):
+        return 'v2_runner_on_unreachable'
+    if host_result.get('failed'):
+        return 'v2_runner_on_failed'
+    if host_result.get('skipped'):
+        return 'v2_runner_on_skipped'
+    return 'v2_runner_on_ok'
@@ -4,11 +4,32 @@ Ansible integration module for the Network Device Management tool.
 This module handles running Ansible playbooks and modules.
 """
 import os
+import re
 import json
+import time
+import shutil
 import tempfile
-import subprocess
 from pathlib import Path
-import yaml
+from .ansible_events import CALLBACK_ENV, EventParser, ResultCollector
+from .ansible_backends import get_backend
+from .connections import connection_env
+from .fact_cache import fact_cache_env
+from .job_files import JobFiles
+from .metrics import record_job
+from .settings import get_setting
+
+# How much of stderr is reported as the error of a failed run
+STDERR_TAIL_BYTES = 4096
+
+# Longest JSON passed inline on the command line; Linux rejects any single
+# argument over 128 KiB, so larger extra vars go through a job file
+MAX_INLINE_JSON = 100 * 1024
+
+# Run logs kept in the log directory; older ones are removed
+LOG_MAX_FILES = 200
+
+# Names of run logs, as created by AnsibleRunner._open_log
+_RUN_LOG = re.compile(r'_\d{8}_\d{6}_[^.]+\.log$')
 
 # Check if we're in demo mode
 DEMO_MODE = os.environ.get('NETMAN_DEMO_MODE', 'false').lower() in ('true', '1', 'yes')
@@ -21,6 +42,29 @@ if DEMO_MODE:
     except ImportError:
         pass
 
+# Whether this process runs many commands, see mark_long_lived
+_long_lived = False
+
+def mark_long_lived():
+    """
+    Note that this process runs many commands (`netman serve`, `netman shell`).
+
+    Jobs then start from the forkserver backend, so only the first one pays
+    for importing Ansible, and stale facts are refreshed in the background
+    (see Monitor.get_device_facts).
+    """
+    global _long_lived
+    _long_lived = True
+
+def is_long_lived():
+    """
+    Check whether this process runs many commands.
+
+    Returns:
+        bool: True after mark_long_lived() has been called
+    """
+    return _long_lived
+
 class AnsibleRunner:
     """Runs Ansible playbooks and modules for network automation."""
     
@@ -34,141 +78,408 @@ class AnsibleRunner:
             cls._simulator = DeviceSimulator()
         return cls._simulator
     
-    def __init__(self, inventory_file="data/ansible_inventory.yml"):
-        """Initialize with the inventory file path."""
+    def __init__(self, inventory_file="data/ansible_inventory.yml", log_dir="logs",
+                 host_timeout=None, task_timeout=None, backend=None):
+        """
+        Initialize the runner.
+        
+        Args:
+            inventory_file (str): Path to the Ansible inventory
+            log_dir (str): Directory for the raw output of playbook runs
+            host_timeout (int, optional): Seconds to wait for a device to
+                connect or answer a command (default: ansible.timeout setting)
+            task_timeout (int, optional): Seconds a task may run on one host
+                before it fails for that host (default: ansible.task_timeout)
+            backend (str, optional): How Ansible jobs are started, see
+                ansible_backends.BACKENDS (default: 'forkserver' in serve
+                and shell, else the ansible.backend setting)
+        """
         self.inventory_file = inventory_file
+        self.log_dir = log_dir
+        self.host_timeout = host_timeout or get_setting('ansible', 'timeout', 30)
+        self.task_timeout = task_timeout or get_setting('ansible', 'task_timeout', 300)
+        if not backend and _long_lived:
+            backend = 'forkserver'
+        self.backend = backend or get_setting('ansible', 'backend', 'subprocess')
     
-    def run_playbook(self, playbook_path, extra_vars=None):
+    def run_playbook(self, playbook_path, extra_vars=None, limit=None, forks=None, strategy=None,
+                     on_event=None, backend=None):
         """
         Run an Ansible playbook.
         
+        A single invocation can target many devices: pass the hosts, groups
+        or patterns to run against as `limit`, and Ansible's startup cost is
+        paid once for all of them.
+        
         Args:
             playbook_path (str): Path to the playbook file
             extra_vars (dict, optional): Extra variables to pass to the playbook
+            limit (str or list, optional): Hosts, groups or patterns to run
+                against (see build_limit); target_host defaults to 'all'
+            forks (int, optional): Number of hosts Ansible works on in parallel
+            strategy (str, optional): Play strategy, e.g. 'free' to let fast
+                hosts run ahead of slow ones
+            on_event (callable, optional): Called with each event of the run
+                as it happens (see stream_playbook)
+            backend (str, optional): Execution backend for this run only
             
         Returns:
-            dict: Result of the playbook run
+            dict: Result of the playbook run; 'hosts' maps each targeted host
+                to its task counters, failures and 'ansible_result' fact
+                (see ansible_events.ResultCollector), and single-host runs
+                also carry that host's 'ansible_result' at the top level
         """
+        start_time = time.monotonic()
+        result = self._run_playbook(playbook_path, extra_vars, limit, forks, strategy, on_event, backend)
+        record_job('playbook', Path(playbook_path).stem, time.monotonic() - start_time, result.get('success', False))
+        return result
+    
+    def _run_playbook(self, playbook_path, extra_vars, limit, forks, strategy, on_event, backend):
+        """Run an Ansible playbook, see run_playbook."""
+        extra_vars, limit = self._prepare_run(extra_vars, limit, strategy)
+        
         # Use simulated responses in demo mode
         if DEMO_MODE:
             simulator = self._get_simulator()
             if simulator:
-                return self._simulate_playbook(playbook_path, extra_vars)
+                if limit:
+                    result = self._simulate_multi_host(playbook_path, extra_vars, limit)
+                else:
+                    result = self._simulate_playbook(playbook_path, extra_vars)
+                if on_event:
+                    for event in self._simulated_events(playbook_path, extra_vars, result):
+                        on_event(event)
+                return result
             
         try:
             # Check if playbook exists
             if not os.path.exists(playbook_path):
                 return {'success': False, 'error': f"Playbook {playbook_path} not found"}
             
-            # Create a temporary file for extra vars if provided
-            extra_vars_file = None
-            if extra_vars:
-                fd, extra_vars_file = tempfile.mkstemp(suffix='.json')
-                with os.fdopen(fd, 'w') as f:
-                    json.dump(extra_vars, f)
-            
-            # Build command
-            cmd = ['ansible-playbook', '-i', self.inventory_file, playbook_path]
+            collector = ResultCollector()
+            run_end = {}
+            for event in self.stream_playbook(playbook_path, extra_vars, limit, forks, backend=backend):
+                collector.add(event)
+                if on_event:
+                    on_event(event)
+                if event['type'] == 'run_end':
+                    run_end = event
             
-            if extra_vars_file:
-                cmd.extend(['-e', f'@{extra_vars_file}'])
-            
-            # Run the command
-            process = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Parse the output
-            result = {'success': process.returncode == 0}
-            if process.returncode != 0:
-                result['error'] = process.stderr
+            return self._playbook_result(collector.hosts, run_end)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def stream_playbook(self, playbook_path, extra_vars=None, limit=None, forks=None, strategy=None,
+                        backend=None):
+        """
+        Run an Ansible playbook, yielding its events as they happen.
+        
+        Ansible's output is read line by line and never held in memory as a
+        whole; the raw output is written to a log file under `log_dir`
+        instead. Closing the generator early stops the run.
+        
+        Args:
+            playbook_path (str): Path to the playbook file
+            extra_vars (dict, optional): Extra variables to pass to the playbook
+            limit (str or list, optional): Hosts, groups or patterns to run against
+            forks (int, optional): Number of hosts Ansible works on in parallel
+            strategy (str, optional): Play strategy, e.g. 'free'
+            backend (str, optional): Execution backend for this run only
+            
+        Yields:
+            dict: Events as described in ansible_events, ending with a
+                'run_end' event carrying the return code, error and log file
+        """
+        extra_vars, limit = self._prepare_run(extra_vars, limit, strategy)
+        
+        # Use simulated responses in demo mode
+        if DEMO_MODE and self._get_simulator():
+            if limit:
+                result = self._simulate_multi_host(playbook_path, extra_vars, limit)
             else:
-                result['stdout'] = process.stdout
+                result = self._simulate_playbook(playbook_path, extra_vars)
+            yield from self._simulated_events(playbook_path, extra_vars, result)
+            return
+        
+        fd, log_file = self._open_log(playbook_path)
+        
+        job_files = JobFiles()
+        parser = EventParser()
+        process = None
+        try:
+            with os.fdopen(fd, 'wb') as log, tempfile.TemporaryFile() as stderr_file:
+                cmd = self._playbook_command(playbook_path, extra_vars, limit, forks, job_files)
+                process = get_backend(backend or self.backend).start(cmd, self._ansible_env(), stderr_file)
+                for line in process.stdout:
+                    log.write(line)
+                    yield from parser.parse(line.decode('utf-8', 'replace'))
+                yield from parser.finish()
+                
+                returncode = process.wait()
                 
-            # Clean up
-            if extra_vars_file and os.path.exists(extra_vars_file):
-                os.remove(extra_vars_file)
+                # Keep stderr with the rest of the run's output
+                stderr_file.seek(0)
+                shutil.copyfileobj(stderr_file, log)
+                error = ''
+                if returncode != 0:
+                    error = _tail(stderr_file, STDERR_TAIL_BYTES).strip()
+            
+            yield {'type': 'run_end', 'returncode': returncode, 'error': error, 'log_file': log_file}
+        finally:
+            if process is not None:
+                if process.poll() is None:
+                    process.kill()
+                process.stdout.close()
+                process.wait()
+            job_files.cleanup()
+    
+    def _playbook_command(self, playbook_path, extra_vars, limit, forks, job_files):
+        """
+        Build the ansible-playbook command line for a run.
+        
+        Extra vars are passed as inline JSON; only vars too large for the
+        command line are written to a file in the job's private directory.
+        
+        Args:
+            job_files (JobFiles): Job files the caller cleans up after the run
             
-            return result
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        Returns:
+            list: Command line
+        """
+        cmd = ['ansible-playbook', '-i', self.inventory_file, playbook_path]
+        
+        if extra_vars:
+            extra_vars_json = json.dumps(extra_vars)
+            if len(extra_vars_json.encode('utf-8')) > MAX_INLINE_JSON:
+                extra_vars_json = '@' + job_files.write('extra_vars.json', extra_vars_json)
+            cmd.extend(['-e', extra_vars_json])
+        if limit:
+            cmd.extend(['--limit', limit])
+        if forks:
+            cmd.extend(['--forks', str(forks)])
+        
+        return cmd
+    
+    def _open_log(self, playbook_path):
+        """
+        Create a new log file for the raw output of a playbook run.
+        
+        The oldest run logs beyond ansible.log_max_files are removed.
+        
+        Returns:
+            tuple: (open file descriptor, path of the log file)
+        """
+        os.makedirs(self.log_dir, exist_ok=True)
+        log = tempfile.mkstemp(
+            prefix=f"{Path(playbook_path).stem}_{time.strftime('%Y%m%d_%H%M%S')}_",
+            suffix='.log',
+            dir=self.log_dir
+        )
+        _prune_logs(self.log_dir, get_setting('ansible', 'log_max_files', LOG_MAX_FILES))
+        return log
+    
+    def _ansible_env(self):
+        """
+        Build the environment Ansible runs with.
+        
+        Besides the structured result callback this bounds how long a single
+        device can hold up a run: connecting to it or waiting for a command
+        gives up after host_timeout, and a task on one host fails after
+        task_timeout, without affecting the other hosts. Persistent
+        connection settings come from connections.connection_env and the
+        fact cache settings from fact_cache.fact_cache_env.
+        
+        Returns:
+            dict: Environment variables
+        """
+        return dict(
+            os.environ,
+            ANSIBLE_TIMEOUT=str(self.host_timeout),
+            ANSIBLE_TASK_TIMEOUT=str(self.task_timeout),
+            **connection_env(self.host_timeout),
+            **fact_cache_env(),
+            **CALLBACK_ENV
+        )
     
-    def run_module(self, host, module, module_args=None):
+    def _playbook_result(self, hosts, run_end):
+        """
+        Build the result of a playbook run from its collected events.
+        
+        Args:
+            hosts (dict): Per-host results from ResultCollector
+            run_end (dict): The run's 'run_end' event
+            
+        Returns:
+            dict: Result as returned by run_playbook
+        """
+        result = {
+            'success': run_end.get('returncode') == 0,
+            'hosts': hosts,
+            'log_file': run_end.get('log_file')
+        }
+        if run_end.get('timed_out'):
+            result['timed_out'] = True
+        if not result['success']:
+            result['error'] = run_end.get('error') or _first_failure(hosts)
+        
+        # A single-host run surfaces the playbook's ansible_result directly
+        if len(hosts) == 1:
+            result['ansible_result'] = next(iter(hosts.values()))['ansible_result']
+        
+        return result
+    
+    def _prepare_run(self, extra_vars, limit, strategy):
+        """
+        Apply the limit and strategy options to a playbook run's extra vars.
+        
+        Returns:
+            tuple: (extra vars, limit pattern or None)
+        """
+        extra_vars = dict(extra_vars or {})
+        if limit:
+            limit = self.build_limit(limit)
+            extra_vars.setdefault('target_host', 'all')
+        if strategy:
+            extra_vars['netman_strategy'] = strategy
+        return extra_vars, limit or None
+    
+    @staticmethod
+    def build_limit(hosts=None, groups=None, pattern=None):
+        """
+        Build an Ansible host pattern for --limit.
+        
+        Args:
+            hosts (str or list, optional): Hostnames (or a ready-made pattern)
+            groups (list, optional): Inventory group names
+            pattern (str, optional): Additional Ansible host pattern, e.g. 'core:&prod'
+            
+        Returns:
+            str: Comma-separated host pattern
+        """
+        parts = []
+        for value in (hosts, groups, pattern):
+            if not value:
+                continue
+            if isinstance(value, str):
+                parts.append(value)
+            else:
+                parts.extend(value)
+        return ','.join(parts)
+    
+    def run_module(self, host, module, module_args=None, forks=None, backend=None):
         """
         Run an Ansible module.
         
         Args:
-            host (str): Target host or group
+            host (str or list): Target host, group or pattern, or a list of them
             module (str): Ansible module name
             module_args (dict, optional): Module arguments
+            forks (int, optional): Number of hosts Ansible works on in parallel
+            backend (str, optional): Execution backend for this run only
             
         Returns:
-            dict: Result of the module run
+            dict: Result of the module run with a per-host 'hosts' map; for a
+                single host the module's own result keys are included as well
         """
+        start_time = time.monotonic()
+        result = self._run_module(host, module, module_args, forks, backend)
+        record_job('module', module, time.monotonic() - start_time, result.get('success', False))
+        return result
+    
+    def _run_module(self, host, module, module_args, forks, backend):
+        """Run an Ansible module, see run_module."""
+        host = self.build_limit(host)
+        
         # Use simulated responses in demo mode
-        if DEMO_MODE and self._simulator:
+        if DEMO_MODE and self._get_simulator():
             return self._simulate_module(host, module, module_args)
             
         try:
-            # Create a temporary file for module args if provided
-            args_file = None
-            if module_args:
-                fd, args_file = tempfile.mkstemp(suffix='.json')
-                with os.fdopen(fd, 'w') as f:
-                    json.dump(module_args, f)
-            
-            # Build command
-            cmd = [
-                'ansible',
-                host,
-                '-i', self.inventory_file,
-                '-m', module
-            ]
-            
-            if args_file:
-                cmd.extend(['-a', f'@{args_file}'])
-            elif module_args:
-                args_str = " ".join(f"{k}='{v}'" for k, v in module_args.items())
-                cmd.extend(['-a', args_str])
+            cmd = self._module_command(host, module, module_args, forks)
             
             # Run the command
-            process = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Parse the output
-            result = {'success': process.returncode == 0}
-            
-            if process.returncode == 0:
-                # Try to parse JSON output
-                try:
-                    output = process.stdout.strip()
-                    # Ansible often returns output like "hostname | SUCCESS => { json data }"
-                    if ' => ' in output:
-                        json_part = output.split(' => ', 1)[1].strip()
-                        parsed_output = json.loads(json_part)
-                        result.update(parsed_output)
-                    else:
-                        result['stdout'] = output
-                except:
-                    result['stdout'] = process.stdout
-            else:
-                result['error'] = process.stderr
-            
-            # Clean up
-            if args_file and os.path.exists(args_file):
-                os.remove(args_file)
+            returncode, hosts, stderr = self._execute(cmd, backend)
             
-            return result
+            return self._module_result(hosts, returncode, stderr)
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def _module_command(self, host, module, module_args, forks):
+        """
+        Build the ad-hoc ansible command line for a module run.
+        
+        Module args are passed as inline JSON, which ansible parses as such.
+        
+        Returns:
+            list: Command line
+        """
+        cmd = [
+            'ansible',
+            host,
+            '-i', self.inventory_file,
+            '-m', module
+        ]
+        
+        if forks:
+            cmd.extend(['--forks', str(forks)])
+        
+        if module_args:
+            cmd.extend(['-a', json.dumps(module_args)])
+        
+        return cmd
+    
+    def _module_result(self, hosts, returncode, stderr):
+        """
+        Build the result of a module run.
+        
+        Args:
+            hosts (dict): Per-host results from ResultCollector
+            returncode (int): Exit status of ansible
+            stderr (str): End of ansible's stderr
+            
+        Returns:
+            dict: Result as returned by run_module
+        """
+        result = {'success': returncode == 0, 'hosts': hosts}
+        if returncode != 0:
+            result['error'] = stderr.strip() or _first_failure(hosts)
+        
+        # A single-host run returns the module result at the top level
+        if len(hosts) == 1:
+            module_result = next(iter(hosts.values()))['result']
+            result.update({key: value for key, value in module_result.items()
+                           if key not in ('success', 'hosts', 'error')})
+        
+        return result
+    
+    def _execute(self, cmd, backend=None):
+        """
+        Run an ad-hoc ansible command with the structured result callback.
+        
+        Results are parsed line by line as Ansible reports them instead of
+        buffering the whole of stdout. Stderr is spooled to an anonymous
+        temporary file and only its tail is read back when the run fails.
+        
+        Args:
+            cmd (list): Command line to run
+            backend (str, optional): Execution backend, default self.backend
+            
+        Returns:
+            tuple: (return code, per-host results, end of stderr)
+        """
+        collector = ResultCollector()
+        
+        with tempfile.TemporaryFile() as stderr_file:
+            with get_backend(backend or self.backend).start(cmd, self._ansible_env(), stderr_file) as process:
+                for line in process.stdout:
+                    collector.feed(line.decode('utf-8', 'replace'))
+            
+            stderr = ''
+            if process.returncode != 0:
+                stderr = _tail(stderr_file, STDERR_TAIL_BYTES)
+        
+        return process.returncode, collector.finish(), stderr
+    
     def get_inventory(self):
         """
         Get the Ansible inventory.
@@ -177,6 +488,7 @@ class AnsibleRunner:
             dict: Ansible inventory or None if failed
         """
         try:
+            import yaml
             with open(self.inventory_file, 'r') as f:
                 return yaml.safe_load(f)
         except Exception as e:
@@ -214,6 +526,10 @@ class AnsibleRunner:
         if 'backup_config' in playbook_path:
             # Simulate backup config playbook
             backup_file = extra_vars.get('backup_file', '/tmp/backup.cfg') if extra_vars else '/tmp/backup.cfg'
+            if extra_vars and 'backup_file' not in extra_vars and 'backup_dir' in extra_vars:
+                # Multi-host form, mirrors host_backup_file in backup_config.yml
+                backup_file = os.path.join(extra_vars['backup_dir'], target_host,
+                                           f"{target_host}_{extra_vars['backup_timestamp']}.cfg")
             
             # Ensure the directory exists
             os.makedirs(os.path.dirname(backup_file), exist_ok=True)
@@ -252,6 +568,12 @@ class AnsibleRunner:
                 'interfaces_detail': interfaces
             }
             
+        elif 'get_interfaces' in playbook_path:
+            # Simulate collecting interface status with each host's command
+            job = (extra_vars.get('netman_interface_commands') or {}).get(target_host, {})
+            result['output'] = self._simulator.get_response(job.get('device_type', device_type),
+                                                            job.get('command', 'show interfaces'))
+            
         elif 'demo_connectivity' in playbook_path:
             # Simulate demo connectivity playbook
             version = self._simulator.get_response(device_type, 'show version')
@@ -271,6 +593,91 @@ class AnsibleRunner:
             
         return result
     
+    def _simulate_multi_host(self, playbook_path, extra_vars, limit):
+        """
+        Simulate a playbook run against several hosts in demo mode.
+        
+        Args:
+            playbook_path (str): Path to the playbook file
+            extra_vars (dict): Extra variables passed to the playbook
+            limit (str): Comma-separated hosts, groups or patterns
+            
+        Returns:
+            dict: Simulated result with a per-host result map
+        """
+        hosts = {}
+        for hostname in self._resolve_limit(limit):
+            host_vars = dict(extra_vars, target_host=hostname)
+            ansible_result = self._simulate_playbook(playbook_path, host_vars)
+            host_result = dict(ansible_result)
+            host_result.update({'ok': 1, 'changed': int(bool(host_result.get('changed'))),
+                                'unreachable': 0, 'failed': 0, 'skipped': 0,
+                                'ansible_result': ansible_result})
+            hosts[hostname] = host_result
+        
+        return {'success': True, 'hosts': hosts}
+    
+    def _simulated_events(self, playbook_path, extra_vars, result):
+        """
+        Describe a simulated playbook run as events.
+        
+        Args:
+            playbook_path (str): Path to the playbook file
+            extra_vars (dict): Extra variables passed to the playbook
+            result (dict): Result of _simulate_playbook or _simulate_multi_host
+            
+        Yields:
+            dict: Events as described in ansible_events
+        """
+        play = f"Simulated {Path(playbook_path).stem}"
+        hosts = result.get('hosts') or {extra_vars.get('target_host', 'demo-router1'): result}
+        
+        yield {'type': 'play_start', 'play': play}
+        yield {'type': 'task_start', 'play': play, 'task': 'Set result'}
+        for hostname, host_result in hosts.items():
+            changed = bool(host_result.get('changed'))
+            yield {
+                'type': 'host_changed' if changed else 'host_ok',
+                'play': play,
+                'task': 'Set result',
+                'host': hostname,
+                'result': {'changed': changed,
+                           'ansible_facts': {'ansible_result': host_result.get('ansible_result', host_result)}}
+            }
+        yield {
+            'type': 'recap',
+            'stats': {hostname: {'ok': 1, 'changed': int(bool(host_result.get('changed'))),
+                                 'failed': 0, 'unreachable': 0, 'skipped': 0}
+                      for hostname, host_result in hosts.items()}
+        }
+        yield {'type': 'run_end', 'returncode': 0, 'error': '', 'log_file': None}
+    
+    def _resolve_limit(self, limit):
+        """
+        Expand a --limit pattern into hostnames using the NetMan inventory.
+        
+        Supports hostnames, group names, 'all' and shell-style wildcards,
+        which covers what NetMan itself passes as a limit.
+        
+        Args:
+            limit (str): Comma-separated hosts, groups or patterns
+            
+        Returns:
+            list: Matching hostnames in inventory order
+        """
+        import fnmatch
+        from .inventory import InventoryManager
+        
+        devices = InventoryManager().list_devices()
+        selected = set()
+        for item in limit.split(','):
+            for device in devices:
+                if (item in ('all', device['hostname']) or item in device.get('groups', [])
+                        or fnmatch.fnmatch(device['hostname'], item)):
+                    selected.add(device['hostname'])
+        
+        return [device['hostname'] for device in devices if device['hostname'] in selected]
+    
     def _simulate_module(self, host, module, module_args=None):
         """
         Simulate running an Ansible module in demo mode.
@@ -351,3 +758,36 @@ class AnsibleRunner:
             result['msg'] = f"Simulated execution of {module} on {host}"
             
         return result
+
+def _first_failure(hosts):
+    """
+    Describe the first failed or unreachable task in a set of host results.
+    
+    Args:
+        hosts (dict): Per-host results from ResultCollector
+        
+    Returns:
+        str: Error message for the run
+    """
+    for hostname, host_result in hosts.items():
+        for failure in host_result['failures']:
+            return f"{hostname}: {failure['task']}: {failure['msg']}"
+    return 'Ansible run failed'
+
+def _tail(file, size):
+    """Read at most the last `size` bytes of a binary file object as text."""
+    file.seek(0, os.SEEK_END)
+    file.seek(max(0, file.tell() - size))
+    return file.read().decode('utf-8', 'replace')
+
+def _prune_logs(log_dir, max_files):
+    """Remove the oldest run logs beyond max_files."""
+    try:
+        entries = [entry for entry in os.scandir(log_dir) if _RUN_LOG.search(entry.name)]
+        if len(entries) <= max_files:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - max_files]:
+            os.remove(entry.path)
+    except OSError as e:
+        print(f"Error pruning run logs: {str(e)}")
@@ -0,0 +1,321 @@
+"""
+Asynchronous Ansible integration module for the Network Device Management tool.
+
+This module runs Ansible playbooks and modules from asyncio code, so that
+higher-level features can fan out many jobs without threads. Every job runs
+in its own process group under a time limit, cancelling a job stops
+everything it started, and a limiter bounds how many jobs run at once.
+"""
+import os
+import time
+import shutil
+import signal
+import asyncio
+import tempfile
+import contextlib
+from pathlib import Path
+from .ansible_runner import AnsibleRunner, DEMO_MODE, STDERR_TAIL_BYTES, _tail
+from .ansible_events import EventParser, ResultCollector
+from .job_files import JobFiles
+from .metrics import record_job
+from .settings import get_setting
+
+# Longest line of callback output accepted; one event can carry a whole config
+STREAM_LINE_LIMIT = 64 * 1024 * 1024
+
+# Seconds a stopped job gets to exit after SIGTERM before it is killed
+KILL_GRACE_SECONDS = 5
+
+class AsyncAnsibleRunner(AnsibleRunner):
+    """
+    Runs Ansible playbooks and modules as asyncio jobs.
+    
+    Asynchronous jobs always run as subprocesses; the backend setting only
+    applies to the synchronous methods inherited from AnsibleRunner.
+    """
+
+    def __init__(self, inventory_file="data/ansible_inventory.yml", log_dir="logs",
+                 host_timeout=None, task_timeout=None, job_timeout=None, max_concurrent_jobs=None):
+        """
+        Initialize the runner.
+
+        Args:
+            inventory_file (str): Path to the Ansible inventory
+            log_dir (str): Directory for the raw output of playbook runs
+            host_timeout (int, optional): Seconds to wait for a device to
+                connect or answer a command (default: ansible.timeout setting)
+            task_timeout (int, optional): Seconds a task may run on one host
+                (default: ansible.task_timeout setting)
+            job_timeout (int, optional): Seconds a whole job may run before it
+                is stopped (default: ansible.job_timeout setting)
+            max_concurrent_jobs (int, optional): Jobs allowed to run at the
+                same time; others wait (default: ansible.max_concurrent_jobs)
+        """
+        super().__init__(inventory_file, log_dir, host_timeout, task_timeout)
+        self.job_timeout = job_timeout or get_setting('ansible', 'job_timeout', 3600)
+        self.max_concurrent_jobs = max_concurrent_jobs or get_setting('ansible', 'max_concurrent_jobs', 8)
+
+        # asyncio primitives belong to one event loop, so the limiter is
+        # created for the loop that first uses it
+        self._job_slots = None
+        self._job_slots_loop = None
+
+    async def run_playbook_async(self, playbook_path, extra_vars=None, limit=None, forks=None,
+                                 strategy=None, timeout=None, on_event=None):
+        """
+        Run an Ansible playbook as an asyncio job.
+
+        Takes the same arguments and returns the same result as
+        AnsibleRunner.run_playbook. A job that runs out of time is stopped
+        and reported with 'timed_out' set; cancelling the calling task stops
+        the job as well.
+
+        Args:
+            playbook_path (str): Path to the playbook file
+            extra_vars (dict, optional): Extra variables to pass to the playbook
+            limit (str or list, optional): Hosts, groups or patterns to run against
+            forks (int, optional): Number of hosts Ansible works on in parallel
+            strategy (str, optional): Play strategy, e.g. 'free'
+            timeout (int, optional): Seconds the job may run (default: job_timeout)
+            on_event (callable, optional): Called with each event of the run
+
+        Returns:
+            dict: Result of the playbook run
+        """
+        if DEMO_MODE and self._get_simulator():
+            return self.run_playbook(playbook_path, extra_vars, limit, forks, strategy, on_event)
+
+        start_time = time.monotonic()
+        result = await self._run_playbook_async(playbook_path, extra_vars, limit, forks, strategy, timeout, on_event)
+        record_job('playbook', Path(playbook_path).stem, time.monotonic() - start_time, result.get('success', False))
+        return result
+
+    async def _run_playbook_async(self, playbook_path, extra_vars, limit, forks, strategy, timeout, on_event):
+        """Run an Ansible playbook as an asyncio job, see run_playbook_async."""
+        try:
+            if not os.path.exists(playbook_path):
+                return {'success': False, 'error': f"Playbook {playbook_path} not found"}
+
+            collector = ResultCollector()
+            run_end = {}
+            events = self.stream_playbook_async(playbook_path, extra_vars, limit, forks, strategy, timeout)
+            async with contextlib.aclosing(events):
+                async for event in events:
+                    collector.add(event)
+                    if on_event:
+                        on_event(event)
+                    if event['type'] == 'run_end':
+                        run_end = event
+
+            return self._playbook_result(collector.hosts, run_end)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    async def stream_playbook_async(self, playbook_path, extra_vars=None, limit=None, forks=None,
+                                    strategy=None, timeout=None):
+        """
+        Run an Ansible playbook, yielding its events as they happen.
+
+        The asyncio counterpart of AnsibleRunner.stream_playbook. Time spent
+        waiting for a free job slot does not count towards the timeout.
+
+        Args:
+            playbook_path (str): Path to the playbook file
+            extra_vars (dict, optional): Extra variables to pass to the playbook
+            limit (str or list, optional): Hosts, groups or patterns to run against
+            forks (int, optional): Number of hosts Ansible works on in parallel
+            strategy (str, optional): Play strategy, e.g. 'free'
+            timeout (int, optional): Seconds the job may run (default: job_timeout)
+
+        Yields:
+            dict: Events as described in ansible_events, ending with a
+                'run_end' event that also carries 'timed_out'
+        """
+        extra_vars, limit = self._prepare_run(extra_vars, limit, strategy)
+        timeout = timeout or self.job_timeout
+
+        # Use simulated responses in demo mode
+        if DEMO_MODE and self._get_simulator():
+            if limit:
+                result = self._simulate_multi_host(playbook_path, extra_vars, limit)
+            else:
+                result = self._simulate_playbook(playbook_path, extra_vars)
+            for event in self._simulated_events(playbook_path, extra_vars, result):
+                yield event
+            return
+
+        async with self._get_job_slots():
+            fd, log_file = self._open_log(playbook_path)
+
+            job_files = JobFiles()
+            parser = EventParser()
+            status = {}
+            try:
+                with os.fdopen(fd, 'wb') as log, tempfile.TemporaryFile() as stderr_file:
+                    cmd = self._playbook_command(playbook_path, extra_vars, limit, forks, job_files)
+                    lines = self._process_lines(cmd, stderr_file, timeout, status)
+                    async with contextlib.aclosing(lines):
+                        async for line in lines:
+                            log.write(line)
+                            for event in parser.parse(line.decode('utf-8', 'replace')):
+                                yield event
+                    for event in parser.finish():
+                        yield event
+
+                    # Keep stderr with the rest of the run's output
+                    stderr_file.seek(0)
+                    shutil.copyfileobj(stderr_file, log)
+                    error = ''
+                    if status['timed_out']:
+                        error = f"Timed out after {timeout} seconds"
+                    elif status['returncode'] != 0:
+                        error = _tail(stderr_file, STDERR_TAIL_BYTES).strip()
+
+                yield {
+                    'type': 'run_end',
+                    'returncode': status['returncode'],
+                    'error': error,
+                    'log_file': log_file,
+                    'timed_out': status['timed_out']
+                }
+            finally:
+                job_files.cleanup()
+
+    async def run_module_async(self, host, module, module_args=None, forks=None, timeout=None):
+        """
+        Run an Ansible module as an asyncio job.
+
+        Takes the same arguments and returns the same result as
+        AnsibleRunner.run_module, with the same timeout and cancellation
+        behaviour as run_playbook_async.
+
+        Args:
+            host (str or list): Target host, group or pattern, or a list of them
+            module (str): Ansible module name
+            module_args (dict, optional): Module arguments
+            forks (int, optional): Number of hosts Ansible works on in parallel
+            timeout (int, optional): Seconds the job may run (default: job_timeout)
+
+        Returns:
+            dict: Result of the module run
+        """
+        host = self.build_limit(host)
+        timeout = timeout or self.job_timeout
+
+        # Use simulated responses in demo mode
+        if DEMO_MODE and self._get_simulator():
+            return self._simulate_module(host, module, module_args)
+
+        start_time = time.monotonic()
+        result = await self._run_module_async(host, module, module_args, forks, timeout)
+        record_job('module', module, time.monotonic() - start_time, result.get('success', False))
+        return result
+
+    async def _run_module_async(self, host, module, module_args, forks, timeout):
+        """Run an Ansible module as an asyncio job, see run_module_async."""
+        try:
+            async with self._get_job_slots():
+                cmd = self._module_command(host, module, module_args, forks)
+
+                collector = ResultCollector()
+                status = {}
+                with tempfile.TemporaryFile() as stderr_file:
+                    lines = self._process_lines(cmd, stderr_file, timeout, status)
+                    async with contextlib.aclosing(lines):
+                        async for line in lines:
+                            collector.feed(line.decode('utf-8', 'replace'))
+                    stderr = _tail(stderr_file, STDERR_TAIL_BYTES) if status['returncode'] != 0 else ''
+
+            result = self._module_result(collector.finish(), status['returncode'], stderr)
+            if status['timed_out']:
+                result['timed_out'] = True
+                result['error'] = f"Timed out after {timeout} seconds"
+            return result
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def _get_job_slots(self):
+        """Get the job limiter for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._job_slots is None or self._job_slots_loop is not loop:
+            self._job_slots = asyncio.Semaphore(self.max_concurrent_jobs)
+            self._job_slots_loop = loop
+        return self._job_slots
+
+    async def _process_lines(self, cmd, stderr_file, timeout, status):
+        """
+        Run a command in a new process group and yield its stdout lines.
+
+        The whole process group is stopped when the timeout expires, or when
+        the generator is closed or cancelled before the command finished.
+
+        Args:
+            cmd (list): Command line to run
+            stderr_file (file): File receiving the command's stderr
+            timeout (int): Seconds the command may run, None for no limit
+            status (dict): Receives 'returncode' and 'timed_out' once done
+
+        Yields:
+            bytes: Lines of stdout
+        """
+        loop = asyncio.get_running_loop()
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=stderr_file,
+            env=self._ansible_env(),
+            start_new_session=True,
+            limit=STREAM_LINE_LIMIT
+        )
+        deadline = loop.time() + timeout if timeout else None
+        status['timed_out'] = False
+
+        def remaining():
+            return None if deadline is None else max(0, deadline - loop.time())
+
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(process.stdout.readline(), remaining())
+                except asyncio.TimeoutError:
+                    status['timed_out'] = True
+                    break
+                if not line:
+                    break
+                yield line
+
+            if not status['timed_out']:
+                try:
+                    await asyncio.wait_for(process.wait(), remaining())
+                except asyncio.TimeoutError:
+                    status['timed_out'] = True
+        finally:
+            if process.returncode is None:
+                await _stop_process_group(process)
+            status['returncode'] = process.returncode
+
+async def _stop_process_group(process):
+    """
+    Stop a job's process and everything it started.
+
+    Ansible forks workers and connection helpers; signalling the process
+    group reaches all of them, not just ansible-playbook itself.
+
+    Args:
+        process (asyncio.subprocess.Process): Leader of the process group
+    """
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        await process.wait()
+        return
+
+    try:
+        await asyncio.wait_for(process.wait(), KILL_GRACE_SECONDS)
+    except asyncio.TimeoutError:
+        pass
+
+    # Anything still running, including workers that outlived the leader
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGKILL)
+    await process.wait()
@@ -0,0 +1,250 @@
+"""
+Compliance module for the Network Device Management tool.
+
+This module checks which devices drift from a golden template. It renders
+the intended configuration of every device, compares it with the device's
+latest backup section by section, and reports on the whole fleet. A
+device's result is cached until the templates, its variables or its backup
+change.
+"""
+import os
+import csv
+import json
+import html
+import time
+import hashlib
+from .config_diff import section_drift
+from .config_parser import parse_file
+from .config_manager import latest_config_file
+from .template_manager import map_renders
+from .settings import get_setting
+
+# Cached results per template and device
+COMPLIANCE_CACHE = os.path.join('data', 'compliance_cache.json')
+
+REPORT_FORMATS = ('json', 'csv', 'html')
+
+class ComplianceChecker:
+    """Checks device backups against the configuration rendered from a template."""
+
+    def __init__(self, template_manager, config_dir="configs", cache_file=None):
+        """
+        Initialize the checker.
+
+        Args:
+            template_manager (TemplateManager): Renders the intended configurations
+            config_dir (str): Directory holding the device backups
+            cache_file (str, optional): File caching results between runs
+                (default: compliance.cache_file setting)
+        """
+        self.template_manager = template_manager
+        self.config_dir = config_dir
+        self.cache_file = cache_file or get_setting('compliance', 'cache_file', COMPLIANCE_CACHE)
+
+    def check(self, template_name, devices, use_cache=True, workers=None):
+        """
+        Check devices against a template.
+
+        Args:
+            template_name (str): Name of the golden template
+            devices (list): Device dictionaries from the inventory
+            use_cache (bool): Reuse results whose inputs did not change
+            workers (int, optional): Processes to check with (default:
+                compliance.workers, or one per CPU)
+
+        Returns:
+            dict: Report with 'template', 'generated_at', 'summary' (counts
+                per status, see _summarize) and 'devices' (a result per
+                device, see _check_device)
+        """
+        start_time = time.perf_counter()
+        cache = self._load_cache() if use_cache else {}
+        template_cache = cache.setdefault(template_name, {})
+        templates_signature = self.template_manager.signature()
+
+        results = {}
+        tasks = []
+        keys = {}
+        with self.template_manager.vars_loader.batch():
+            for device in devices:
+                hostname = device['hostname']
+                backup_file = latest_config_file(self.config_dir, hostname)
+                variables = self.template_manager.vars_loader.load_layered(hostname, device.get('groups'))
+
+                key = _cache_key(templates_signature, variables, backup_file)
+                cached = template_cache.get(hostname)
+                if cached and cached['key'] == key:
+                    results[hostname] = cached['result']
+                else:
+                    keys[hostname] = key
+                    tasks.append((hostname, device.get('device_type'), template_name, variables, backup_file))
+
+        workers = workers or get_setting('compliance', 'workers', 0)
+        for result in map_renders(self.template_manager, _check_device, tasks, workers):
+            results[result['hostname']] = result
+            template_cache[result['hostname']] = {'key': keys[result['hostname']], 'result': result}
+
+        self._save_cache(cache)
+
+        device_results = [results[device['hostname']] for device in devices]
+        summary = _summarize(device_results)
+        summary['checked'] = len(tasks)
+        summary['cached'] = len(devices) - len(tasks)
+        summary['seconds'] = round(time.perf_counter() - start_time, 3)
+
+        return {
+            'template': template_name,
+            'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'summary': summary,
+            'devices': device_results
+        }
+
+    def _load_cache(self):
+        """Load cached results, empty if there are none."""
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        """Save cached results, replacing the file atomically."""
+        temp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            with open(temp_file, 'w') as f:
+                json.dump(cache, f)
+            os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            print(f"Error saving compliance cache: {str(e)}")
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+def write_report(report, output_path, report_format=None):
+    """
+    Write a compliance report to a file.
+
+    Args:
+        report (dict): Report from ComplianceChecker.check
+        output_path (str): File to write
+        report_format (str, optional): 'json', 'csv' or 'html' (default:
+            taken from the file extension, JSON if unknown)
+    """
+    if report_format is None:
+        extension = os.path.splitext(output_path)[1].lstrip('.').lower()
+        report_format = extension if extension in REPORT_FORMATS else 'json'
+
+    with open(output_path, 'w', newline='' if report_format == 'csv' else None) as f:
+        if report_format == 'csv':
+            _write_csv(report, f)
+        elif report_format == 'html':
+            _write_html(report, f)
+        else:
+            json.dump(report, f, indent=2)
+
+def _check_device(template_manager, task):
+    """
+    Check one device against a template.
+
+    Returns:
+        dict: 'hostname', 'status' ('compliant', 'drift', 'no_backup' or
+            'error'), 'drifted_sections', 'delta_lines' (lines a delta push
+            would send), 'sections' (see section_drift) and 'error'
+    """
+    hostname, device_type, template_name, variables, backup_file = task
+    result = {
+        'hostname': hostname,
+        'status': 'compliant',
+        'drifted_sections': 0,
+        'delta_lines': 0,
+        'sections': [],
+        'error': None
+    }
+
+    try:
+        if not os.path.exists(backup_file):
+            result['status'] = 'no_backup'
+            return result
+
+        intended = template_manager.env.get_template(f"{template_name}.j2").render(**variables)
+        drift = section_drift(intended, parse_file(backup_file, device_type))
+
+        if drift:
+            result.update({
+                'status': 'drift',
+                'drifted_sections': len(drift),
+                'delta_lines': sum(len(section['missing']) for section in drift),
+                'sections': drift
+            })
+    except Exception as e:
+        result.update({'status': 'error', 'error': str(e)})
+
+    return result
+
+def _cache_key(templates_signature, variables, backup_file):
+    """Build the key a device's cached result is valid for."""
+    try:
+        stat = os.stat(backup_file)
+        backup_signature = f"{stat.st_size}:{stat.st_mtime_ns}"
+    except FileNotFoundError:
+        backup_signature = 'missing'
+
+    digest = hashlib.sha1()
+    for part in (templates_signature, json.dumps(variables, sort_keys=True, default=str), backup_signature):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def _summarize(results):
+    """Count device results by status."""
+    summary = {'devices': len(results), 'compliant': 0, 'drift': 0, 'no_backup': 0, 'error': 0}
+    for result in results:
+        summary[result['status']] += 1
+
+    checked = summary['compliant'] + summary['drift']
+    summary['compliance_percent'] = round(summary['compliant'] * 100 / checked, 1) if checked else None
+    return summary
+
+def _write_csv(report, f):
+    """Write a report as CSV, one row per device."""
+    writer = csv.writer(f)
+    writer.writerow(['hostname', 'status', 'drifted_sections', 'delta_lines', 'sections', 'error'])
+    for result in report['devices']:
+        writer.writerow([
+            result['hostname'],
+            result['status'],
+            result['drifted_sections'],
+            result['delta_lines'],
+            '; '.join(section['section'] for section in result['sections']),
+            result['error'] or ''
+        ])
+
+def _write_html(report, f):
+    """Write a report as a standalone HTML page."""
+    escape = html.escape
+    summary = report['summary']
+    title = f"Compliance with {report['template']}"
+
+    f.write(f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{escape(title)}</title>\n")
+    f.write("<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:4px 8px;text-align:left;vertical-align:top}"
+            ".compliant{color:green}.drift,.error{color:#b00}.no_backup{color:#888}</style>\n")
+    f.write(f"</head>\n<body>\n<h1>{escape(title)}</h1>\n<p>Generated {escape(report['generated_at'])}: ")
+    f.write(f"{summary['compliant']} of {summary['devices']} devices compliant, {summary['drift']} drifting, "
+            f"{summary['no_backup']} without backup, {summary['error']} errors.</p>\n")
+
+    f.write("<table>\n<tr><th>Device</th><th>Status</th><th>Sections</th><th>Delta lines</th>"
+            "<th>Details</th></tr>\n")
+    for result in report['devices']:
+        if result['sections']:
+            details = ''.join(
+                f"<details><summary>{escape(section['section'])}</summary>"
+                f"<pre>{escape(chr(10).join(section['missing']))}</pre></details>"
+                for section in result['sections'])
+        else:
+            details = escape(result['error'] or '')
+        f.write(f"<tr><td>{escape(result['hostname'])}</td>"
+                f"<td class=\"{result['status']}\">{escape(result['status'])}</td>"
+                f"<td>{result['drifted_sections']}</td><td>{result['delta_lines']}</td>"
+                f"<td>{details}</td></tr>\n")
+    f.write("</table>\n</body>\n</html>\n")
@@ -0,0 +1,574 @@
+"""
+Compliance rules module for the Network Device Management tool.
+
+Compliance rules are declared in a YAML file (config/compliance_rules.yml by
+default) and checked against the latest backup of every device:
+
+    rules:
+      - name: no-public-snmp
+        description: SNMP community 'public' is not allowed
+        severity: high
+        forbid: 'snmp-server community public\\b'
+      - name: ntp-servers
+        match: 'ntp server (\\S+)'
+        values: [10.0.0.10, 10.0.0.11]
+      - name: vty-ssh-only
+        section: 'line vty'
+        require: 'transport input ssh$'
+        device_types: [cisco_ios, arista_eos]
+
+Each rule has exactly one of:
+- forbid: no line may match the pattern
+- require: some line must match the pattern
+- match with values: the values the pattern's first group captures must be
+  exactly the listed ones
+
+With `section`, a rule only looks at the lines under the top-level lines
+matching the section pattern, and `require` must then be met in every such
+section. Patterns are regular expressions matched at the start of a line's
+text, after its indentation. They may not use named groups or global inline
+flags; use scoped flags like '(?i:...)' instead.
+
+All patterns of a rule set are compiled into a single regular expression,
+so a configuration is scanned once however many rules there are.
+"""
+import os
+import re
+import csv
+import json
+import time
+import bisect
+import hashlib
+from .config_manager import latest_config_file
+from .settings import get_setting
+
+# Default rules file and cache of check results
+RULES_FILE = os.path.join('config', 'compliance_rules.yml')
+RULES_CACHE = os.path.join('data', 'rules_cache.json')
+
+SEVERITIES = ('low', 'medium', 'high', 'critical')
+
+# Fewest backups per worker process worth the cost of starting one
+PARALLEL_CHECK_MIN = 500
+
+# Start of the next top-level line, which ends a section
+_NEXT_TOP_LEVEL = re.compile(r'\n(?=\S)')
+
+# Rule set of a check worker process
+_worker_rule_set = None
+
+def load_rules(rules_file=None):
+    """
+    Load compliance rules from a YAML file.
+
+    Args:
+        rules_file (str, optional): Rules file (default: compliance.rules_file
+            setting)
+
+    Returns:
+        RuleSet: The compiled rules
+
+    Raises:
+        OSError: If the rules file cannot be read
+        ValueError: If the file or one of its rules is invalid
+    """
+    import yaml
+
+    rules_file = rules_file or get_setting('compliance', 'rules_file', RULES_FILE)
+    with open(rules_file, 'r') as f:
+        try:
+            data = yaml.safe_load(f) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid rules file {rules_file}: {str(e)}")
+
+    if not isinstance(data, dict) or not isinstance(data.get('rules'), list):
+        raise ValueError(f"Rules file {rules_file} has no 'rules' list")
+    return RuleSet(data['rules'])
+
+class RuleSet:
+    """Compliance rules, compiled once per device type."""
+
+    def __init__(self, rules):
+        """
+        Initialize and validate the rule set.
+
+        Args:
+            rules (list): Rule dictionaries, see the module docstring
+
+        Raises:
+            ValueError: If a rule is invalid
+        """
+        self.rules = [_validate_rule(rule, position) for position, rule in enumerate(rules, 1)]
+        names = [rule['name'] for rule in self.rules]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate rule names: {', '.join(duplicates)}")
+
+        # Identifies the rules for cached results
+        self.signature = hashlib.sha1(json.dumps(self.rules, sort_keys=True).encode('utf-8')).hexdigest()
+        self._matchers = {}
+
+    def evaluate(self, text, device_type=None):
+        """
+        Check a configuration against the rules for its device type.
+
+        Args:
+            text (str): Configuration text
+            device_type (str, optional): Device type from the inventory;
+                rules limited to other device types are skipped
+
+        Returns:
+            list: A violation dict per failed rule, see _Matcher.evaluate
+        """
+        matcher = self._matchers.get(device_type)
+        if matcher is None:
+            rules = [rule for rule in self.rules
+                     if not rule.get('device_types') or device_type in rule['device_types']]
+            matcher = self._matchers[device_type] = _Matcher(rules)
+        return matcher.evaluate(text)
+
+    def __getstate__(self):
+        # Compiled matchers are rebuilt on demand after unpickling
+        return {'rules': self.rules, 'signature': self.signature}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _matchers={})
+
+class _Matcher:
+    """A list of rules compiled into one regular expression."""
+
+    def __init__(self, rules):
+        """
+        Compile rules.
+
+        Args:
+            rules (list): Validated rule dictionaries
+        """
+        patterns = []
+
+        def pattern_index(pattern):
+            if pattern not in patterns:
+                patterns.append(pattern)
+            return patterns.index(pattern)
+
+        # Per rule: (rule, kind, pattern index, section pattern index or None)
+        self.plan = []
+        for rule in rules:
+            kind = next(kind for kind in ('forbid', 'require', 'match') if kind in rule)
+            section = pattern_index(rule['section']) if rule.get('section') else None
+            self.plan.append((rule, kind, pattern_index(rule[kind]), section))
+
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.combined = None
+        if patterns:
+            alternatives = '|'.join(f"(?P<p{index}>{pattern})" for index, pattern in enumerate(patterns))
+            # Possessive, so every alternative is tried right after the
+            # indentation and never after giving some of it back
+            self.combined = re.compile(f"^[ \\t]*+(?:{alternatives})", re.MULTILINE)
+
+    def evaluate(self, text):
+        """
+        Check a configuration against the compiled rules.
+
+        Returns:
+            list: Violation dicts with 'rule', 'severity', 'description',
+                'message' and 'lines' (the offending or matching lines as
+                dicts with 'line' number and 'text')
+        """
+        if self.combined is None:
+            return []
+
+        # Lines matched by each pattern, as (line start, text start, line end)
+        hits = [[] for _ in self.patterns]
+        position = 0
+        while True:
+            match = self.combined.search(text, position)
+            if match is None:
+                break
+            first = int(match.lastgroup[1:])
+            line_start = match.start()
+            text_start = match.start(match.lastgroup)
+            line_end = text.find('\n', text_start)
+            if line_end < 0:
+                line_end = len(text)
+            hits[first].append((line_start, text_start, line_end))
+
+            # All alternatives start at the same place, after the whole
+            # indentation, and the ones before the one that matched failed
+            # there, so only the later ones need trying
+            for index in range(first + 1, len(self.patterns)):
+                if self.patterns[index].match(text, text_start):
+                    hits[index].append((line_start, text_start, line_end))
+
+            # Go on with the next line, not after the match: a pattern
+            # spanning several lines must not hide the lines it covers
+            position = line_end + 1
+
+        sections = {}
+        violations = []
+        for rule, kind, index, section in self.plan:
+            if section is not None and section not in sections:
+                sections[section] = _section_spans(text, hits[section])
+            violation = _check_rule(rule, kind, self.patterns[index], hits[index],
+                                    sections.get(section), text)
+            if violation:
+                violations.append(violation)
+        return violations
+
+def _section_spans(text, header_hits):
+    """
+    Find the sections under the top-level lines matched by a section pattern.
+
+    Returns:
+        tuple: (sorted section starts, section ends, header lines)
+    """
+    starts, ends, headers = [], [], []
+    for line_start, text_start, line_end in header_hits:
+        if text_start != line_start:
+            continue  # Indented, not a section header
+        next_top_level = _NEXT_TOP_LEVEL.search(text, line_end)
+        starts.append(line_end)
+        ends.append(next_top_level.start() if next_top_level else len(text))
+        headers.append((line_start, text_start, line_end))
+    return starts, ends, headers
+
+def _in_sections(hits, spans):
+    """Group hits by the section they fall in, as {section number: [hits]}."""
+    starts, ends, _ = spans
+    grouped = {}
+    for hit in hits:
+        position = bisect.bisect_right(starts, hit[0]) - 1
+        if position >= 0 and hit[0] < ends[position]:
+            grouped.setdefault(position, []).append(hit)
+    return grouped
+
+def _check_rule(rule, kind, pattern, hits, spans, text):
+    """
+    Check one rule against the lines its pattern matched.
+
+    Returns:
+        dict: The violation, or None if the rule is met
+    """
+    if spans is not None:
+        grouped = _in_sections(hits, spans)
+        hits = [hit for position in sorted(grouped) for hit in grouped[position]]
+
+    if kind == 'forbid':
+        if not hits:
+            return None
+        return _violation(rule, f"{len(hits)} forbidden line(s)", hits, text)
+
+    if kind == 'require':
+        if spans is None:
+            return None if hits else _violation(rule, "Required line missing", [], text)
+        lacking = [header for position, header in enumerate(spans[2]) if position not in grouped]
+        if not lacking:
+            return None
+        return _violation(rule, f"Required line missing in {len(lacking)} section(s)", lacking, text)
+
+    values = set()
+    for _, text_start, line_end in hits:
+        match = pattern.match(text, text_start)
+        values.add(match.group(1) if pattern.groups else match.group(0))
+    expected = {str(value) for value in rule['values']}
+    if values == expected:
+        return None
+
+    problems = []
+    if expected - values:
+        problems.append(f"Missing {', '.join(sorted(expected - values))}")
+    if values - expected:
+        problems.append(f"Unexpected {', '.join(sorted(values - expected))}")
+    return _violation(rule, '; '.join(problems), hits, text)
+
+def _violation(rule, message, hits, text):
+    """Build a violation dict, numbering the lines it refers to."""
+    lines = []
+    line_number, counted_to = 1, 0
+    for line_start, text_start, line_end in hits:
+        line_number += text.count('\n', counted_to, line_start)
+        counted_to = line_start
+        lines.append({'line': line_number, 'text': text[text_start:line_end].rstrip()})
+
+    return {
+        'rule': rule['name'],
+        'severity': rule.get('severity', 'medium'),
+        'description': rule.get('description', ''),
+        'message': message,
+        'lines': lines
+    }
+
+def _validate_rule(rule, position):
+    """
+    Check that a rule is well-formed.
+
+    Returns:
+        dict: The rule
+
+    Raises:
+        ValueError: Describing what is wrong with the rule
+    """
+    if not isinstance(rule, dict) or not rule.get('name'):
+        raise ValueError(f"Rule {position} has no name")
+
+    name = rule['name']
+    kinds = [kind for kind in ('forbid', 'require', 'match') if kind in rule]
+    if len(kinds) != 1:
+        raise ValueError(f"Rule {name} needs exactly one of forbid, require or match")
+    if kinds == ['match'] and not isinstance(rule.get('values'), list):
+        raise ValueError(f"Rule {name} needs a list of values to match")
+    if rule.get('severity', 'medium') not in SEVERITIES:
+        raise ValueError(f"Rule {name} has unknown severity {rule['severity']}")
+
+    for key in (kinds[0], 'section'):
+        if key not in rule:
+            continue
+        pattern = rule[key]
+        try:
+            compiled = re.compile(pattern)
+        except (re.error, TypeError) as e:
+            raise ValueError(f"Rule {name} has an invalid {key} pattern: {str(e)}")
+        if compiled.groupindex:
+            raise ValueError(f"Rule {name} uses named groups in its {key} pattern")
+        rule[key] = pattern[1:] if pattern.startswith('^') else pattern
+
+    return rule
+
+class RuleChecker:
+    """Checks the latest backups of devices against a rule set."""
+
+    def __init__(self, rule_set, config_dir="configs", cache_file=None):
+        """
+        Initialize the checker.
+
+        Args:
+            rule_set (RuleSet): Rules to check
+            config_dir (str): Directory holding the device backups
+            cache_file (str, optional): File caching results between runs
+                (default: compliance.rules_cache setting)
+        """
+        self.rule_set = rule_set
+        self.config_dir = config_dir
+        self.cache_file = cache_file or get_setting('compliance', 'rules_cache', RULES_CACHE)
+
+    def check(self, devices, use_cache=True, workers=None):
+        """
+        Check devices against the rules.
+
+        A backup whose size and modification time are unchanged since the
+        last check is not read again; one that was rewritten with the same
+        content, as every backup run does, is read and hashed but not
+        evaluated again.
+
+        Args:
+            devices (list): Device dictionaries from the inventory
+            use_cache (bool): Reuse results of unchanged backups
+            workers (int, optional): Processes to check with (default:
+                compliance.workers, or one per CPU)
+
+        Returns:
+            dict: Report with 'generated_at', 'summary' (counts per status
+                and 'rules', the number of devices violating each rule) and
+                'devices' (a dict per device with 'hostname', 'status'
+                ('compliant', 'violations', 'no_backup' or 'error'),
+                'violations' and 'error')
+        """
+        start_time = time.perf_counter()
+        cache = self._load_cache() if use_cache else {}
+        if cache.get('rules') != self.rule_set.signature:
+            cache = {'rules': self.rule_set.signature, 'devices': {}}
+        entries = cache['devices']
+
+        results = {}
+        tasks = []
+        for device in devices:
+            hostname = device['hostname']
+            device_type = device.get('device_type')
+            backup_file = latest_config_file(self.config_dir, hostname)
+            try:
+                stat = os.stat(backup_file)
+            except FileNotFoundError:
+                entries.pop(hostname, None)
+                results[hostname] = {'hostname': hostname, 'status': 'no_backup', 'violations': [], 'error': None}
+                continue
+
+            signature = [stat.st_size, stat.st_mtime_ns]
+            entry = entries.get(hostname)
+            if entry and entry['device_type'] != device_type:
+                entry = None
+            if entry and entry['stat'] == signature:
+                results[hostname] = _device_result(hostname, entry)
+            else:
+                tasks.append((hostname, device_type, backup_file, signature, entry['hash'] if entry else None))
+
+        evaluated = 0
+        for outcome in _map_checks(self.rule_set, tasks, workers or get_setting('compliance', 'workers', 0)):
+            hostname = outcome['hostname']
+            if outcome.get('error'):
+                results[hostname] = {'hostname': hostname, 'status': 'error', 'violations': [],
+                                     'error': outcome['error']}
+                continue
+            if 'violations' in outcome:
+                evaluated += 1
+                entries[hostname] = outcome
+            else:
+                entries[hostname]['stat'] = outcome['stat']
+            results[hostname] = _device_result(hostname, entries[hostname])
+
+        self._save_cache(cache)
+
+        device_results = [results[device['hostname']] for device in devices]
+        summary = {'devices': len(devices), 'compliant': 0, 'violations': 0, 'no_backup': 0, 'error': 0}
+        rule_counts = {rule['name']: 0 for rule in self.rule_set.rules}
+        for result in device_results:
+            summary[result['status']] += 1
+            for violation in result['violations']:
+                rule_counts[violation['rule']] += 1
+        summary.update({
+            'rules': rule_counts,
+            'evaluated': evaluated,
+            'cached': len(devices) - summary['no_backup'] - summary['error'] - evaluated,
+            'seconds': round(time.perf_counter() - start_time, 3)
+        })
+
+        return {
+            'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'summary': summary,
+            'devices': device_results
+        }
+
+    def _load_cache(self):
+        """Load cached results, empty if there are none."""
+        try:
+            with open(self.cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        """Save cached results, replacing the file atomically."""
+        temp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            with open(temp_file, 'w') as f:
+                json.dump(cache, f)
+            os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            print(f"Error saving rules cache: {str(e)}")
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+def write_report(report, output_path, report_format=None):
+    """
+    Write a rules report to a file.
+
+    Args:
+        report (dict): Report from RuleChecker.check
+        output_path (str): File to write
+        report_format (str, optional): 'json' or 'csv', one row per
+            violation (default: taken from the file extension, JSON if
+            unknown)
+    """
+    if report_format is None:
+        report_format = 'csv' if output_path.lower().endswith('.csv') else 'json'
+
+    with open(output_path, 'w', newline='' if report_format == 'csv' else None) as f:
+        if report_format != 'csv':
+            json.dump(report, f, indent=2)
+            return
+
+        writer = csv.writer(f)
+        writer.writerow(['hostname', 'status', 'rule', 'severity', 'message', 'lines'])
+        for result in report['devices']:
+            if not result['violations']:
+                writer.writerow([result['hostname'], result['status'], '', '', result['error'] or '', ''])
+            for violation in result['violations']:
+                writer.writerow([
+                    result['hostname'],
+                    result['status'],
+                    violation['rule'],
+                    violation['severity'],
+                    violation['message'],
+                    '; '.join(f"{line['line']}: {line['text']}" for line in violation['lines'])
+                ])
+
+def _device_result(hostname, entry):
+    """Build a device's result from its cache entry."""
+    return {
+        'hostname': hostname,
+        'status': 'violations' if entry['violations'] else 'compliant',
+        'violations': entry['violations'],
+        'error': None
+    }
+
+def _map_checks(rule_set, tasks, workers=None):
+    """
+    Check backups, in worker processes for large batches.
+
+    Args:
+        rule_set (RuleSet): Rules to check
+        tasks (list): (hostname, device type, backup file, stat signature,
+            previous content hash) per backup
+        workers (int, optional): Most worker processes to use (default: one per CPU)
+
+    Returns:
+        list: Outcomes in the order of tasks, see _check_backup
+    """
+    workers = min(workers or os.cpu_count() or 1, -(-len(tasks) // PARALLEL_CHECK_MIN))
+
+    if workers <= 1:
+        return [_check_backup(rule_set, task) for task in tasks]
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Spawned workers are safe to start from the threads of `netman serve`
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_check_worker,
+        initargs=(rule_set,)
+    ) as pool:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        return list(pool.map(_check_in_worker, tasks, chunksize=chunksize))
+
+def _init_check_worker(rule_set):
+    """Keep the rule set of a check worker process."""
+    global _worker_rule_set
+    _worker_rule_set = rule_set
+
+def _check_in_worker(task):
+    """Check a backup with the rule set of this worker process."""
+    return _check_backup(_worker_rule_set, task)
+
+def _check_backup(rule_set, task):
+    """
+    Check one backup.
+
+    Returns:
+        dict: 'hostname' and 'stat', plus 'device_type', 'hash' and
+            'violations' if the backup was evaluated, or 'error'
+    """
+    hostname, device_type, backup_file, signature, previous_hash = task
+    try:
+        with open(backup_file, 'rb') as f:
+            content = f.read()
+    except OSError as e:
+        return {'hostname': hostname, 'stat': signature, 'error': str(e)}
+
+    content_hash = hashlib.sha1(content).hexdigest()
+    if content_hash == previous_hash:
+        return {'hostname': hostname, 'stat': signature}
+
+    try:
+        violations = rule_set.evaluate(content.decode('utf-8', errors='replace'), device_type)
+    except Exception as e:
+        return {'hostname': hostname, 'stat': signature, 'error': str(e)}
+
+    return {
+        'hostname': hostname,
+        'stat': signature,
+        'device_type': device_type,
+        'hash': content_hash,
+        'violations': violations
+    }
@@ -0,0 +1,158 @@
+"""
+Configuration diff module for the Network Device Management tool.
+
+This module compares configurations parsed by config_parser. It finds the
+lines of an intended configuration that a device does not have yet. For
+configurations structured by indentation, such as Cisco IOS and Arista EOS
+running configs, it includes the parent lines (e.g. 'interface
+GigabitEthernet0/1') needed to enter the right context for them.
+"""
+from .config_parser import ConfigNode, ConfigTree, SET_FORMATS, parse
+
+# Device types whose configuration is structured by indentation
+DELTA_DEVICE_TYPES = ('cisco_ios', 'arista_eos')
+
+def supports_delta(device_type):
+    """
+    Check whether delta pushes work for a device type.
+
+    Args:
+        device_type (str): Device type from the inventory
+
+    Returns:
+        bool: True for configurations structured by indentation
+    """
+    return device_type in DELTA_DEVICE_TYPES
+
+def config_delta(intended, running):
+    """
+    Find the configuration lines a device still needs.
+
+    Lines of the intended configuration missing from the running one are
+    returned with their children and preceded by their parent lines. Lines
+    only the running configuration has are left alone: an intended config
+    is usually partial, so they cannot be told apart from lines it does not
+    manage.
+
+    Args:
+        intended (str): Configuration the device should have
+        running (str or ConfigTree): Configuration the device has, e.g. its
+            last backup, as text or parsed (see config_parser.parse_file)
+
+    Returns:
+        str: Lines to apply, indented by context; empty if nothing is missing
+    """
+    lines = []
+    _collect_delta(_as_tree(intended, 'indented').root, _as_tree(running, 'indented').root, [],
+                   {'path': []}, lines)
+    return '\n'.join(lines) + '\n' if lines else ''
+
+def section_drift(intended, running):
+    """
+    Find the sections of an intended configuration a device deviates from.
+
+    A section is a top-level line with everything below it, or for set
+    formats (Junos, PAN-OS) a top-level word such as 'interfaces'. Both
+    configurations are compared as parsed trees, so a set-format intended
+    configuration can be checked against a curly-brace Junos backup.
+    Sections found unchanged in the running configuration are matched by
+    their digest alone, which settles most sections of a compliant device.
+
+    Args:
+        intended (str): Configuration the device should have
+        running (str or ConfigTree): Configuration the device has, e.g. its
+            last backup, as text or parsed (see config_parser.parse_file)
+
+    Returns:
+        list: A dict per deviating section with its first line ('section')
+            and the lines it lacks ('missing'): with their parent lines for
+            indented configurations, as set commands for set formats
+    """
+    running = _as_tree(running)
+    intended = _as_tree(intended, 'indented' if running.format == 'indented' else None)
+
+    drift = []
+    for node, running_node in _pairs(intended.root, running.root):
+        # Sections the device has unchanged are settled by their digest
+        # alone, without comparing them line by line
+        if running_node is not None and node.digest() == running_node.digest():
+            continue
+        if intended.format in SET_FORMATS:
+            missing = [f"set {node.text} {' '.join(path)}".rstrip() for path in _missing_paths(node, running_node)]
+        else:
+            # Compare the section alone with its counterpart
+            section, running_section = ConfigNode(''), ConfigNode('')
+            section.append(node)
+            if running_node is not None:
+                running_section.append(running_node)
+            missing = []
+            _collect_delta(section, running_section, [], {'path': []}, missing)
+        if missing:
+            drift.append({'section': node.text, 'missing': missing})
+    return drift
+
+def _as_tree(config, config_format=None):
+    """Parse a configuration given as text; parsed ones are returned as they are."""
+    if isinstance(config, ConfigTree):
+        return config
+    return parse(config, config_format=config_format)
+
+def _collect_delta(intended, running, path, state, lines):
+    """
+    Append the lines of one configuration block missing from the running one.
+
+    Args:
+        intended (ConfigNode): Intended block
+        running (ConfigNode): The same block of the running configuration
+        path (list): Parent lines of the block
+        state (dict): 'path' holds the context the output currently is in
+        lines (list): Output lines
+    """
+    for node, running_node in _pairs(intended, running):
+        line = node.text
+        if running_node is not None:
+            _collect_delta(node, running_node, path + [line], state, lines)
+            continue
+
+        # Enter the block's context, skipping parents already entered
+        common = 0
+        while common < min(len(path), len(state['path'])) and path[common] == state['path'][common]:
+            common += 1
+        for depth in range(common, len(path)):
+            lines.append(' ' * depth + path[depth])
+
+        lines.append(' ' * len(path) + line)
+        lines.extend(node.lines(len(path) + 1))
+        state['path'] = path + [line] if node.children else path
+
+def _missing_paths(intended, running):
+    """
+    List the leaves of an intended node missing from the running one.
+
+    Returns:
+        list: The texts leading to each missing leaf, below intended
+    """
+    if running is None:
+        return intended.paths() if intended.children else [[]]
+
+    missing = []
+    for node, running_node in _pairs(intended, running):
+        missing.extend([node.text] + path for path in _missing_paths(node, running_node))
+    return missing
+
+def _pairs(intended, running):
+    """
+    Pair the children of an intended node with those of the running one.
+
+    A line repeated in a block is paired by occurrence: the second
+    'remark ----' of an intended access list with the second one the
+    device has.
+
+    Yields:
+        tuple: (intended child, running child or None)
+    """
+    seen = {}
+    for node in intended.children:
+        occurrence = seen[node.text] = seen.get(node.text, -1) + 1
+        matches = running.named(node.text)
+        yield node, matches[occurrence] if occurrence < len(matches) else None
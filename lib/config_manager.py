@@ -6,9 +6,14 @@ and comparing configurations.
 """
 import os
 import time
+import shutil
 from pathlib import Path
 from .ansible_runner import AnsibleRunner
 from .inventory import InventoryManager
+from .job_files import JobFiles
+from .config_diff import config_delta, supports_delta
+from .config_parser import parse_file
+from .metrics import record_backup
 
 class ConfigManager:
     """Manages network device configurations."""
@@ -18,44 +23,114 @@ class ConfigManager:
         self.config_dir = config_dir
         self.ansible_runner = AnsibleRunner()
         self.inventory_manager = InventoryManager()
-        
-        # Ensure config directory exists
-        os.makedirs(self.config_dir, exist_ok=True)
     
-    def push_config(self, hostname, config_content):
+    def push_config(self, hostname, config_content, delta=False, gather_facts=True):
         """
         Push configuration to a device.
         
         Args:
             hostname (str): Hostname of the device
-            config_content (str): Configuration content to apply
+            config_content (str or iterable): Configuration content to apply,
+                either as a string or as an iterable of text chunks such as
+                the stream returned by TemplateManager.render_template_stream
+            delta (bool): config_content only holds the lines the device
+                lacks (see config_delta), so it is applied without first
+                comparing it to the device's running configuration
+            gather_facts (bool): Gather device facts before and after the push
             
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            # Create a temporary config file
-            temp_config_file = f"temp_{hostname}_config.txt"
-            with open(temp_config_file, 'w') as f:
-                f.write(config_content)
+            # The configuration goes to a private directory of this push, so
+            # concurrent pushes never share a file; it is removed afterwards
+            with JobFiles() as job_files:
+                # Written chunk by chunk so large renders never have to be
+                # held in memory as a single string
+                config_file = job_files.write(config_file_name(hostname), config_content)
+                
+                return self.push_config_file(hostname, config_file, delta, gather_facts)
+        except Exception as e:
+            print(f"Error pushing configuration: {str(e)}")
+            return False
+    
+    def push_config_file(self, hostname, config_file, delta=False, gather_facts=True):
+        """
+        Push a configuration file that already exists on disk to a device.
+        
+        Args:
+            hostname (str): Hostname of the device
+            config_file (str): Path to the configuration file to apply
+            delta (bool): The file only holds the lines the device lacks
+            gather_facts (bool): Gather device facts before and after the push
             
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
             # Run Ansible playbook to apply the configuration
             extra_vars = {
                 'target_host': hostname,
-                'config_file': temp_config_file
+                'config_file': config_file,
+                'netman_delta_hosts': [hostname] if delta else [],
+                'netman_gather_facts': gather_facts
             }
             
             result = self.ansible_runner.run_playbook('playbooks/configure_device.yml', extra_vars)
             
-            # Clean up temporary file
-            if os.path.exists(temp_config_file):
-                os.remove(temp_config_file)
-            
             return result.get('success', False)
         except Exception as e:
             print(f"Error pushing configuration: {str(e)}")
             return False
     
+    def push_configs(self, config_dir, hostnames, forks=None, strategy=None, on_event=None,
+                     delta_hosts=None, gather_facts=True):
+        """
+        Push configurations to many devices with one Ansible run.
+        
+        Args:
+            config_dir (str): Directory holding each device's configuration,
+                named by config_file_name
+            hostnames (list): Hostnames of the devices
+            forks (int, optional): Number of devices configured in parallel
+            strategy (str, optional): Ansible play strategy, e.g. 'free'
+            on_event (callable, optional): Called with each Ansible event as
+                the run progresses (see ansible_events)
+            delta_hosts (list, optional): Devices whose file only holds the
+                lines they lack (see config_delta)
+            gather_facts (bool): Gather device facts before and after the push
+            
+        Returns:
+            dict: True per hostname where the configuration was applied,
+                False where it failed
+        """
+        results = {hostname: False for hostname in hostnames}
+        if not hostnames:
+            return results
+        
+        try:
+            result = self.ansible_runner.run_playbook(
+                'playbooks/configure_device.yml',
+                {
+                    'config_dir': config_dir,
+                    'netman_delta_hosts': [hostname for hostname in delta_hosts or () if hostname in results],
+                    'netman_gather_facts': gather_facts
+                },
+                limit=hostnames,
+                forks=forks,
+                strategy=strategy,
+                on_event=on_event
+            )
+            
+            host_results = result.get('hosts', {})
+            for hostname in hostnames:
+                results[hostname] = host_results.get(hostname, {}).get('success', False)
+            
+            return results
+        except Exception as e:
+            print(f"Error pushing configurations: {str(e)}")
+            return results
+    
     def backup_config(self, hostname):
         """
         Backup configuration from a device.
@@ -84,16 +159,7 @@ class ConfigManager:
             result = self.ansible_runner.run_playbook('playbooks/backup_config.yml', extra_vars)
             
             if result.get('success', False):
-                # Also create a 'latest' symlink/copy for easy access
-                latest_file = os.path.join(device_dir, f"{hostname}_latest.cfg")
-                if os.path.exists(latest_file):
-                    os.remove(latest_file)
-                
-                # Copy the backup to the latest file
-                with open(backup_file, 'r') as src:
-                    with open(latest_file, 'w') as dst:
-                        dst.write(src.read())
-                
+                self._update_latest(hostname, backup_file)
                 return backup_file
             else:
                 return None
@@ -101,6 +167,57 @@ class ConfigManager:
             print(f"Error backing up configuration: {str(e)}")
             return None
     
+    def backup_configs(self, hostnames, forks=None, strategy=None, on_event=None):
+        """
+        Backup configuration from many devices with one Ansible run.
+        
+        Args:
+            hostnames (list): Hostnames of the devices
+            forks (int, optional): Number of devices backed up in parallel
+            strategy (str, optional): Ansible play strategy, e.g. 'free'
+            on_event (callable, optional): Called with each Ansible event as
+                the run progresses (see ansible_events)
+            
+        Returns:
+            dict: Path to the backup file per hostname, None where it failed
+        """
+        backups = {hostname: None for hostname in hostnames}
+        if not hostnames:
+            return backups
+        
+        try:
+            timestamp = time.strftime('%Y%m%d_%H%M%S')
+            extra_vars = {
+                'backup_dir': self.config_dir,
+                'backup_timestamp': timestamp
+            }
+            
+            result = self.ansible_runner.run_playbook(
+                'playbooks/backup_config.yml',
+                extra_vars,
+                limit=hostnames,
+                forks=forks,
+                strategy=strategy,
+                on_event=on_event
+            )
+            
+            host_results = result.get('hosts', {})
+            for hostname in hostnames:
+                backup_file = os.path.join(self.config_dir, hostname, f"{hostname}_{timestamp}.cfg")
+                if host_results.get(hostname, {}).get('success', False) and os.path.exists(backup_file):
+                    self._update_latest(hostname, backup_file)
+                    backups[hostname] = backup_file
+            
+            return backups
+        except Exception as e:
+            print(f"Error backing up configurations: {str(e)}")
+            return backups
+    
+    def _update_latest(self, hostname, backup_file):
+        """Copy a backup to the device's 'latest' file for easy access."""
+        shutil.copyfile(backup_file, latest_config_file(self.config_dir, hostname))
+        record_backup(hostname)
+    
     def get_config(self, hostname, revision=None):
         """
         Get device configuration content.
@@ -115,7 +232,7 @@ class ConfigManager:
         try:
             # If revision is None, read the latest file
             if revision is None:
-                config_file = os.path.join(self.config_dir, hostname, f"{hostname}_latest.cfg")
+                config_file = latest_config_file(self.config_dir, hostname)
                 if os.path.exists(config_file):
                     with open(config_file, 'r') as f:
                         return f.read()
@@ -132,6 +249,59 @@ class ConfigManager:
             print(f"Error getting configuration: {str(e)}")
             return None
     
+    def get_config_tree(self, hostname):
+        """
+        Get the parsed latest backup of a device.
+        
+        Args:
+            hostname (str): Hostname of the device
+            
+        Returns:
+            ConfigTree: The parsed configuration (see config_parser), shared
+                with other callers; None if there is no backup or it failed
+                to parse
+        """
+        try:
+            config_file = latest_config_file(self.config_dir, hostname)
+            if not os.path.exists(config_file):
+                return None
+            
+            device_info = self.inventory_manager.get_device(hostname) or {}
+            return parse_file(config_file, device_info.get('device_type'))
+        except Exception as e:
+            print(f"Error parsing configuration: {str(e)}")
+            return None
+    
+    def config_delta(self, hostname, config_content):
+        """
+        Find the lines of a configuration a device does not have yet.
+        
+        The device's latest backup stands in for its running configuration,
+        so changes made since that backup are not taken into account.
+        
+        Args:
+            hostname (str): Hostname of the device
+            config_content (str): Intended configuration
+            
+        Returns:
+            str: Lines to push (see config_diff.config_delta), empty if the
+                device has them all; None if there is no backup to compare
+                with or the device type does not support delta pushes
+        """
+        try:
+            device_info = self.inventory_manager.get_device(hostname) or {}
+            if not supports_delta(device_info.get('device_type')):
+                return None
+            
+            running_config = self.get_config_tree(hostname)
+            if running_config is None:
+                return None
+            
+            return config_delta(config_content, running_config)
+        except Exception as e:
+            print(f"Error computing configuration delta: {str(e)}")
+            return None
+    
     def compare_configs(self, hostname, source_revision=None, target_revision=None):
         """
         Compare two revisions of a device configuration.
@@ -164,3 +334,28 @@ class ConfigManager:
         except Exception as e:
             print(f"Error comparing configurations: {str(e)}")
             return None
+
+def latest_config_file(config_dir, hostname):
+    """
+    Get the path of a device's latest configuration backup.
+    
+    Args:
+        config_dir (str): Configuration directory
+        hostname (str): Hostname of the device
+        
+    Returns:
+        str: Path of the file, which may not exist yet
+    """
+    return os.path.join(config_dir, hostname, f"{hostname}_latest.cfg")
+
+def config_file_name(hostname):
+    """
+    Get the file name a device's configuration is pushed from.
+    
+    Args:
+        hostname (str): Hostname of the device
+        
+    Returns:
+        str: File name, matching host_config_file in configure_device.yml
+    """
+    return f"{hostname}_config.txt"
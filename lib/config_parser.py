@@ -0,0 +1,715 @@
+"""
+Configuration parser module for the Network Device Management tool.
+
+This module parses device configurations into trees of ConfigNode, so that
+everything looking inside configurations shares one parse. The tree shape
+depends on the configuration format:
+
+- 'indented' (Cisco IOS, Arista EOS): a node per line, with the lines
+  indented below it as children, e.g. 'interface Gi0/1' > 'description LAN'
+- 'junos' (curly-brace Junos), 'set' (Junos and PAN-OS set commands) and
+  'xml' (PAN-OS exports): a node per word of the equivalent set command,
+  e.g. 'interfaces' > 'ge-0/0/0' > 'unit' > '0', so all three give the
+  same tree for the same configuration
+- 'json' (Cisco ACI exports): a node per managed object class, then one per
+  object name, with its attributes as 'attribute' > 'value' children
+
+Children keep their configuration order, repeated lines included (ACL
+remarks, for example). Set formats merge repeated words into one node.
+Node texts are interned, so the lines repeated across a configuration and
+across devices ('no shutdown', 'unit', '0') are stored once. Parsed trees
+are cached on disk under data/parse_cache, keyed by a hash of the
+configuration, and recently used ones in memory. Cached trees are shared:
+callers must not modify them.
+"""
+import os
+import re
+import sys
+import json
+import marshal
+import hashlib
+import tempfile
+from collections import OrderedDict
+from .settings import get_setting
+
+# Default directory of the parsed tree cache
+PARSE_CACHE_DIR = os.path.join('data', 'parse_cache')
+
+# Part of every cache key; bump it whenever parsing changes
+PARSER_VERSION = 3
+
+# Cached trees kept on disk and in memory
+CACHE_MAX_FILES = 10000
+MEMORY_CACHE_SIZE = 64
+
+# Formats of device types whose configurations always look the same; for
+# other device types the format is detected from the configuration
+DEVICE_FORMATS = {
+    'cisco_ios': 'indented',
+    'ios': 'indented',
+    'arista_eos': 'indented',
+    'eos': 'indented',
+    'cisco_aci': 'json',
+    'aci': 'json'
+}
+
+# Formats whose trees hold a node per word of a set command
+SET_FORMATS = ('junos', 'set', 'xml')
+
+# Lines that carry no configuration
+IGNORED_PREFIXES = ('!', 'Building configuration', 'Current configuration')
+
+# Lines of configuration files that leave a section or configuration mode,
+# or run exec-mode commands such as saving; running configs never show them
+_NOT_CONFIG = re.compile(r'(exit|end|(do|write|wr|copy|reload)( .*)?)$')
+
+# Words of a set command, keeping quoted strings whole
+_WORD = re.compile(r'"(?:[^"\\]|\\.)*"|\S+')
+
+# Words and punctuation of curly-brace Junos statements
+_JUNOS_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{};\[\]]|[^\s{};\[\]"]+')
+
+_memory_cache = OrderedDict()
+_stores = 0
+
+class ConfigNode:
+    """A line or word of a configuration, with its children in config order."""
+
+    __slots__ = ('text', 'line', 'children', '_index', '_digest')
+
+    def __init__(self, text, line=0):
+        """
+        Initialize the node.
+
+        Args:
+            text (str): Text of the line or word
+            line (int): Line number in the configuration, 0 if unknown
+        """
+        self.text = text
+        self.line = line
+        self.children = []
+        # Children by text, in config order, for lookups
+        self._index = {}
+        self._digest = None
+
+    def __repr__(self):
+        return f"ConfigNode({self.text!r}, {len(self.children)} children)"
+
+    def child(self, text, line=0):
+        """
+        Get the first child with a text, adding one if there is none.
+
+        Args:
+            text (str): Text of the child
+            line (int): Line number for a new child
+
+        Returns:
+            ConfigNode: The child
+        """
+        nodes = self._index.get(text)
+        if nodes:
+            return nodes[0]
+        return self.add(text, line)
+
+    def add(self, text, line=0):
+        """
+        Add a child, even if there already is one with this text.
+
+        Args:
+            text (str): Text of the child
+            line (int): Line number in the configuration
+
+        Returns:
+            ConfigNode: The new child
+        """
+        return self.append(ConfigNode(sys.intern(text), line))
+
+    def append(self, node):
+        """
+        Add an existing node as the last child.
+
+        Args:
+            node (ConfigNode): The node
+
+        Returns:
+            ConfigNode: The node
+        """
+        self.children.append(node)
+        self._index.setdefault(node.text, []).append(node)
+        self._digest = None
+        return node
+
+    def remove(self, node):
+        """
+        Remove a child.
+
+        Args:
+            node (ConfigNode): The child
+        """
+        self.children.remove(node)
+        nodes = self._index[node.text]
+        nodes.remove(node)
+        if not nodes:
+            del self._index[node.text]
+        self._digest = None
+
+    def named(self, text):
+        """
+        Get the children with a text.
+
+        Args:
+            text (str): Text of the children
+
+        Returns:
+            list: The children in config order, empty if there are none
+        """
+        return self._index.get(text, [])
+
+    def get(self, *path):
+        """
+        Get a descendant by the texts along its path.
+
+        Where a text is repeated, the first node with it is taken.
+
+        Args:
+            *path (str): Text of each node below this one
+
+        Returns:
+            ConfigNode: The descendant, or None if there is none
+        """
+        node = self
+        for text in path:
+            nodes = node._index.get(text)
+            if not nodes:
+                return None
+            node = nodes[0]
+        return node
+
+    def find(self, *patterns):
+        """
+        Find descendants whose path matches a regular expression per level.
+
+        Args:
+            *patterns (str): Pattern each node along the path must match
+                completely, e.g. find('interface .*') or
+                find('interfaces', 'ge-.*')
+
+        Returns:
+            list: Matching nodes in config order
+        """
+        nodes = [self]
+        for pattern in patterns:
+            regex = re.compile(pattern)
+            nodes = [child for node in nodes for child in node.children if regex.fullmatch(child.text)]
+        return nodes
+
+    def search(self, text):
+        """
+        Find all descendants with a text, at any depth.
+
+        Args:
+            text (str): Text of the nodes
+
+        Returns:
+            list: Matching nodes in config order
+        """
+        found = []
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            if node.text == text:
+                found.append(node)
+            stack.extend(reversed(node.children))
+        return found
+
+    def lines(self, depth=0, indent=' '):
+        """
+        Render the descendants as indented lines.
+
+        Args:
+            depth (int): Indentation of the children
+            indent (str): Indentation per level
+
+        Returns:
+            list: A line per descendant
+        """
+        lines = []
+        for node in self.children:
+            lines.append(indent * depth + node.text)
+            lines.extend(node.lines(depth + 1, indent))
+        return lines
+
+    def digest(self):
+        """
+        Hash the node's text and descendants, ignoring line numbers.
+
+        Two nodes with the same digest hold the same lines. The digest is
+        computed once per node, so it is reused for as long as a cached
+        tree is.
+
+        Returns:
+            bytes: SHA-1 digest
+        """
+        if self._digest is None:
+            digest = hashlib.sha1(self.text.encode('utf-8') + b'\0')
+            for node in self.children:
+                digest.update(node.digest())
+            self._digest = digest.digest()
+        return self._digest
+
+    def paths(self):
+        """
+        List the leaves below this node with the texts leading to them.
+
+        For set formats, each path joined by spaces is a set command
+        relative to this node.
+
+        Returns:
+            list: A list of texts per leaf
+        """
+        paths = []
+        for node in self.children:
+            if node.children:
+                paths.extend([node.text] + path for path in node.paths())
+            else:
+                paths.append([node.text])
+        return paths
+
+class ConfigTree:
+    """A parsed configuration."""
+
+    __slots__ = ('format', 'root')
+
+    def __init__(self, config_format, root):
+        """
+        Initialize the tree.
+
+        Args:
+            config_format (str): Format the configuration was parsed as
+            root (ConfigNode): Node holding the top-level lines or words
+        """
+        self.format = config_format
+        self.root = root
+
+    def __repr__(self):
+        return f"ConfigTree({self.format!r}, {len(self.root.children)} top-level nodes)"
+
+    def get(self, *path):
+        """Get a node by the texts along its path, see ConfigNode.get."""
+        return self.root.get(*path)
+
+    def sections(self, *patterns):
+        """Find nodes by a pattern per level, see ConfigNode.find."""
+        return self.root.find(*patterns)
+
+    def interfaces(self):
+        """
+        Get the interfaces of the configuration.
+
+        Returns:
+            dict: Interface name mapped to the node holding its settings,
+                empty for ACI, which has no per-device interfaces
+        """
+        if self.format == 'indented':
+            return {node.text.split(' ', 1)[1]: node for node in self.root.find(r'interface \S+')}
+
+        interfaces = {}
+        junos = self.root.get('interfaces')
+        if junos:
+            interfaces.update((node.text, node) for node in junos.children if node.text != 'interface-range')
+
+        # PAN-OS: network > interface > <type> > <name>
+        for node in self.root.find('network', 'interface', '.*', '.*'):
+            interfaces[node.text] = node
+        return interfaces
+
+    def acls(self):
+        """
+        Get the access lists of the configuration.
+
+        Covers IOS and EOS access lists (named and numbered), Junos firewall
+        filters, PAN-OS security rules and ACI contract filters.
+
+        Returns:
+            dict: Access list name mapped to its entries as lines, in config
+                order and with repeated entries such as remarks kept; for set
+                formats each entry is a set command relative to the list
+        """
+        acls = {}
+        if self.format == 'indented':
+            for node in self.root.find(r'(ipv6|mac|ip) access-list .*'):
+                name = node.text.split()[-1]
+                acls[name] = [child.text for child in node.children]
+            for node in self.root.find(r'access-list \S+ .*'):
+                _, name, entry = node.text.split(' ', 2)
+                acls.setdefault(name, []).append(entry)
+            return acls
+
+        if self.format == 'json':
+            for filter_class in self.root.search('vzFilter'):
+                for node in filter_class.children:
+                    acls[node.text] = [' '.join(path) for path in node.paths()]
+            return acls
+
+        # Junos filters sit under 'firewall' or 'firewall family <family>'
+        for node in self.root.find('firewall', 'filter', '.*') + self.root.find('firewall', 'family', '.*',
+                                                                                'filter', '.*'):
+            acls[node.text] = [' '.join(path) for path in node.paths()]
+
+        # PAN-OS rules sit under 'rulebase', per vsys in XML exports
+        for base in [self.root] + self.root.find('vsys', '.*'):
+            for node in base.find('rulebase', 'security', 'rules', '.*'):
+                acls[node.text] = [' '.join(path) for path in node.paths()]
+        return acls
+
+def detect_format(text, device_type=None):
+    """
+    Determine the format of a configuration.
+
+    Args:
+        text (str): Configuration text
+        device_type (str, optional): Device type from the inventory
+
+    Returns:
+        str: 'indented', 'junos', 'set', 'xml' or 'json'
+    """
+    if device_type in DEVICE_FORMATS:
+        return DEVICE_FORMATS[device_type]
+
+    stripped = text.lstrip()
+    if stripped.startswith('<'):
+        return 'xml'
+    if stripped.startswith(('{', '[')):
+        return 'json'
+
+    # The first configuration line tells set commands and Junos statements apart
+    for line in stripped.splitlines():
+        line = line.strip()
+        if not line or line.startswith(('#', '/*')) or line.startswith(IGNORED_PREFIXES):
+            continue
+        if line.startswith('set '):
+            return 'set'
+        if line.endswith(('{', ';')):
+            return 'junos'
+        break
+    return 'indented'
+
+def parse(text, device_type=None, config_format=None):
+    """
+    Parse a configuration, without caching.
+
+    Args:
+        text (str): Configuration text
+        device_type (str, optional): Device type from the inventory
+        config_format (str, optional): Format to parse as (default: detected)
+
+    Returns:
+        ConfigTree: The parsed configuration
+
+    Raises:
+        ValueError: If an XML or JSON configuration is malformed
+    """
+    config_format = config_format or detect_format(text, device_type)
+    root = ConfigNode('')
+    _PARSERS[config_format](text, root)
+    return ConfigTree(config_format, root)
+
+def parse_file(config_file, device_type=None):
+    """
+    Parse a configuration file, using the cache.
+
+    Args:
+        config_file (str): Path of the configuration, e.g. a backup
+        device_type (str, optional): Device type from the inventory
+
+    Returns:
+        ConfigTree: The parsed configuration, shared with other callers
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If an XML or JSON configuration is malformed
+    """
+    with open(config_file, 'rb') as f:
+        content = f.read()
+
+    text = content.decode('utf-8', errors='replace')
+    config_format = detect_format(text, device_type)
+    key = hashlib.sha1(f"{PARSER_VERSION}:{config_format}:".encode('utf-8') + content).hexdigest()
+
+    tree = _memory_cache.get(key)
+    if tree is None:
+        cache_file = os.path.join(_cache_dir(), f"{key}.bin")
+        tree = _load_cached(cache_file)
+        if tree is None:
+            tree = parse(text, config_format=config_format)
+            _store_cached(cache_file, tree)
+        _memory_cache[key] = tree
+        if len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+    else:
+        _memory_cache.move_to_end(key)
+    return tree
+
+def _cache_dir():
+    """Get the directory of cached trees from the parser.cache_dir setting."""
+    return get_setting('parser', 'cache_dir', PARSE_CACHE_DIR)
+
+def _load_cached(cache_file):
+    """Load a tree from the disk cache, None if it is not cached."""
+    try:
+        with open(cache_file, 'rb') as f:
+            config_format, root = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+    # Mark the entry as recently used, so pruning keeps it
+    try:
+        os.utime(cache_file)
+    except OSError:
+        pass
+    return ConfigTree(config_format, _from_tuple(root))
+
+def _store_cached(cache_file, tree):
+    """Write a tree to the disk cache, pruning the cache now and then."""
+    global _stores
+
+    cache_dir = os.path.dirname(cache_file)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix='.tmp_')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                marshal.dump((tree.format, _to_tuple(tree.root)), f)
+            os.replace(temp_path, cache_file)
+        except Exception:
+            os.remove(temp_path)
+            raise
+    except Exception as e:
+        print(f"Error caching parsed configuration: {str(e)}")
+        return
+
+    _stores += 1
+    if _stores % 100 == 0:
+        _prune_cache(cache_dir, get_setting('parser', 'cache_max_files', CACHE_MAX_FILES))
+
+def _prune_cache(cache_dir, max_files):
+    """Remove the least recently used cached trees beyond max_files."""
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith('.bin')]
+        if len(entries) <= max_files:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - max_files]:
+            os.remove(entry.path)
+    except OSError as e:
+        print(f"Error pruning parse cache: {str(e)}")
+
+def _to_tuple(node):
+    """Convert a node and its descendants into nested tuples for marshal."""
+    return (node.text, node.line, tuple(_to_tuple(child) for child in node.children))
+
+def _from_tuple(data):
+    """Rebuild a node and its descendants from nested tuples."""
+    text, line, children = data
+    node = ConfigNode(text, line)
+    for child in children:
+        node.append(_from_tuple(child))
+    return node
+
+def _parse_indented(text, root):
+    """
+    Parse a configuration structured by indentation.
+
+    Comments, blank lines, 'exit', 'end' and exec-mode commands such as
+    'write memory' are dropped and whitespace within lines is normalized.
+    Repeated lines stay separate nodes. A banner with its text is kept as a
+    single line.
+    """
+    stack = [(-1, root)]
+    lines = enumerate(text.splitlines(), 1)
+
+    for number, line in lines:
+        stripped = ' '.join(line.split())
+        if not stripped or stripped.startswith(IGNORED_PREFIXES) or _NOT_CONFIG.match(stripped):
+            continue
+
+        if stripped.startswith('banner '):
+            stripped = _read_banner(stripped, lines)
+
+        indent = len(line) - len(line.lstrip())
+        while stack[-1][0] >= indent:
+            stack.pop()
+        stack.append((indent, stack[-1][1].add(stripped, number)))
+
+def _read_banner(first_line, lines):
+    """
+    Read a banner up to its closing delimiter.
+
+    Args:
+        first_line (str): The 'banner <type> <delimiter>...' line
+        lines (iterator): Remaining (number, line) pairs of the configuration
+
+    Returns:
+        str: The whole banner as one line, its lines joined by newlines
+    """
+    parts = first_line.split(' ', 2)
+    if len(parts) < 3:
+        return first_line
+
+    # The delimiter is '^C' in running configs, a single character otherwise
+    text = parts[2]
+    delimiter = '^C' if text.startswith('^C') else text[0]
+    banner = [first_line]
+    if delimiter in text[len(delimiter):]:
+        return first_line
+
+    for _, line in lines:
+        banner.append(line.rstrip())
+        if delimiter in line:
+            break
+    return '\n'.join(banner)
+
+def _parse_set(text, root):
+    """Parse set commands into a node per word; other lines are ignored."""
+    for number, line in enumerate(text.splitlines(), 1):
+        words = _WORD.findall(line)
+        if len(words) < 2 or words[0] != 'set':
+            continue
+        node = root
+        for word in words[1:]:
+            node = node.child(word, number)
+
+def _parse_junos(text, root):
+    """Parse curly-brace Junos statements into a node per word."""
+    stack = [root]
+    words = []
+    values = None
+    in_comment = False
+
+    for number, line in enumerate(text.splitlines(), 1):
+        if in_comment or line.lstrip().startswith('/*'):
+            in_comment = '*/' not in line
+            continue
+        if line.lstrip().startswith('#'):
+            continue
+
+        for token in _JUNOS_TOKEN.findall(line.split(' ## ', 1)[0]):
+            if token == '{':
+                node = stack[-1]
+                for word in words:
+                    node = node.child(word, number)
+                stack.append(node)
+                words = []
+            elif token == '}':
+                if len(stack) > 1:
+                    stack.pop()
+                words = []
+            elif token == '[':
+                values = []
+            elif token == ']':
+                # 'members [ a b ];' stands for 'members a; members b;'
+                for value in values:
+                    node = stack[-1]
+                    for word in words + [value]:
+                        node = node.child(word, number)
+                words, values = [], None
+            elif token == ';':
+                node = stack[-1]
+                for word in words:
+                    node = node.child(word, number)
+                words = []
+            elif values is not None:
+                values.append(token)
+            elif token != 'inactive:':
+                words.append(token)
+
+def _parse_xml(text, root):
+    """Parse a PAN-OS XML export into the tree its set commands would give."""
+    import xml.etree.ElementTree as ElementTree
+
+    try:
+        document = ElementTree.fromstring(text)
+    except ElementTree.ParseError as e:
+        raise ValueError(f"Invalid XML configuration: {str(e)}")
+
+    _add_element(document, root)
+
+    # Device settings sit under devices > localhost.localdomain, where set
+    # commands leave them at the top level
+    devices = root.get('devices')
+    if devices is not None:
+        root.remove(devices)
+        for device in devices.children:
+            for node in device.children:
+                _merge(root, node)
+
+def _merge(parent, node):
+    """Add a node below a parent, merging it into a child with the same text."""
+    existing = parent.get(node.text)
+    if existing is None:
+        parent.append(node)
+        return
+    for child in node.children:
+        _merge(existing, child)
+
+def _add_element(element, node):
+    """Add the children of an XML element below a node."""
+    for child in element:
+        name = child.get('name')
+        if child.tag == 'entry':
+            target = node.child(name or '')
+        elif child.tag == 'member':
+            target = node.child((child.text or '').strip())
+        else:
+            target = node.child(child.tag)
+            if name:
+                target = target.child(name)
+
+        value = (child.text or '').strip()
+        if value and child.tag != 'member' and len(child) == 0:
+            target.child(value)
+        _add_element(child, target)
+
+def _parse_json(text, root):
+    """Parse an ACI export or any other JSON configuration."""
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON configuration: {str(e)}")
+    _add_json(data, root)
+
+def _add_json(value, node):
+    """Add a JSON value below a node."""
+    if isinstance(value, list):
+        for item in value:
+            _add_json(item, node)
+        return
+    if not isinstance(value, dict):
+        node.child(str(value))
+        return
+
+    for key, item in value.items():
+        if key == 'imdata':
+            _add_json(item, node)
+            continue
+        target = node.child(key)
+
+        # ACI managed objects: {"<class>": {"attributes": {...}, "children": [...]}}
+        if isinstance(item, dict) and ('attributes' in item or 'children' in item):
+            attributes = item.get('attributes') or {}
+            if attributes.get('name'):
+                target = target.child(attributes['name'])
+            for attribute, attribute_value in attributes.items():
+                if attribute != 'name' and attribute_value not in ('', None):
+                    target.child(attribute).child(str(attribute_value))
+            _add_json(item.get('children') or [], target)
+        else:
+            _add_json(item, target)
+
+_PARSERS = {
+    'indented': _parse_indented,
+    'junos': _parse_junos,
+    'set': _parse_set,
+    'xml': _parse_xml,
+    'json': _parse_json
+}
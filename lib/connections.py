@@ -0,0 +1,43 @@
+"""
+Persistent connection module for the Network Device Management tool.
+
+Ansible's network_cli connection keeps one SSH session per device open in a
+background ansible-connection process and reuses it for the later tasks of
+the same job. This module configures those persistent connections.
+
+Sessions are not shared between jobs: Ansible names a connection's control
+socket after the ansible-playbook process that opened it, and resets the
+connections a run opened when the run ends.
+"""
+import os
+from .settings import get_setting
+
+# Default directory for the control sockets of persistent connections
+CONTROL_PATH_DIR = os.path.join('data', 'pc')
+
+# Unix socket paths are limited to about 108 bytes and Ansible appends 11
+MAX_CONTROL_PATH_DIR = 96
+
+def connection_env(command_timeout):
+    """
+    Build the environment for Ansible's persistent connections.
+
+    Args:
+        command_timeout (int): Seconds to wait for a device to answer a command
+
+    Returns:
+        dict: ANSIBLE_PERSISTENT_* environment variables
+    """
+    env = {
+        # Ansible uses the connect timeout as the idle timeout as well
+        'ANSIBLE_PERSISTENT_CONNECT_TIMEOUT': str(get_setting('ansible', 'connect_timeout', 30)),
+        'ANSIBLE_PERSISTENT_COMMAND_TIMEOUT': str(command_timeout)
+    }
+
+    control_path_dir = os.path.abspath(get_setting('ansible', 'control_path_dir', CONTROL_PATH_DIR))
+    if len(control_path_dir) <= MAX_CONTROL_PATH_DIR:
+        os.makedirs(control_path_dir, mode=0o700, exist_ok=True)
+        env['ANSIBLE_PERSISTENT_CONTROL_PATH_DIR'] = control_path_dir
+    # Otherwise the socket paths would be too long; Ansible's default is used
+
+    return env
@@ -0,0 +1,177 @@
+"""
+Fact cache module for the Network Device Management tool.
+
+Ansible stores the facts it gathers from a device in a jsonfile fact cache,
+one file per device under data/fact_cache. This module configures that cache
+and records when each fact subset of a device was last gathered, so device
+facts can be answered from the cache while they are fresh and only stale
+subsets need to be gathered again.
+
+Fact subsets are the gather_subset values of the *_facts modules that the
+facts summary uses, plus 'status' for the output of the status commands
+(e.g. the uptime), which is not a fact and is kept by NetMan itself.
+"""
+import os
+import json
+import time
+import tempfile
+import threading
+from .settings import get_setting
+
+# Default directory of the fact cache
+FACT_CACHE_DIR = os.path.join('data', 'fact_cache')
+
+# Prefixes of Ansible's cache files and of NetMan's own records, so Ansible
+# does not take NetMan's files for cached hosts
+CACHE_PREFIX = 'facts_'
+RECORD_PREFIX = 'netman_'
+
+# Seconds each fact subset stays fresh unless configured in facts.ttl
+DEFAULT_TTLS = {
+    'min': 86400,       # hostname, OS version, model and serial number
+    'hardware': 3600,   # memory
+    'interfaces': 900,  # interface names
+    'status': 300       # uptime
+}
+
+FACT_SUBSETS = tuple(DEFAULT_TTLS)
+
+# Serializes updates of NetMan's records
+_record_lock = threading.Lock()
+
+def fact_cache_dir():
+    """
+    Get the fact cache directory.
+
+    Returns:
+        str: Absolute path of the facts.cache_dir setting
+    """
+    return os.path.abspath(get_setting('facts', 'cache_dir', FACT_CACHE_DIR))
+
+def fact_cache_env():
+    """
+    Build the environment that makes Ansible use the fact cache.
+
+    Returns:
+        dict: ANSIBLE_CACHE_PLUGIN* environment variables
+    """
+    return {
+        'ANSIBLE_CACHE_PLUGIN': 'jsonfile',
+        'ANSIBLE_CACHE_PLUGIN_CONNECTION': fact_cache_dir(),
+        'ANSIBLE_CACHE_PLUGIN_PREFIX': CACHE_PREFIX,
+        # Facts never expire in Ansible; NetMan tracks their age per subset
+        'ANSIBLE_CACHE_PLUGIN_TIMEOUT': '0'
+    }
+
+class FactCache:
+    """Reads cached device facts and tracks how fresh they are."""
+
+    def __init__(self, cache_dir=None):
+        """
+        Initialize the fact cache.
+
+        Args:
+            cache_dir (str, optional): Cache directory (default: facts.cache_dir)
+        """
+        self.cache_dir = cache_dir or fact_cache_dir()
+
+    def ttl(self, subset):
+        """
+        Get how long a fact subset stays fresh.
+
+        Args:
+            subset (str): Fact subset
+
+        Returns:
+            int: Seconds, from facts.ttl or DEFAULT_TTLS
+        """
+        ttls = get_setting('facts', 'ttl', {}) or {}
+        return ttls.get(subset, DEFAULT_TTLS[subset])
+
+    def load(self, hostname):
+        """
+        Load the cached facts of a device.
+
+        Args:
+            hostname (str): Hostname of the device
+
+        Returns:
+            dict: 'facts' (the device's cached Ansible facts), 'status' (the
+                status command outputs) and 'gathered' (time each subset was
+                last gathered); empty for anything not cached
+        """
+        facts = self._read(CACHE_PREFIX + hostname)
+        record = self._read(RECORD_PREFIX + hostname + '.json')
+        gathered = record.get('gathered', {})
+
+        # Timestamps are worthless if Ansible's own cache file is gone
+        if not facts:
+            gathered = {subset: gathered[subset] for subset in gathered if subset == 'status'}
+
+        return {
+            'facts': facts,
+            'status': record.get('status', []),
+            'gathered': gathered
+        }
+
+    def stale_subsets(self, entry, max_age=None):
+        """
+        Find the fact subsets of a cache entry that need gathering.
+
+        Args:
+            entry (dict): Cache entry from load()
+            max_age (int, optional): Seconds a subset may be old; each
+                subset's TTL if not given
+
+        Returns:
+            list: Subsets never gathered or older than allowed
+        """
+        now = time.time()
+        stale = []
+        for subset in FACT_SUBSETS:
+            gathered = entry['gathered'].get(subset)
+            limit = self.ttl(subset) if max_age is None else max_age
+            if gathered is None or now - gathered > limit:
+                stale.append(subset)
+        return stale
+
+    def store(self, hostname, subsets, ansible_result):
+        """
+        Record that fact subsets of a device were just gathered.
+
+        Ansible has already written the facts themselves to its cache file;
+        this keeps the gathering time and the status command outputs.
+
+        Args:
+            hostname (str): Hostname of the device
+            subsets (list): Fact subsets that were gathered
+            ansible_result (dict): The ansible_result of get_device_status.yml
+        """
+        now = time.time()
+        name = RECORD_PREFIX + hostname + '.json'
+
+        with _record_lock:
+            record = self._read(name)
+            gathered = record.setdefault('gathered', {})
+            for subset in subsets:
+                gathered[subset] = now
+            if 'status' in subsets:
+                record['status'] = ansible_result.get('status') or []
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp_')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(record, f)
+                os.replace(temp_path, os.path.join(self.cache_dir, name))
+            except Exception:
+                os.remove(temp_path)
+                raise
+
+    def _read(self, name):
+        """Read a JSON file from the cache directory, empty if unavailable."""
+        try:
+            with open(os.path.join(self.cache_dir, name), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
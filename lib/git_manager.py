@@ -14,15 +14,23 @@ class GitManager:
     def __init__(self, repo_path="configs"):
         """Initialize with the Git repository path."""
         self.repo_path = repo_path
-        self._ensure_repo_exists()
+        self._repo = None
     
-    def _ensure_repo_exists(self):
-        """Ensure the Git repository exists and is initialized."""
-        if not os.path.exists(self.repo_path):
-            os.makedirs(self.repo_path, exist_ok=True)
+    @property
+    def repo(self):
+        """
+        git.Repo: Repository handle, opened on first use and kept open.
         
-        if not os.path.exists(os.path.join(self.repo_path, '.git')):
-            self.init_repo(self.repo_path)
+        The repository is normally created by `netman init`; if it is missing
+        it is initialized here instead of on every GitManager construction.
+        """
+        if self._repo is None:
+            try:
+                self._repo = git.Repo(self.repo_path)
+            except (git.InvalidGitRepositoryError, git.NoSuchPathError):
+                self.init_repo(self.repo_path)
+                self._repo = git.Repo(self.repo_path)
+        return self._repo
     
     def init_repo(self, path=None):
         """
@@ -62,7 +70,7 @@ class GitManager:
                         pass  # Continue even if config fails
                         
                     # Add and commit the .gitignore file
-                    repo.git.add(gitignore_path)
+                    repo.git.add('.gitignore')
                     repo.git.commit('-m', 'Initial commit')
                 except Exception as commit_error:
                     print(f"Warning: Could not create initial commit: {str(commit_error)}")
@@ -84,7 +92,7 @@ class GitManager:
             bool: True if successful, False otherwise
         """
         try:
-            repo = git.Repo(self.repo_path)
+            repo = self.repo
             
             # Check if there are changes to commit
             if not repo.is_dirty(untracked_files=True):
@@ -119,7 +127,7 @@ class GitManager:
             str: File content or None if failed
         """
         try:
-            repo = git.Repo(self.repo_path)
+            repo = self.repo
             
             # Get the file content at the specified revision
             return repo.git.show(f"{revision}:{file_path}")
@@ -139,7 +147,7 @@ class GitManager:
             str: Diff output or None if failed
         """
         try:
-            repo = git.Repo(self.repo_path)
+            repo = self.repo
             
             # Get the path to the latest config file
             config_file = os.path.join(hostname, f"{hostname}_latest.cfg")
@@ -168,7 +176,7 @@ class GitManager:
             list: List of commit dictionaries or None if failed
         """
         try:
-            repo = git.Repo(self.repo_path)
+            repo = self.repo
             
             # Get the path to the latest config file
             config_file = os.path.join(hostname, f"{hostname}_latest.cfg")
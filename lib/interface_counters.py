@@ -0,0 +1,400 @@
+"""
+Interface counters module for the Network Device Management tool.
+
+This module keeps the interface counters of every polled device between
+polls, so rates can be computed from two samples: packets, bytes, errors,
+drops and resets per second for each interface.
+
+Counters are stored column by column: one array of 64-bit integers per
+counter holds that counter of all interfaces of all devices, and each
+interface is a row. Rates of a counter are computed in one pass over its
+current and previous columns, and the store is saved to disk as the raw
+arrays, which keeps it small and quick to load for large fleets.
+"""
+import os
+import math
+import time
+import heapq
+import marshal
+import tempfile
+from array import array
+from .settings import get_setting
+
+# Default file keeping the counters between runs
+COUNTERS_FILE = os.path.join('data', 'interface_counters.bin')
+
+# Counters stored per interface, as parsed by lib/interface_parser.py
+COUNTERS = (
+    'in_packets', 'out_packets', 'in_bytes', 'out_bytes',
+    'in_errors', 'out_errors', 'in_drops', 'out_drops',
+    'crc_errors', 'collisions', 'resets', 'link_changes'
+)
+
+# Metrics that can be queried: each counter, and the sum of both directions
+METRICS = dict(
+    {counter: (counter,) for counter in COUNTERS},
+    packets=('in_packets', 'out_packets'),
+    bytes=('in_bytes', 'out_bytes'),
+    errors=('in_errors', 'out_errors'),
+    drops=('in_drops', 'out_drops')
+)
+
+# Column value of a counter the device does not report
+UNKNOWN = 2 ** 64 - 1
+
+# Largest increase a 32-bit counter going backwards is taken to have
+# wrapped with; a bigger one means the counter was reset
+WRAP_WINDOW = 2 ** 28
+
+# Bumped when the layout of the counters file changes
+_FILE_VERSION = 1
+
+_NAN = float('nan')
+
+def counter_delta(current, previous):
+    """
+    Get how much a counter increased between two samples.
+
+    A counter that went backwards either wrapped or was reset. Only 32-bit
+    counters wrap in practice, so it wrapped if it was within WRAP_WINDOW
+    of 2^32 and counting on past the top explains the new value within that
+    window. Otherwise, including any step back from above 2^32, it was
+    reset (counters cleared or the device reloaded) and counted up from zero.
+
+    Args:
+        current (int): Counter value of the later sample
+        previous (int): Counter value of the earlier sample
+
+    Returns:
+        int: The increase
+    """
+    if current >= previous:
+        return current - previous
+    wrapped = current + 2 ** 32 - previous
+    if previous < 2 ** 32 and wrapped < WRAP_WINDOW:
+        return wrapped
+    return current
+
+class CounterStore:
+    """Interface counters of the last two polls, stored as columns."""
+
+    def __init__(self, counters_file=None):
+        """
+        Initialize the store, loading the counters of earlier polls.
+
+        Args:
+            counters_file (str, optional): File keeping the counters
+                (default: monitoring.counters_file)
+        """
+        self.counters_file = counters_file or get_setting('monitoring', 'counters_file', COUNTERS_FILE)
+        self._clear()
+        self._load()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _clear(self):
+        """Start with no interfaces."""
+        # Row of each interface: keys[row] is (hostname, interface name)
+        self.keys = []
+        self._rows = {}
+        # Poll times of the current and previous sample per row
+        self.times = array('d')
+        self.previous_times = array('d')
+        self.current = {counter: array('Q') for counter in COUNTERS}
+        self.previous = {counter: array('Q') for counter in COUNTERS}
+        self._rates = {}
+
+    def update(self, hostname, interfaces, timestamp=None):
+        """
+        Store a poll of a device's interfaces.
+
+        The counters stored so far become the previous sample. Interfaces
+        the device no longer reports are removed.
+
+        Args:
+            hostname (str): Hostname of the device
+            interfaces (dict): Interface name mapped to its fields, as
+                returned by interface_parser.parse_interfaces
+            timestamp (float, optional): Poll time (default: now)
+        """
+        timestamp = timestamp or time.time()
+        rows = self._rows.setdefault(hostname, {})
+        columns = [(counter, self.current[counter], self.previous[counter]) for counter in COUNTERS]
+
+        for name, interface in interfaces.items():
+            row = rows.get(name)
+            if row is None:
+                row = rows[name] = self._append(hostname, name)
+
+            counters = interface.get('counters') or {}
+            self.previous_times[row] = self.times[row]
+            self.times[row] = timestamp
+            for counter, current, previous in columns:
+                previous[row] = current[row]
+                current[row] = counters.get(counter, UNKNOWN)
+
+        gone = set(rows) - set(interfaces)
+        if gone:
+            self._remove({(hostname, name) for name in gone})
+        self._rates = {}
+
+    def forget(self, hostnames):
+        """
+        Remove the counters of devices.
+
+        Args:
+            hostnames (iterable): Hostnames of the devices
+        """
+        keys = {(hostname, name) for hostname in hostnames for name in self._rows.get(hostname, {})}
+        if keys:
+            self._remove(keys)
+            self._rates = {}
+
+    def rates(self, metric):
+        """
+        Get the per-second rate of a metric for every interface.
+
+        Args:
+            metric (str): Key of METRICS
+
+        Returns:
+            array: Rate per row, NaN where an interface has no two samples
+                or the device does not report the counter
+        """
+        rates = self._rates.get(metric)
+        if rates is not None:
+            return rates
+
+        counters = METRICS[metric]
+        if len(counters) == 1:
+            rates = self._counter_rates(counters[0])
+        else:
+            columns = [self.rates(counter) for counter in counters]
+            rates = array('d', [_sum_known(values) for values in zip(*columns)])
+        self._rates[metric] = rates
+        return rates
+
+    def _counter_rates(self, counter):
+        """Compute the rate of a counter for all rows at once."""
+        current = self.current[counter]
+        previous = self.previous[counter]
+        elapsed = [now - before if before else 0.0 for now, before in zip(self.times, self.previous_times)]
+
+        # Increases without wrap or reset take the fast path
+        return array('d', [
+            (now - before) / seconds if before <= now < UNKNOWN and seconds > 0
+            else _unusual_rate(now, before, seconds)
+            for now, before, seconds in zip(current, previous, elapsed)
+        ])
+
+    def top(self, metric, count=10, hostnames=None):
+        """
+        Find the interfaces with the highest rate of a metric.
+
+        Args:
+            metric (str): Key of METRICS, e.g. 'errors'
+            count (int): Number of interfaces to return
+            hostnames (iterable, optional): Only consider these devices
+
+        Returns:
+            list: Dicts with hostname, interface, rate (per second) and
+                interval (seconds between the two samples), highest rate
+                first; interfaces whose rate is zero or unknown are left out
+        """
+        rates = self.rates(metric)
+        if hostnames is None:
+            rows = range(len(rates))
+        else:
+            rows = [row for hostname in hostnames for row in self._rows.get(hostname, {}).values()]
+
+        # NaN compares false, so unknown rates are skipped too
+        best = heapq.nlargest(count, (row for row in rows if rates[row] > 0), key=rates.__getitem__)
+        return [
+            {
+                'hostname': self.keys[row][0],
+                'interface': self.keys[row][1],
+                'rate': rates[row],
+                'interval': self.times[row] - self.previous_times[row]
+            }
+            for row in best
+        ]
+
+    def interfaces(self, hostname=None):
+        """
+        Get the counters and rates of interfaces.
+
+        Args:
+            hostname (str, optional): Only this device's interfaces
+
+        Returns:
+            list: Dicts with hostname, interface, polled (time of the last
+                poll), counters and rates (counter name mapped to value, for
+                the counters the device reports)
+        """
+        rows = range(len(self.keys)) if hostname is None else self._rows.get(hostname, {}).values()
+        rates = {counter: self.rates(counter) for counter in COUNTERS}
+
+        result = []
+        for row in rows:
+            known = [counter for counter in COUNTERS if self.current[counter][row] != UNKNOWN]
+            result.append({
+                'hostname': self.keys[row][0],
+                'interface': self.keys[row][1],
+                'polled': self.times[row],
+                'counters': {counter: self.current[counter][row] for counter in known},
+                'rates': {counter: rates[counter][row] for counter in known if not math.isnan(rates[counter][row])}
+            })
+        return result
+
+    def save(self):
+        """
+        Write the store to its file.
+
+        Returns:
+            bool: True if the file was written
+        """
+        data = {
+            'version': _FILE_VERSION,
+            'keys': self.keys,
+            'times': self.times.tobytes(),
+            'previous_times': self.previous_times.tobytes(),
+            'current': {counter: column.tobytes() for counter, column in self.current.items()},
+            'previous': {counter: column.tobytes() for counter, column in self.previous.items()}
+        }
+
+        directory = os.path.dirname(os.path.abspath(self.counters_file))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    marshal.dump(data, f)
+                os.replace(temp_path, self.counters_file)
+            except Exception:
+                os.remove(temp_path)
+                raise
+            return True
+        except Exception as e:
+            print(f"Error saving interface counters: {str(e)}")
+            return False
+
+    def _load(self):
+        """Load the store from its file; a missing or unreadable file leaves it empty."""
+        try:
+            with open(self.counters_file, 'rb') as f:
+                data = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return
+        if not isinstance(data, dict) or data.get('version') != _FILE_VERSION:
+            return
+
+        try:
+            keys = [tuple(key) for key in data['keys']]
+            self.times = _column('d', data['times'], len(keys))
+            self.previous_times = _column('d', data['previous_times'], len(keys))
+            for counter in COUNTERS:
+                self.current[counter] = _column('Q', data['current'].get(counter), len(keys))
+                self.previous[counter] = _column('Q', data['previous'].get(counter), len(keys))
+        except (KeyError, ValueError, TypeError, AttributeError):
+            self._clear()
+            return
+
+        self.keys = keys
+        for row, (hostname, name) in enumerate(keys):
+            self._rows.setdefault(hostname, {})[name] = row
+
+    def _append(self, hostname, name):
+        """Add a row for a new interface, without samples."""
+        self.keys.append((hostname, name))
+        self.times.append(0.0)
+        self.previous_times.append(0.0)
+        for counter in COUNTERS:
+            self.current[counter].append(UNKNOWN)
+            self.previous[counter].append(UNKNOWN)
+        return len(self.keys) - 1
+
+    def _remove(self, keys):
+        """Remove the rows of interfaces, keeping the others in order."""
+        kept = [row for row, key in enumerate(self.keys) if key not in keys]
+
+        self.keys = [self.keys[row] for row in kept]
+        self.times = array('d', [self.times[row] for row in kept])
+        self.previous_times = array('d', [self.previous_times[row] for row in kept])
+        for columns in (self.current, self.previous):
+            for counter, column in columns.items():
+                columns[counter] = array('Q', [column[row] for row in kept])
+
+        self._rows = {}
+        for row, (hostname, name) in enumerate(self.keys):
+            self._rows.setdefault(hostname, {})[name] = row
+
+class InterfacePoller:
+    """Polls the interface counters of devices into a CounterStore."""
+
+    def __init__(self, store=None):
+        """
+        Initialize the poller.
+
+        Args:
+            store (CounterStore, optional): Store to update (default: the
+                store in monitoring.counters_file)
+        """
+        self.store = store if store is not None else CounterStore()
+
+    def poll(self, devices, save=True, forks=None):
+        """
+        Poll the interfaces of devices and store their counters.
+
+        All devices are polled in a single Ansible run.
+
+        Args:
+            devices (list): Device information dicts
+            save (bool): Write the store to its file afterwards
+            forks (int, optional): Number of devices Ansible polls in parallel
+
+        Returns:
+            dict: 'polled' (number of devices polled), 'interfaces' (number
+                of interfaces stored) and 'failed' (hostnames that could not
+                be polled)
+        """
+        from .monitoring import Monitor
+
+        polled = 0
+        failed = []
+        for hostname, result in Monitor.collect_interfaces(devices, forks=forks).items():
+            if result is None:
+                failed.append(hostname)
+                continue
+            self.store.update(hostname, result['parsed'])
+            polled += 1
+
+        if save:
+            self.store.save()
+
+        return {
+            'polled': polled,
+            'interfaces': len(self.store),
+            'failed': failed
+        }
+
+def _unusual_rate(current, previous, seconds):
+    """Rate of a counter that is unknown, wrapped or was reset."""
+    if current == UNKNOWN or previous == UNKNOWN or seconds <= 0:
+        return _NAN
+    return counter_delta(current, previous) / seconds
+
+def _sum_known(values):
+    """Sum rates, ignoring unknown ones; NaN if all are unknown."""
+    known = [value for value in values if value == value]
+    return sum(known) if known else _NAN
+
+def _column(typecode, data, length):
+    """Rebuild a column from its bytes, or an empty one if it was not saved."""
+    if data is None:
+        return array(typecode, [UNKNOWN if typecode == 'Q' else 0.0]) * length
+    column = array(typecode)
+    column.frombytes(data)
+    if len(column) != length:
+        raise ValueError("Column length does not match the interfaces")
+    return column
@@ -0,0 +1,452 @@
+"""
+Interface parser module for the Network Device Management tool.
+
+This module parses the interface status commands of each vendor (see
+INTERFACE_COMMANDS) into one structure per interface:
+
+    {
+        'name': 'GigabitEthernet0/1',
+        'status': 'up',             # operational status
+        'admin_status': 'up',
+        'protocol': 'up',           # line protocol, where the vendor has one
+        'description': 'LAN',
+        'mac_address': 'aabb.cc00.0101',
+        'ip_addresses': ['192.168.1.1/24'],
+        'mtu': 1500, 'bandwidth_kbps': 1000000, 'speed': '1000Mb/s', 'duplex': 'full',
+        'input_rate_bps': 25000, 'input_rate_pps': 40,
+        'output_rate_bps': 21000, 'output_rate_pps': 35,
+        'counters': {'in_packets': 1250, 'in_bytes': 125000, 'in_errors': 0, ...}
+    }
+
+Only the fields a vendor's output has are set. Counters are in_/out_packets,
+bytes, errors and drops, plus crc_errors, collisions, resets (interface
+resets) and link_changes where available.
+
+Each vendor is described by a table of line rules. A rule is a regular
+expression matched at the start of a line, after its indentation; its named
+groups are the fields it extracts. All rules of a vendor are compiled into a
+single regular expression, so the output is scanned once, and the few rules
+that depend on context (e.g. Junos input and output error blocks) are driven
+by a small state machine.
+"""
+import os
+import re
+from collections import namedtuple
+
+# Rule of a vendor's table:
+#   pattern:       regular expression with a named group per field; groups
+#                  named 'x_<field>' get the current state as prefix
+#   new_interface: the line starts an interface, named by the 'name' group
+#   states:        states the rule applies in, None for any
+#   then:          state to switch to after the rule matched
+# A pattern must not match past the end of its line (use [^,\n] rather than
+# [^,], [ \t] rather than \s), or it would hide the lines it runs into.
+Rule = namedtuple('Rule', ('pattern', 'new_interface', 'states', 'then'), defaults=(False, None, None))
+
+# Interface status command per vendor
+INTERFACE_COMMANDS = {
+    'ios': 'show interfaces',
+    'eos': 'show interfaces',
+    'junos': 'show interfaces extensive',
+    'panos': 'show interface all',
+    'nxos': 'show interface'
+}
+
+# Vendor tables per device type from the inventory; ACI leaves run NX-OS
+DEVICE_VENDORS = {
+    'cisco_ios': 'ios',
+    'ios': 'ios',
+    'arista_eos': 'eos',
+    'eos': 'eos',
+    'junos': 'junos',
+    'juniper': 'junos',
+    'juniper_junos': 'junos',
+    'panos': 'panos',
+    'paloalto': 'panos',
+    'cisco_aci': 'nxos',
+    'aci': 'nxos',
+    'cisco_nxos': 'nxos',
+    'nxos': 'nxos'
+}
+
+COUNTER_FIELDS = frozenset((
+    'in_packets', 'in_bytes', 'in_errors', 'in_drops',
+    'out_packets', 'out_bytes', 'out_errors', 'out_drops',
+    'crc_errors', 'collisions', 'resets', 'link_changes'
+))
+
+INTEGER_FIELDS = frozenset(('mtu', 'bandwidth_kbps', 'input_rate_pps', 'output_rate_pps'))
+
+RATE_FIELDS = frozenset(('input_rate_bps', 'output_rate_bps'))
+
+# Multipliers of the rate units vendors print
+_RATE_UNITS = {'': 1, 'bps': 1, 'bits/sec': 1, 'kbps': 1000, 'mbps': 1000000, 'gbps': 1000000000}
+
+_RATE = r'[\d.]+(?: ?[kKmMgG]?bps)?'
+
+_IOS_RULES = (
+    Rule(r'(?P<name>\S+) is (?P<status>administratively down|up|down|deleted)(?: \([^)\n]*\))?, '
+         r'line protocol is (?P<protocol>\w+)', new_interface=True),
+    Rule(r'Hardware is .*?address is (?P<mac_address>[0-9a-fA-F.]+)'),
+    Rule(r'Description: (?P<description>.*?)[ \t]*$'),
+    Rule(r'Internet address is (?P<ip_address>\S+)'),
+    Rule(r'MTU (?P<mtu>\d+) bytes, BW (?P<bandwidth_kbps>\d+) Kbit'),
+    Rule(r'(?P<duplex>\w+)-duplex, (?P<speed>[^,\n]+)'),
+    Rule(r'\d+ (?:minute|second)s? input rate (?P<input_rate_bps>\d+) bits/sec, (?P<input_rate_pps>\d+) packets/sec'),
+    Rule(r'\d+ (?:minute|second)s? output rate (?P<output_rate_bps>\d+) bits/sec, '
+         r'(?P<output_rate_pps>\d+) packets/sec'),
+    Rule(r'Input queue: \d+/\d+/(?P<in_drops>\d+)/\d+.*Total output drops: (?P<out_drops>\d+)'),
+    Rule(r'(?P<in_packets>\d+) packets input, (?P<in_bytes>\d+) bytes'),
+    Rule(r'(?P<in_errors>\d+) input errors, (?P<crc_errors>\d+) CRC'),
+    Rule(r'(?P<out_packets>\d+) packets output, (?P<out_bytes>\d+) bytes'),
+    Rule(r'(?P<out_errors>\d+) output errors, (?:(?P<collisions>\d+) collisions, )?(?P<resets>\d+) interface resets')
+)
+
+_EOS_RULES = (
+    Rule(r'(?P<name>\S+) is (?P<status>administratively down|up|down)(?:, line protocol is (?P<protocol>\w+))?',
+         new_interface=True),
+    Rule(r'Hardware is .*?address is (?P<mac_address>[0-9a-fA-F.]+)'),
+    Rule(r'Description: (?P<description>.*?)[ \t]*$'),
+    Rule(r'Internet address is (?P<ip_address>\S+)'),
+    Rule(r'(?:\w+ )?MTU (?P<mtu>\d+) bytes(?: ?, BW (?P<bandwidth_kbps>\d+) kbit)?'),
+    Rule(r'(?P<duplex>\w+)-duplex, (?P<speed>[^,\n]+)'),
+    Rule(rf'\d+ (?:minute|second)s? input rate (?P<input_rate_bps>{_RATE}).*?(?P<input_rate_pps>\d+) packets/sec'),
+    Rule(rf'\d+ (?:minute|second)s? output rate (?P<output_rate_bps>{_RATE}).*?(?P<output_rate_pps>\d+) packets/sec'),
+    Rule(r'(?P<link_changes>\d+) link status changes since last clear'),
+    Rule(r'(?P<in_packets>\d+) packets input, (?P<in_bytes>\d+) bytes'),
+    Rule(r'(?P<in_errors>\d+) input errors, (?P<crc_errors>\d+) CRC(?:.*?(?P<in_drops>\d+) input discards)?'),
+    Rule(r'(?P<out_packets>\d+) packets output, (?P<out_bytes>\d+) bytes'),
+    Rule(r'(?P<out_errors>\d+) output errors, (?P<collisions>\d+) collisions'),
+    Rule(r'\d+ late collision.*?(?P<out_drops>\d+) output discards')
+)
+
+_JUNOS_PHYSICAL = ('physical', 'in', 'out')
+
+_JUNOS_RULES = (
+    Rule(r'Physical interface: (?P<name>[^,\s]+), (?P<admin_status>Enabled|Administratively down|Disabled), '
+         r'Physical link is (?P<status>\w+)', new_interface=True, then='physical'),
+    Rule(r'Logical interface \S+', then='logical'),
+    Rule(r'Description: (?P<description>.*?)[ \t]*$', states=_JUNOS_PHYSICAL),
+    Rule(r'Link-level type: [^,\n]+, MTU: (?P<mtu>\d+)(?:.*?Speed: (?P<speed>[^,\n]+))?', states=_JUNOS_PHYSICAL),
+    Rule(r'Duplex: (?P<duplex>[\w-]+)', states=_JUNOS_PHYSICAL),
+    Rule(r'Current address: (?P<mac_address>[0-9a-fA-F:]+)', states=_JUNOS_PHYSICAL),
+    Rule(r'Input rate[ \t]*: (?P<input_rate_bps>\d+) bps \((?P<input_rate_pps>\d+) pps\)', states=_JUNOS_PHYSICAL),
+    Rule(r'Output rate[ \t]*: (?P<output_rate_bps>\d+) bps \((?P<output_rate_pps>\d+) pps\)', states=_JUNOS_PHYSICAL),
+    Rule(r'Input[ \t]+bytes[ \t]*:[ \t]*(?P<in_bytes>\d+)', states=_JUNOS_PHYSICAL),
+    Rule(r'Output[ \t]+bytes[ \t]*:[ \t]*(?P<out_bytes>\d+)', states=_JUNOS_PHYSICAL),
+    Rule(r'Input[ \t]+packets[ \t]*:[ \t]*(?P<in_packets>\d+)', states=_JUNOS_PHYSICAL),
+    Rule(r'Output[ \t]+packets[ \t]*:[ \t]*(?P<out_packets>\d+)', states=_JUNOS_PHYSICAL),
+    Rule(r'Input errors:[ \t]*$', states=_JUNOS_PHYSICAL, then='in'),
+    Rule(r'Output errors:[ \t]*$', states=_JUNOS_PHYSICAL, then='out'),
+    Rule(r'Errors: (?P<x_errors>\d+), Drops: (?P<x_drops>\d+)(?:, Framing errors: (?P<crc_errors>\d+))?',
+         states=('in',)),
+    Rule(r'Carrier transitions: (?P<link_changes>\d+), Errors: (?P<x_errors>\d+), Drops: (?P<x_drops>\d+)'
+         r'(?:, Collisions: (?P<collisions>\d+))?', states=('out',)),
+    Rule(r'Destination: [^,\n]*?/(?P<prefix_length>\d+), Local: (?P<ip_address>[^,\s]+)')
+)
+
+_PANOS_NAME = r'(?:ethernet|ae|tunnel|loopback|vlan)[\w/.]*'
+
+_PANOS_RULES = (
+    # 'show interface all' tables: hardware, then logical interfaces
+    Rule(rf'(?P<name>{_PANOS_NAME})[ \t]+\d+[ \t]+(?P<speed>[^/\s]+)/(?P<duplex>[^/\s]+)/(?P<status>up|down)'
+         r'[ \t]+(?P<mac_address>[0-9a-fA-F:]{17})', new_interface=True),
+    Rule(rf'(?P<name>{_PANOS_NAME})[ \t]+\d+[ \t]+\d+[ \t].*?(?P<ip_address>[\d.]+/\d+)[ \t]*$', new_interface=True),
+    # Pipe-separated summary table of some releases
+    Rule(rf'(?P<name>{_PANOS_NAME})[ \t]*\|[^|\n]*\|[^|\n]*\|[ \t]*(?P<ip_address>[\d.]+/\d+)?[ \t]*\|[ \t]*(?P<status>up|down)'
+         r'[ \t]*\|[^|\n]*\|[ \t]*(?P<mtu>\d+)[ \t]*\|[ \t]*(?P<mac_address>[0-9a-fA-F:]{17})?', new_interface=True),
+    # 'show interface <name>'
+    Rule(r'Name: (?P<name>[^,\s]+), ID: \d+', new_interface=True),
+    Rule(r'Runtime link speed/duplex/state: (?P<speed>[^/\n]+)/(?P<duplex>[^/\n]+)/(?P<status>\w+)'),
+    Rule(r'Port MAC address (?P<mac_address>\S+)'),
+    Rule(r'Interface MTU (?P<mtu>\d+)'),
+    Rule(r'Interface IP address: (?P<ip_address>\S+)'),
+    Rule(r'bytes received[ \t]+(?P<in_bytes>\d+)'),
+    Rule(r'bytes transmitted[ \t]+(?P<out_bytes>\d+)'),
+    Rule(r'packets received[ \t]+(?P<in_packets>\d+)'),
+    Rule(r'packets transmitted[ \t]+(?P<out_packets>\d+)'),
+    Rule(r'receive errors[ \t]+(?P<in_errors>\d+)'),
+    Rule(r'transmit errors[ \t]+(?P<out_errors>\d+)'),
+    Rule(r'packets dropped[ \t]+(?P<in_drops>\d+)')
+)
+
+_NXOS_RULES = (
+    Rule(r'(?P<name>\S+) is (?P<status>up|down)\b', new_interface=True),
+    Rule(r'admin state is (?P<admin_status>up|down)'),
+    Rule(r'Hardware: .*?address: (?P<mac_address>[0-9a-fA-F.]+)'),
+    Rule(r'Description: (?P<description>.*?)[ \t]*$'),
+    Rule(r'Internet Address is (?P<ip_address>\S+)'),
+    Rule(r'MTU (?P<mtu>\d+) bytes, BW (?P<bandwidth_kbps>\d+) Kbit'),
+    Rule(r'(?P<duplex>\w+)-duplex, (?P<speed>[^,\n]+)'),
+    Rule(r'\d+ (?:minute|second)s? input rate (?P<input_rate_bps>\d+) bits/sec, (?P<input_rate_pps>\d+) packets/sec'),
+    Rule(r'\d+ (?:minute|second)s? output rate (?P<output_rate_bps>\d+) bits/sec, '
+         r'(?P<output_rate_pps>\d+) packets/sec'),
+    Rule(r'(?P<in_packets>\d+) input packets[ \t]+(?P<in_bytes>\d+) bytes'),
+    Rule(r'(?P<out_packets>\d+) output packets[ \t]+(?P<out_bytes>\d+) bytes'),
+    Rule(r'(?P<in_errors>\d+) input error\b'),
+    Rule(r'\d+ input with dribble[ \t]+(?P<in_drops>\d+) input discard'),
+    Rule(r'(?P<out_errors>\d+) output error[ \t]+(?P<collisions>\d+) collision'),
+    Rule(r'\d+ lost carrier.*?(?P<out_drops>\d+) output discard'),
+    Rule(r'(?P<resets>\d+) interface resets')
+)
+
+VENDOR_RULES = {
+    'ios': _IOS_RULES,
+    'eos': _EOS_RULES,
+    'junos': _JUNOS_RULES,
+    'panos': _PANOS_RULES,
+    'nxos': _NXOS_RULES
+}
+
+# Characters of output each parsing process should get at least, see parse_outputs
+PARALLEL_PARSE_MIN = 8000000
+
+_GROUP = re.compile(r'\(\?P<(\w+)>')
+
+# Compiled parsers per vendor, created on first use
+_parsers = {}
+
+def vendor_for(device_type):
+    """
+    Get the vendor table used for a device type.
+
+    Args:
+        device_type (str): Device type from the inventory
+
+    Returns:
+        str: Key of VENDOR_RULES; 'ios' for unknown device types, whose
+            output most often follows IOS
+    """
+    return DEVICE_VENDORS.get((device_type or '').lower(), 'ios')
+
+def interface_command(device_type):
+    """
+    Get the command whose output parse_interfaces expects.
+
+    Args:
+        device_type (str): Device type from the inventory
+
+    Returns:
+        str: The interface status command
+    """
+    return INTERFACE_COMMANDS[vendor_for(device_type)]
+
+def parse_interfaces(output, device_type):
+    """
+    Parse interface status output.
+
+    Args:
+        output (str): Output of interface_command(device_type)
+        device_type (str): Device type from the inventory
+
+    Returns:
+        dict: Interface name mapped to its fields, see the module docstring
+    """
+    vendor = vendor_for(device_type)
+    output = output or ''
+    # The PAN-OS XML API answers the same command with XML
+    if vendor == 'panos' and output.lstrip().startswith('<'):
+        return _parse_panos_xml(output)
+
+    parser = _parsers.get(vendor)
+    if parser is None:
+        parser = _parsers[vendor] = InterfaceParser(VENDOR_RULES[vendor])
+    return parser.parse(output)
+
+def parse_outputs(outputs, workers=None):
+    """
+    Parse the interface status output of many devices.
+
+    The outputs are parsed in worker processes when there is enough of
+    them to outweigh starting the workers.
+
+    Args:
+        outputs (list): (output, device type) per device
+        workers (int, optional): Most worker processes to use (default: one per CPU)
+
+    Returns:
+        list: parse_interfaces results in the order of outputs
+    """
+    size = sum(len(output or '') for output, _ in outputs)
+    workers = min(workers or os.cpu_count() or 1, len(outputs), size // PARALLEL_PARSE_MIN)
+
+    if workers <= 1:
+        return [parse_interfaces(output, device_type) for output, device_type in outputs]
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Spawned workers are safe to start from the threads of `netman serve`
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        chunksize = max(1, len(outputs) // (workers * 4))
+        return list(pool.map(_parse_in_worker, outputs, chunksize=chunksize))
+
+def _parse_in_worker(task):
+    """Parse one device's output in a worker process."""
+    return parse_interfaces(*task)
+
+class InterfaceParser:
+    """A vendor's rule table compiled into one regular expression."""
+
+    def __init__(self, rules):
+        """
+        Compile a rule table.
+
+        Args:
+            rules (tuple): Rule tuples, see Rule
+        """
+        self.rules = rules
+        # Per rule: the regex groups of its fields and how to store each
+        self.plans = []
+        alternatives = []
+
+        for index, rule in enumerate(rules):
+            # Group names are made unique per rule: 'name' becomes 'r3_name'
+            fields = [field for field in _GROUP.findall(rule.pattern) if field != 'name']
+            groups = tuple(f"r{index}_{field}" for field in fields)
+            self.plans.append((groups, tuple(_field_store(field) for field in fields)))
+            pattern = _GROUP.sub(lambda match: f"(?P<r{index}_{match.group(1)}>", rule.pattern)
+            alternatives.append(f"(?P<r{index}>{pattern})")
+
+        self.regex = re.compile(f"^[ \\t]*(?:{'|'.join(alternatives)})", re.MULTILINE)
+
+    def parse(self, output):
+        """
+        Parse the output of the interface status command.
+
+        Returns:
+            dict: Interface name mapped to its fields
+        """
+        interfaces = {}
+        current = None
+        state = None
+
+        for match in self.regex.finditer(output):
+            # The group of the rule closes last, so it is the last group
+            group = match.lastgroup
+            index = int(group[1:])
+            rule = self.rules[index]
+            if rule.states is not None and state not in rule.states:
+                continue
+
+            if rule.new_interface:
+                name = match.group(f"{group}_name")
+                current = interfaces.get(name)
+                if current is None:
+                    current = interfaces[name] = _new_interface(name)
+            if rule.then is not None:
+                state = rule.then
+            if current is None:
+                continue
+
+            groups, stores = self.plans[index]
+            if len(groups) == 1:
+                values = (match.group(groups[0]),)
+            elif groups:
+                values = match.group(*groups)
+            else:
+                continue
+            for store, value in zip(stores, values):
+                if value is not None:
+                    store(current, value, state, match)
+
+        for interface in interfaces.values():
+            if 'status' in interface:
+                interface.setdefault('admin_status', 'up')
+        return interfaces
+
+def _new_interface(name):
+    """Create the fields of an interface that every vendor has."""
+    return {'name': name, 'description': '', 'ip_addresses': [], 'counters': {}}
+
+def _parse_panos_xml(output):
+    """Parse the XML API response to 'show interface all'."""
+    from xml.etree import ElementTree
+
+    try:
+        root = ElementTree.fromstring(output)
+    except ElementTree.ParseError:
+        return {}
+
+    interfaces = {}
+    for entry in root.iterfind('.//hw/entry'):
+        name = entry.findtext('name')
+        if not name:
+            continue
+        interface = interfaces.setdefault(name, _new_interface(name))
+        interface['status'] = 'up' if entry.findtext('state') == 'up' else 'down'
+        for field, tag in (('speed', 'speed'), ('duplex', 'duplex'), ('mac_address', 'mac')):
+            value = entry.findtext(tag)
+            if value:
+                interface[field] = value
+    for entry in root.iterfind('.//ifnet/entry'):
+        name = entry.findtext('name')
+        if not name:
+            continue
+        interface = interfaces.setdefault(name, _new_interface(name))
+        address = entry.findtext('ip')
+        if address and '/' in address and address != 'N/A':
+            interface['ip_addresses'].append(address)
+
+    for interface in interfaces.values():
+        if 'status' in interface:
+            interface['admin_status'] = 'up'
+    return interfaces
+
+def _field_store(field):
+    """
+    Get the function storing a field's value on an interface.
+
+    Returns:
+        callable: Called as store(interface, value, state, match)
+    """
+    if field.startswith('x_'):
+        suffix = field[1:]
+
+        def store(interface, value, state, match):
+            interface['counters'][state + suffix] = int(value)
+    elif field in COUNTER_FIELDS:
+        def store(interface, value, state, match):
+            interface['counters'][field] = int(value)
+    elif field in INTEGER_FIELDS:
+        def store(interface, value, state, match):
+            interface[field] = int(value)
+    elif field in RATE_FIELDS:
+        def store(interface, value, state, match):
+            interface[field] = _bits_per_second(value)
+    elif field == 'ip_address':
+        def store(interface, value, state, match):
+            prefix_length = match.groupdict().get(f"{match.lastgroup}_prefix_length")
+            address = f"{value}/{prefix_length}" if prefix_length and '/' not in value else value
+            if address not in interface['ip_addresses']:
+                interface['ip_addresses'].append(address)
+    elif field == 'prefix_length':
+        def store(interface, value, state, match):
+            pass  # Part of the ip_address field
+    elif field == 'status':
+        def store(interface, value, state, match):
+            status = value.lower()
+            if status.startswith('admin'):
+                interface['admin_status'] = 'down'
+            interface['status'] = 'up' if status == 'up' else 'down'
+    elif field == 'admin_status':
+        def store(interface, value, state, match):
+            interface['admin_status'] = 'up' if value.lower() in ('up', 'enabled') else 'down'
+    elif field == 'duplex':
+        def store(interface, value, state, match):
+            interface['duplex'] = value.lower().replace('-duplex', '')
+    elif field == 'protocol':
+        def store(interface, value, state, match):
+            interface['protocol'] = value.lower()
+    else:
+        def store(interface, value, state, match):
+            interface[field] = value.strip()
+    return store
+
+def _bits_per_second(value):
+    """Convert a rate such as '25000', '2032 bps' or '1.23 kbps' to bits per second."""
+    number, _, unit = value.partition(' ')
+    if not unit:
+        digits = number.rstrip('kKmMgGbps')
+        number, unit = digits, number[len(digits):]
+    return int(float(number) * _RATE_UNITS.get(unit.lower(), 1))
@@ -5,8 +5,6 @@ This module handles adding, removing, and listing devices in the inventory.
 """
 import os
 import json
-import yaml
-from pathlib import Path
 
 class InventoryManager:
     """Manages network device inventory."""
@@ -15,9 +13,14 @@ class InventoryManager:
         """Initialize the inventory manager with file paths."""
         self.inventory_file = inventory_file
         self.ansible_inventory_file = ansible_inventory_file
-        self._ensure_files_exist()
+        
+        # Parsed inventory and lookup indexes, valid while the file is unchanged
+        self._signature = None
+        self._devices = []
+        self._by_hostname = {}
+        self._by_group = {}
     
-    def _ensure_files_exist(self):
+    def ensure_files_exist(self):
         """Ensure inventory files exist."""
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(self.inventory_file), exist_ok=True)
@@ -29,6 +32,7 @@ class InventoryManager:
         
         # Create Ansible inventory file if it doesn't exist
         if not os.path.exists(self.ansible_inventory_file):
+            import yaml
             with open(self.ansible_inventory_file, 'w') as f:
                 yaml.dump({'all': {'children': {}}}, f)
     
@@ -49,9 +53,10 @@ class InventoryManager:
             bool: True if successful, False otherwise
         """
         try:
-            # Load current inventory
-            with open(self.inventory_file, 'r') as f:
-                inventory = json.load(f)
+            self.ensure_files_exist()
+            
+            # Load current inventory (copied, the cached list is shared)
+            inventory = list(self._load_inventory())
             
             # Check if device already exists
             for device in inventory:
@@ -95,8 +100,7 @@ class InventoryManager:
         """
         try:
             # Load current inventory
-            with open(self.inventory_file, 'r') as f:
-                inventory = json.load(f)
+            inventory = self._load_inventory()
             
             # Find and remove the device
             device_found = False
@@ -112,6 +116,10 @@ class InventoryManager:
             # Update Ansible inventory file
             self._update_ansible_inventory()
             
+            # Stop exporting metrics of the device
+            from .metrics import forget_device
+            forget_device(hostname)
+            
             return True
         except Exception as e:
             print(f"Error removing device: {str(e)}")
@@ -128,13 +136,12 @@ class InventoryManager:
             list: List of device dictionaries
         """
         try:
-            with open(self.inventory_file, 'r') as f:
-                inventory = json.load(f)
+            self._load_inventory()
             
             if group:
-                inventory = [device for device in inventory if group in device.get('groups', [])]
+                return list(self._by_group.get(group, []))
             
-            return inventory
+            return list(self._devices)
         except Exception as e:
             print(f"Error listing devices: {str(e)}")
             return []
@@ -150,26 +157,79 @@ class InventoryManager:
             dict: Device information or None if not found
         """
         try:
-            with open(self.inventory_file, 'r') as f:
-                inventory = json.load(f)
+            self._load_inventory()
             
-            for device in inventory:
-                if device['hostname'] == hostname:
-                    return device
-            
-            return None
+            return self._by_hostname.get(hostname)
         except Exception as e:
             print(f"Error getting device: {str(e)}")
             return None
     
+    def list_hostnames(self):
+        """
+        List the hostnames in the inventory.
+        
+        Returns:
+            list: Sorted hostnames
+        """
+        self._load_inventory()
+        return sorted(self._by_hostname)
+    
+    def list_groups(self):
+        """
+        List the groups used in the inventory.
+        
+        Returns:
+            list: Sorted group names
+        """
+        self._load_inventory()
+        return sorted(self._by_group)
+    
+    def _load_inventory(self):
+        """
+        Load the JSON inventory.
+        
+        The parsed inventory and its hostname/group indexes are kept in memory
+        and only re-read when the inventory file changes on disk, so long-lived
+        processes (`netman serve`, `netman shell`) do not re-parse it for
+        every lookup.
+        
+        Returns:
+            list: List of device dictionaries, empty if no inventory exists yet
+        """
+        try:
+            stat = os.stat(self.inventory_file)
+        except FileNotFoundError:
+            self._signature = None
+            self._devices, self._by_hostname, self._by_group = [], {}, {}
+            return self._devices
+        
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            with open(self.inventory_file, 'r') as f:
+                devices = json.load(f)
+            
+            by_group = {}
+            for device in devices:
+                for group in device.get('groups', []):
+                    by_group.setdefault(group, []).append(device)
+            
+            self._devices = devices
+            self._by_hostname = {device['hostname']: device for device in devices}
+            self._by_group = by_group
+            self._signature = signature
+        
+        return self._devices
+    
     def _update_ansible_inventory(self):
         """
         Update the Ansible inventory file based on the JSON inventory.
         """
+        # PyYAML is only needed when the Ansible inventory is written
+        import yaml
+        
         try:
             # Load current inventory
-            with open(self.inventory_file, 'r') as f:
-                inventory = json.load(f)
+            inventory = self._load_inventory()
             
             # Create Ansible inventory structure
             ansible_inventory = {
@@ -0,0 +1,88 @@
+"""
+Job files module for the Network Device Management tool.
+
+Some inputs of an Ansible job can only be passed as files, such as a
+configuration to push. This module keeps them in a private directory per
+job, on a RAM-backed file system where the system has one, so concurrent
+jobs never share a file name and nothing is left behind once a job ends.
+"""
+import os
+import shutil
+import tempfile
+
+# RAM-backed file system for job files, if available
+SHM_DIR = '/dev/shm'
+
+def job_files_root():
+    """
+    Get the directory job directories are created in.
+
+    Returns:
+        str: SHM_DIR if usable, otherwise None for the system temp directory
+    """
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK | os.X_OK):
+        return SHM_DIR
+    return None
+
+class JobFiles:
+    """
+    Private directory for the files of one job.
+
+    The directory is only created once a file is written, is readable by the
+    current user alone, and is removed with everything in it by cleanup() or
+    when used as a context manager.
+    """
+
+    def __init__(self, prefix='netman-'):
+        """
+        Initialize the job files.
+
+        Args:
+            prefix (str): Prefix of the directory name
+        """
+        self.prefix = prefix
+        self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+
+    def directory(self):
+        """
+        Get the job directory, creating it on first use.
+
+        Returns:
+            str: Path of the directory
+        """
+        if self.path is None:
+            # mkdtemp creates the directory with mode 0700
+            self.path = tempfile.mkdtemp(prefix=self.prefix, dir=job_files_root())
+        return self.path
+
+    def write(self, name, content):
+        """
+        Write a file into the job directory.
+
+        Args:
+            name (str): File name, unique within the job
+            content (str or iterable): Text, or an iterable of text chunks
+                that is written chunk by chunk
+
+        Returns:
+            str: Path of the file
+        """
+        file_path = os.path.join(self.directory(), name)
+        with open(file_path, 'x') as f:
+            if isinstance(content, str):
+                f.write(content)
+            else:
+                f.writelines(content)
+        return file_path
+
+    def cleanup(self):
+        """Remove the job directory and its files."""
+        if self.path is not None:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None
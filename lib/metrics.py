@@ -0,0 +1,526 @@
+"""
+Metrics module for the Network Device Management tool.
+
+This module keeps NetMan's monitoring data as Prometheus metric families in
+memory and serves them over HTTP for Prometheus to scrape:
+
+    netman_device_up{hostname}                      1 if the last probe answered
+    netman_device_last_probe_timestamp_seconds{hostname}
+    netman_probe_duration_seconds{hostname}         histogram of probe round trips
+    netman_interface_up{hostname,interface}         1 if the interface is up
+    netman_interface_<counter>_total{hostname,interface}
+                                                    counters such as in_errors, as
+                                                    reported by the device
+    netman_backup_timestamp_seconds{hostname}       time of the latest backup
+    netman_ansible_job_duration_seconds{kind,name}  histogram of Ansible runs
+    netman_ansible_jobs_total{kind,name,result}
+
+Probes, interface polls, backups and Ansible runs update the families as
+they happen (see the record_* functions), and each family keeps the text of
+its series, re-rendering only series that changed. A scrape therefore
+neither contacts devices nor recomputes anything: it joins text that is
+already there. MetricsCollector refreshes the device metrics every
+monitoring.check_interval seconds while `netman monitor exporter` runs.
+"""
+import os
+import math
+import time
+import bisect
+import threading
+from .settings import get_setting
+
+# Default address and port of the HTTP endpoint
+METRICS_ADDRESS = '127.0.0.1'
+METRICS_PORT = 9470
+
+# Content types of the two exposition formats
+TEXT_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Histogram buckets in seconds: device probes and Ansible jobs
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+JOB_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+def _format_value(value):
+    """Format a sample value as the exposition formats expect."""
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+def _escape(value):
+    """Escape a label value."""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+class MetricFamily:
+    """Series of one metric, keyed by their label values."""
+
+    kind = 'untyped'
+    # Appended to the name of each sample, e.g. '_total' for counters
+    suffix = ''
+
+    def __init__(self, name, documentation, labels=()):
+        """
+        Initialize a metric family.
+
+        Args:
+            name (str): Metric name, without the sample suffix
+            documentation (str): HELP text
+            labels (tuple): Label names of the series
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        # Rendered samples per series, and the whole family per format
+        self._samples = {}
+        self._text = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        """Get the series key of a set of label values."""
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name} needs the labels {', '.join(self.labels)}")
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _changed(self, key):
+        """Forget the rendered text of a series that changed."""
+        self._samples.pop(key, None)
+        self._text.clear()
+
+    def value(self, **labels):
+        """
+        Get the value of a series.
+
+        Returns:
+            The series' value, or None if it does not exist
+        """
+        return self._values.get(self._key(labels))
+
+    def remove(self, **labels):
+        """
+        Remove the series matching the given labels.
+
+        Args:
+            **labels: Values of some of the labels, e.g. hostname='router1'
+
+        Returns:
+            int: Number of series removed
+        """
+        positions = [(self.labels.index(label), str(value)) for label, value in labels.items()
+                     if label in self.labels]
+        if len(positions) != len(labels):
+            return 0
+
+        with self._lock:
+            keys = [key for key in self._values
+                    if all(key[position] == value for position, value in positions)]
+            for key in keys:
+                del self._values[key]
+                self._changed(key)
+        return len(keys)
+
+    def render(self, openmetrics=False):
+        """
+        Render the family in an exposition format.
+
+        Args:
+            openmetrics (bool): OpenMetrics instead of the Prometheus text format
+
+        Returns:
+            str: HELP and TYPE lines followed by the samples
+        """
+        text = self._text.get(openmetrics)
+        if text is not None:
+            return text
+
+        with self._lock:
+            samples = []
+            for key in self._values:
+                sample = self._samples.get(key)
+                if sample is None:
+                    sample = self._samples[key] = self._render_series(key)
+                samples.append(sample)
+
+            # The Prometheus text format names counter families with the suffix
+            name = self.name if openmetrics else self.name + self.suffix
+            text = (f"# HELP {name} {self.documentation}\n"
+                    f"# TYPE {name} {self.kind}\n" + ''.join(samples))
+            self._text[openmetrics] = text
+        return text
+
+    def _label_text(self, key, extra=''):
+        """Render the labels of a series, with an optional extra label."""
+        pairs = [f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def _render_series(self, key):
+        """Render the samples of a series."""
+        return f"{self.name}{self.suffix}{self._label_text(key)} {_format_value(self._values[key])}\n"
+
+class Gauge(MetricFamily):
+    """Values that go up and down."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        """Set a series to a value."""
+        key = self._key(labels)
+        with self._lock:
+            if self._values.get(key) != value:
+                self._values[key] = value
+                self._changed(key)
+
+class Counter(MetricFamily):
+    """Values that only go up, apart from resets."""
+
+    kind = 'counter'
+    suffix = '_total'
+
+    def inc(self, amount=1, **labels):
+        """Increase a series."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+            self._changed(key)
+
+    def set(self, value, **labels):
+        """Set a series to a counter kept elsewhere, e.g. by a device."""
+        key = self._key(labels)
+        with self._lock:
+            if self._values.get(key) != value:
+                self._values[key] = value
+                self._changed(key)
+
+class Histogram(MetricFamily):
+    """Observations counted in buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        """
+        Initialize a histogram.
+
+        Args:
+            name (str): Metric name
+            documentation (str): HELP text
+            labels (tuple): Label names of the series
+            buckets (tuple): Upper bounds of the buckets, ascending
+        """
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """Count an observation."""
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Observations per bucket (the last one is +Inf), sum and count
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+            self._changed(key)
+
+    def _render_series(self, key):
+        """Render the cumulative buckets, sum and count of a series."""
+        counts, total, count = self._values[key]
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            labels = self._label_text(key, f'le="{_format_value(float(bound))}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}\n")
+        labels = self._label_text(key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}\n")
+        lines.append(f"{self.name}_count{labels} {count}\n")
+        return ''.join(lines)
+
+class Registry:
+    """The metric families served to Prometheus."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _family(self, family_class, name, documentation, labels, **options):
+        """Get a family, creating it on first use."""
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = family_class(name, documentation, labels, **options)
+            elif type(family) is not family_class or family.labels != tuple(labels):
+                raise ValueError(f"Metric {name} is already registered differently")
+        return family
+
+    def gauge(self, name, documentation, labels=()):
+        """Get or create a Gauge."""
+        return self._family(Gauge, name, documentation, labels)
+
+    def counter(self, name, documentation, labels=()):
+        """Get or create a Counter; name it without the _total suffix."""
+        return self._family(Counter, name, documentation, labels)
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        """Get or create a Histogram."""
+        return self._family(Histogram, name, documentation, labels, buckets=buckets)
+
+    def remove(self, **labels):
+        """
+        Remove the series matching the given labels from every family.
+
+        Families without all of the labels are left alone.
+
+        Returns:
+            int: Number of series removed
+        """
+        return sum(family.remove(**labels) for family in list(self._families.values()))
+
+    def render(self, openmetrics=False):
+        """
+        Render all families.
+
+        Args:
+            openmetrics (bool): OpenMetrics instead of the Prometheus text format
+
+        Returns:
+            str: The exposition
+        """
+        text = ''.join(family.render(openmetrics) for family in list(self._families.values()))
+        return text + '# EOF\n' if openmetrics else text
+
+# NetMan's metrics
+registry = Registry()
+
+DEVICE_UP = registry.gauge('netman_device_up', 'Whether the device answered its last probe.', ('hostname',))
+LAST_PROBE = registry.gauge('netman_device_last_probe_timestamp_seconds', 'Time of the last probe of the device.',
+                            ('hostname',))
+PROBE_DURATION = registry.histogram('netman_probe_duration_seconds', 'Round-trip time of device probes.',
+                                    ('hostname',), LATENCY_BUCKETS)
+INTERFACE_UP = registry.gauge('netman_interface_up', 'Whether the interface is operationally up.',
+                              ('hostname', 'interface'))
+BACKUP_TIMESTAMP = registry.gauge('netman_backup_timestamp_seconds', 'Time of the latest configuration backup.',
+                                  ('hostname',))
+JOB_DURATION = registry.histogram('netman_ansible_job_duration_seconds', 'Duration of Ansible runs.',
+                                  ('kind', 'name'), JOB_BUCKETS)
+JOBS = registry.counter('netman_ansible_jobs', 'Ansible runs by result.', ('kind', 'name', 'result'))
+
+# Interface counters as parsed by lib/interface_parser.py, one family each
+_INTERFACE_COUNTERS = {}
+
+# Interfaces of each device in its last recorded poll
+_polled_interfaces = {}
+
+def _interface_counter(counter):
+    """Get the family of an interface counter."""
+    family = _INTERFACE_COUNTERS.get(counter)
+    if family is None:
+        family = _INTERFACE_COUNTERS[counter] = registry.counter(
+            f'netman_interface_{counter}', f"Interface {counter.replace('_', ' ')} reported by the device.",
+            ('hostname', 'interface'))
+    return family
+
+def record_probe(hostname, up, seconds, timestamp=None):
+    """
+    Record the result of a device probe.
+
+    Args:
+        hostname (str): Hostname of the device
+        up (bool): Whether the device answered
+        seconds (float): Round-trip time
+        timestamp (float, optional): Time of the probe (default: now)
+    """
+    DEVICE_UP.set(1 if up else 0, hostname=hostname)
+    LAST_PROBE.set(timestamp or time.time(), hostname=hostname)
+    if up:
+        PROBE_DURATION.observe(seconds, hostname=hostname)
+
+def record_interfaces(hostname, interfaces):
+    """
+    Record a poll of a device's interfaces.
+
+    Interfaces the device no longer reports are removed.
+
+    Args:
+        hostname (str): Hostname of the device
+        interfaces (dict): Interface name mapped to its fields, as returned
+            by interface_parser.parse_interfaces
+    """
+    for name in _polled_interfaces.get(hostname, set()).difference(interfaces):
+        INTERFACE_UP.remove(hostname=hostname, interface=name)
+        for family in _INTERFACE_COUNTERS.values():
+            family.remove(hostname=hostname, interface=name)
+    _polled_interfaces[hostname] = set(interfaces)
+
+    # Series whose value did not change keep their rendered text
+    for name, interface in interfaces.items():
+        if 'status' in interface:
+            INTERFACE_UP.set(1 if interface['status'] == 'up' else 0, hostname=hostname, interface=name)
+        for counter, value in interface.get('counters', {}).items():
+            _interface_counter(counter).set(value, hostname=hostname, interface=name)
+
+def record_backup(hostname, timestamp=None):
+    """
+    Record a configuration backup.
+
+    Args:
+        hostname (str): Hostname of the device
+        timestamp (float, optional): Time of the backup (default: now)
+    """
+    BACKUP_TIMESTAMP.set(timestamp or time.time(), hostname=hostname)
+
+def record_job(kind, name, seconds, success):
+    """
+    Record an Ansible run.
+
+    Args:
+        kind (str): 'playbook' or 'module'
+        name (str): Playbook name without extension, or module name
+        seconds (float): Duration of the run
+        success (bool): Whether the run succeeded
+    """
+    JOB_DURATION.observe(seconds, kind=kind, name=name)
+    JOBS.inc(kind=kind, name=name, result='success' if success else 'failure')
+
+def forget_device(hostname):
+    """
+    Remove all series of a device, e.g. one removed from the inventory.
+
+    Args:
+        hostname (str): Hostname of the device
+    """
+    registry.remove(hostname=hostname)
+    _polled_interfaces.pop(hostname, None)
+
+def serve_metrics(address=None, port=None, metrics_registry=None):
+    """
+    Serve the metrics over HTTP from a background thread.
+
+    GET /metrics returns the Prometheus text format, or OpenMetrics when the
+    scraper asks for it in its Accept header.
+
+    Args:
+        address (str, optional): Address to listen on (default: metrics.address)
+        port (int, optional): Port to listen on (default: metrics.port)
+        metrics_registry (Registry, optional): Metrics to serve (default: registry)
+
+    Returns:
+        ThreadingHTTPServer: The running server; call shutdown() to stop it
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    address = address or get_setting('metrics', 'address', METRICS_ADDRESS)
+    port = port or get_setting('metrics', 'port', METRICS_PORT)
+    metrics_registry = metrics_registry or registry
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+
+            openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+            body = metrics_registry.render(openmetrics).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE if openmetrics else TEXT_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes every few seconds would flood the console
+            pass
+
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+class MetricsCollector:
+    """Refreshes the device metrics of a set of devices periodically."""
+
+    def __init__(self, devices, config_dir='configs', poll_interfaces=None, probe_workers=None):
+        """
+        Initialize the collector.
+
+        Args:
+            devices (list): Device information dicts
+            config_dir (str): Directory of configuration backups
+            poll_interfaces (bool, optional): Also collect interface status
+                and counters (default: metrics.poll_interfaces)
+            probe_workers (int, optional): Devices probed at the same time
+                (default: metrics.probe_workers)
+        """
+        self.devices = devices
+        self.config_dir = config_dir
+        self.poll_interfaces = (get_setting('metrics', 'poll_interfaces', True)
+                                if poll_interfaces is None else poll_interfaces)
+        self.probe_workers = probe_workers or get_setting('metrics', 'probe_workers', 32)
+
+    def collect(self):
+        """
+        Probe all devices, poll their interfaces and read their backup times.
+
+        Probes and interface polls record their metrics themselves, and
+        the notifications the probes raised are sent right away.
+
+        Returns:
+            dict: 'up' and 'down' device counts, and 'seconds' taken
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from .alerting import flush_alerts
+        from .config_manager import latest_config_file
+        from .monitoring import Monitor
+
+        start_time = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.probe_workers, len(self.devices)))) as pool:
+            statuses = list(pool.map(lambda device: Monitor.check_device_status(device)[0], self.devices))
+
+        flush_alerts()
+
+        if self.poll_interfaces:
+            Monitor.collect_interfaces(self.devices)
+
+        for device in self.devices:
+            try:
+                record_backup(device['hostname'],
+                              os.path.getmtime(latest_config_file(self.config_dir, device['hostname'])))
+            except OSError:
+                pass
+
+        up = sum(1 for status in statuses if status)
+        return {
+            'up': up,
+            'down': len(statuses) - up,
+            'seconds': time.monotonic() - start_time
+        }
+
+    def run(self, interval=None, stop_event=None, on_collect=None):
+        """
+        Collect until stopped.
+
+        Args:
+            interval (int, optional): Seconds between collections (default:
+                monitoring.check_interval)
+            stop_event (threading.Event, optional): Set to stop collecting
+            on_collect (callable, optional): Called with the result of each
+                collection
+        """
+        interval = interval or get_setting('monitoring', 'check_interval', 300)
+        stop_event = stop_event or threading.Event()
+
+        while not stop_event.is_set():
+            try:
+                result = self.collect()
+                if on_collect:
+                    on_collect(result)
+            except Exception as e:
+                print(f"Error collecting metrics: {str(e)}")
+            stop_event.wait(interval)
@@ -7,7 +7,12 @@ import time
 import subprocess
 import os
 import platform
-from .ansible_runner import AnsibleRunner
+import threading
+from .alerting import observe_probe
+from .ansible_runner import AnsibleRunner, is_long_lived
+from .fact_cache import FACT_SUBSETS, FactCache
+from .interface_parser import interface_command, parse_outputs, vendor_for
+from .metrics import record_interfaces, record_probe
 
 # Import the simulator for demo mode
 try:
@@ -18,11 +23,33 @@ except ImportError:
 # Check if we're in demo mode
 DEMO_MODE = os.environ.get('NETMAN_DEMO_MODE', 'false').lower() in ('true', '1', 'yes')
 
+# Ansible command module and platform per vendor of interface_parser
+COMMAND_MODULES = {
+    'ios': ('ios_command', 'cisco.ios.ios'),
+    'eos': ('eos_command', 'arista.eos.eos'),
+    'junos': ('junos_command', 'junipernetworks.junos.junos'),
+    'nxos': ('nxos_command', 'cisco.nxos.nxos'),
+    'panos': ('panos_op', 'panos')
+}
+
 class Monitor:
     """Monitors network devices."""
     
-    # Initialize simulator if in demo mode
-    _simulator = DeviceSimulator() if DEMO_MODE and DeviceSimulator else None
+    # Simulator used in demo mode, created on first use
+    _simulator = None
+    
+    # Hosts whose facts are being refreshed in the background, and why the
+    # last background refresh of a host failed
+    _refreshing = set()
+    _refresh_errors = {}
+    _refreshing_lock = threading.Lock()
+    
+    @classmethod
+    def _get_simulator(cls):
+        """Get or initialize the simulator."""
+        if DEMO_MODE and DeviceSimulator and cls._simulator is None:
+            cls._simulator = DeviceSimulator()
+        return cls._simulator
     
     @classmethod
     def check_device_status(cls, device_info):
@@ -36,9 +63,23 @@ class Monitor:
             tuple: (status_bool, response_time_ms)
         """
         # Use simulator in demo mode
-        if DEMO_MODE and cls._simulator:
-            return cls._simulator.simulate_connection(device_info)
-            
+        if DEMO_MODE and cls._get_simulator():
+            status, response_time = cls._simulator.simulate_connection(device_info)
+        else:
+            status, response_time = cls._ping(device_info)
+        
+        record_probe(device_info['hostname'], status, response_time / 1000)
+        observe_probe(device_info['hostname'], status)
+        return status, response_time
+    
+    @classmethod
+    def _ping(cls, device_info):
+        """
+        Ping a device once.
+        
+        Returns:
+            tuple: (status_bool, response_time_ms)
+        """
         try:
             ip = device_info['ip']
             
@@ -62,18 +103,27 @@ class Monitor:
             return False, 0
     
     @classmethod
-    def get_device_facts(cls, device_info):
+    def get_device_facts(cls, device_info, max_age=None, refresh=False):
         """
         Get facts about a network device using Ansible.
         
+        Facts come from the fact cache while they are fresh. Subsets that
+        were never gathered, or are older than max_age, are gathered before
+        returning. Subsets only past their TTL are returned from the cache
+        and refreshed in the background in `netman serve` and `netman shell`;
+        one-off commands gather them before returning. A failed background
+        refresh is reported as 'refresh_error' with the host's next facts.
+        
         Args:
             device_info (dict): Device information
+            max_age (int, optional): Seconds cached facts may be old
+            refresh (bool): Gather all facts, ignoring the cache
             
         Returns:
             dict: Device facts or None if failed
         """
         # Use simulator in demo mode
-        if DEMO_MODE and cls._simulator:
+        if DEMO_MODE and cls._get_simulator():
             # Simulate device facts using show version output
             device_type = device_info.get('device_type', 'cisco_ios')
             version_output = cls._simulator.get_response(device_type, 'show version')
@@ -125,20 +175,31 @@ class Monitor:
             }
         
         try:
-            ansible_runner = AnsibleRunner()
-            
-            # Run Ansible playbook to gather facts
-            extra_vars = {
-                'target_host': device_info['hostname']
-            }
+            cache = FactCache()
+            entry = cache.load(device_info['hostname'])
+            stale = list(FACT_SUBSETS) if refresh else cache.stale_subsets(entry, max_age)
             
-            result = ansible_runner.run_playbook('playbooks/get_device_status.yml', extra_vars)
+            if stale and (refresh or max_age is not None or
+                          any(subset not in entry['gathered'] for subset in stale)):
+                # One run gathers every stale subset, not only the missing ones
+                entry = cls._gather_facts(device_info, stale, cache)
+            elif stale and is_long_lived():
+                cls._refresh_in_background(device_info, stale)
+            elif stale:
+                # Only past their TTL; a one-off command ends before a
+                # background refresh would, so the cached facts serve if it fails
+                entry = cls._gather_facts(device_info, stale, cache) or entry
             
-            if result and result.get('success', False) and 'facts' in result:
-                return result['facts']
+            if entry:
+                facts = summarize_device_facts(device_info['hostname'], entry)
+                with cls._refreshing_lock:
+                    error = cls._refresh_errors.pop(device_info['hostname'], None)
+                if error:
+                    facts['refresh_error'] = error
+                return facts
             
             # If we get here, the actual facts gathering failed, so use the simulator as fallback
-            if DEMO_MODE and cls._simulator:
+            if DEMO_MODE and cls._get_simulator():
                 print(f"Using simulator for device facts as a fallback")
                 return cls.get_device_facts(device_info)
             
@@ -147,12 +208,81 @@ class Monitor:
             print(f"Error getting device facts: {str(e)}")
             
             # If there's an error, use the simulator as fallback in demo mode
-            if DEMO_MODE and cls._simulator:
+            if DEMO_MODE and cls._get_simulator():
                 print(f"Using simulator for device facts due to error: {str(e)}")
                 return cls.get_device_facts(device_info)
                 
             return None
     
+    @classmethod
+    def _gather_facts(cls, device_info, subsets, cache):
+        """
+        Gather fact subsets from a device into the fact cache.
+        
+        Args:
+            device_info (dict): Device information
+            subsets (list): Fact subsets to gather
+            cache (FactCache): Fact cache to update
+            
+        Returns:
+            dict: Updated cache entry, or None if gathering failed
+        """
+        ansible_runner = AnsibleRunner()
+        
+        # Run Ansible playbook to gather facts
+        extra_vars = {
+            'target_host': device_info['hostname'],
+            'netman_fact_subsets': list(subsets)
+        }
+        
+        result = ansible_runner.run_playbook('playbooks/get_device_status.yml', extra_vars)
+        if not (result and result.get('success', False) and result.get('ansible_result')):
+            return None
+        
+        cache.store(device_info['hostname'], subsets, result['ansible_result'])
+        entry = cache.load(device_info['hostname'])
+        if not entry['facts']:
+            # Ansible did not cache any facts, e.g. for an unsupported OS
+            entry['facts'] = result['ansible_result'].get('facts') or {}
+        return entry
+    
+    @classmethod
+    def _refresh_in_background(cls, device_info, subsets):
+        """
+        Gather fact subsets from a device in a background thread.
+        
+        At most one refresh per device runs at a time. Only used in
+        long-lived processes; the thread is a daemon, so it does not hold up
+        their exit. Errors are kept for the device's next facts rather than
+        printed, since the command that started the refresh has returned.
+        
+        Args:
+            device_info (dict): Device information
+            subsets (list): Fact subsets to gather
+        """
+        hostname = device_info['hostname']
+        with cls._refreshing_lock:
+            if hostname in cls._refreshing:
+                return
+            cls._refreshing.add(hostname)
+        
+        def refresh():
+            error = None
+            try:
+                if cls._gather_facts(device_info, subsets, FactCache()) is None:
+                    error = "Gathering the facts failed"
+            except Exception as e:
+                error = str(e)
+            finally:
+                with cls._refreshing_lock:
+                    cls._refreshing.discard(hostname)
+                    if error:
+                        cls._refresh_errors[hostname] = f"Background refresh failed: {error}"
+                    else:
+                        cls._refresh_errors.pop(hostname, None)
+        
+        threading.Thread(target=refresh, name=f"facts-{hostname}", daemon=True).start()
+    
     @classmethod
     def monitor_interfaces(cls, device_info):
         """
@@ -164,75 +294,115 @@ class Monitor:
         Returns:
             dict: Interface status information or None if failed
         """
-        # Use simulator in demo mode
-        if DEMO_MODE and cls._simulator:
-            device_type = device_info.get('device_type', 'cisco_ios')
-            interfaces_output = cls._simulator.get_response(device_type, 'show interfaces')
-            
-            return {
-                'raw_output': interfaces_output,
-                'parsed': parse_interface_output(interfaces_output, device_type)
-            }
+        return cls.collect_interfaces([device_info]).get(device_info['hostname'])
+    
+    @classmethod
+    def collect_interfaces(cls, devices, forks=None, workers=None):
+        """
+        Collect the interface status of many devices in one Ansible run.
+        
+        Every device runs its vendor's interface command (see
+        interface_parser.INTERFACE_COMMANDS) with the matching command module
+        from COMMAND_MODULES, and the outputs are parsed in parallel.
+        
+        Args:
+            devices (list): Device information dicts
+            forks (int, optional): Number of devices Ansible polls in parallel
+            workers (int, optional): Most processes parsing the outputs
             
+        Returns:
+            dict: Hostname mapped to {'raw_output', 'parsed'}, or to None for
+                devices that could not be polled
+        """
+        results = {device['hostname']: None for device in devices}
+        if not devices:
+            return results
+        
         try:
             ansible_runner = AnsibleRunner()
-            
-            # Run Ansible module directly to get interface info
-            module = f"{device_info['device_type']}_command"
-            args = {'commands': ['show interfaces']}
-            
-            result = ansible_runner.run_module(
-                device_info['hostname'],
-                module,
-                args
+            result = ansible_runner.run_playbook(
+                'playbooks/get_interfaces.yml',
+                {'netman_interface_commands': {device['hostname']: interface_job(device['device_type'])
+                                               for device in devices}},
+                limit=list(results),
+                forks=forks,
+                strategy='free'
             )
             
-            if result.get('success', False) and 'stdout' in result:
-                # Basic parsing of interface output could be added here
-                return {
-                    'raw_output': result['stdout'],
-                    'parsed': parse_interface_output(result['stdout'], device_info['device_type'])
+            host_results = result.get('hosts', {})
+            collected = []
+            for device in devices:
+                host_result = host_results.get(device['hostname'], {})
+                ansible_result = host_result.get('ansible_result')
+                if host_result.get('success', False) and ansible_result:
+                    collected.append((device['hostname'], ansible_result.get('output') or '', device['device_type']))
+            
+            parsed = parse_outputs([(output, device_type) for _, output, device_type in collected], workers)
+            for (hostname, output, _), interfaces in zip(collected, parsed):
+                record_interfaces(hostname, interfaces)
+                results[hostname] = {
+                    'raw_output': output,
+                    'parsed': interfaces
                 }
-            return None
+            return results
         except Exception as e:
             print(f"Error monitoring interfaces: {str(e)}")
-            return None
+            return results
 
-def parse_interface_output(output, device_type):
+def interface_job(device_type):
     """
-    Parse interface output based on device type.
-    This is a simplified example, actual implementation would be more complex.
+    Describe how get_interfaces.yml collects a device's interface status.
     
     Args:
-        output (str): Command output
-        device_type (str): Type of device
+        device_type (str): Device type from the inventory
         
     Returns:
-        dict: Parsed interface information
+        dict: Ansible command module, Ansible network OS, interface command
+            and the device type itself
     """
-    # This is a very simplified example
-    # In a real implementation, you would use TextFSM or similar for parsing
-    interfaces = {}
-    
-    if 'cisco_ios' in device_type:
-        # Very basic parsing for demonstration
-        lines = output.split('\n')
-        current_interface = None
-        
-        for line in lines:
-            if line.strip() == '':
-                continue
-                
-            # Check if this is an interface definition line
-            if not line.startswith(' '):
-                parts = line.split(' ')
-                current_interface = parts[0]
-                interfaces[current_interface] = {
-                    'status': 'up' if 'up' in line.lower() else 'down',
-                    'description': '',
-                    'details': {}
-                }
-            elif current_interface and 'Description:' in line:
-                interfaces[current_interface]['description'] = line.split('Description:')[1].strip()
+    module, network_os = COMMAND_MODULES[vendor_for(device_type)]
+    return {
+        'module': module,
+        'network_os': network_os,
+        'command': interface_command(device_type),
+        'device_type': device_type
+    }
+
+def summarize_device_facts(hostname, ansible_result):
+    """
+    Turn the ansible_result of get_device_status.yml into a facts summary.
+    
+    Args:
+        hostname (str): Hostname of the device
+        ansible_result (dict): The playbook's ansible_result fact or a fact
+            cache entry, holding the device's ansible_net_* facts and the
+            status command outputs
+            
+    Returns:
+        dict: Device facts keyed like the simulated facts
+    """
+    net_facts = ansible_result.get('facts') or {}
+    status = ansible_result.get('status') or []
+    
+    # 'show version | include uptime' is the first status command
+    uptime = 'Unknown'
+    if status and 'uptime is' in status[0]:
+        uptime = status[0].split('uptime is', 1)[1].split('\n')[0].strip()
+    
+    facts = {
+        'hostname': net_facts.get('ansible_net_hostname', hostname),
+        'version': net_facts.get('ansible_net_version', 'Unknown'),
+        'uptime': uptime,
+        'serial': net_facts.get('ansible_net_serialnum', 'Unknown'),
+        'model': net_facts.get('ansible_net_model', 'Unknown'),
+        'interfaces': sorted(net_facts.get('ansible_net_interfaces') or {}),
+        'os_type': net_facts.get('ansible_net_system', 'Unknown')
+    }
+    
+    if 'ansible_net_memtotal_mb' in net_facts:
+        facts['memory'] = {
+            'total': f"{net_facts['ansible_net_memtotal_mb']}MB",
+            'free': f"{net_facts.get('ansible_net_memfree_mb', 0)}MB"
+        }
     
-    return interfaces
+    return facts
@@ -0,0 +1,231 @@
+"""
+Rollout module for the Network Device Management tool.
+
+This module pushes a template to many devices in waves: a canary batch
+first, then batches of a percentage of the devices. Every wave is a single
+Ansible run; its devices are then backed up and committed to Git together,
+and the rollout halts as soon as too many devices have failed.
+"""
+import os
+import math
+import time
+from .config_manager import config_file_name, latest_config_file
+from .config_diff import config_delta, supports_delta
+from .config_parser import parse_file
+from .template_manager import map_renders
+from .settings import get_setting
+
+def plan_waves(hostnames, canary=1, wave_percent=25):
+    """
+    Split devices into rollout waves.
+
+    Args:
+        hostnames (list): Hostnames of the devices, in rollout order
+        canary (int): Devices in the first wave, 0 for no canary wave
+        wave_percent (int): Size of the other waves, in percent of all devices
+
+    Returns:
+        list: Waves, each a list of hostnames
+    """
+    hostnames = list(hostnames)
+    waves = [hostnames[:canary]] if canary else []
+
+    remaining = hostnames[canary:]
+    wave_size = max(1, math.ceil(len(hostnames) * wave_percent / 100))
+    waves.extend(remaining[start:start + wave_size] for start in range(0, len(remaining), wave_size))
+
+    return [wave for wave in waves if wave]
+
+def render_configs(template_manager, template_name, devices, config_dir, vars_file=None, workers=None,
+                   backup_dir=None):
+    """
+    Render a template for many devices into a directory.
+
+    Each device's variables are layered like for a single push (see
+    VarsLoader.load_layered) and its configuration is written to
+    config_dir/<config_file_name>. Large batches are rendered by several
+    worker processes.
+
+    With backup_dir, devices that support delta pushes and have a backup
+    there only get the lines their latest backup lacks (see
+    ConfigManager.config_delta); those lacking nothing get no file.
+
+    Args:
+        template_manager (TemplateManager): Template manager to render with
+        template_name (str): Name of the template
+        devices (list): Device dictionaries from the inventory
+        config_dir (str): Directory to write the configurations to
+        vars_file (str, optional): Variables file applied on top of the
+            group_vars and host_vars of every device
+        workers (int, optional): Render processes (default: rollout.render_workers,
+            or one per CPU)
+        backup_dir (str, optional): Configuration directory to compute
+            deltas against
+
+    Returns:
+        dict: 'errors' (error message per hostname that failed to render),
+            'delta' (hostnames given a delta) and 'unchanged' (hostnames
+            needing no change)
+    """
+    tasks = [(device['hostname'], device.get('groups'), device.get('device_type'), template_name,
+              vars_file, config_dir, backup_dir)
+             for device in devices]
+    workers = workers or get_setting('rollout', 'render_workers', 0)
+    results = map_renders(template_manager, _render_device, tasks, workers)
+
+    return {
+        'errors': {hostname: outcome for hostname, outcome in results
+                   if outcome not in ('full', 'delta', 'unchanged')},
+        'delta': [hostname for hostname, outcome in results if outcome == 'delta'],
+        'unchanged': [hostname for hostname, outcome in results if outcome == 'unchanged']
+    }
+
+def _render_device(template_manager, task):
+    """
+    Render one device's configuration.
+
+    Returns:
+        tuple: (hostname, 'full', 'delta', 'unchanged' or an error message)
+    """
+    hostname, groups, device_type, template_name, vars_file, config_dir, backup_dir = task
+    try:
+        variables = template_manager.vars_loader.load_layered(hostname, groups, vars_file)
+        template = template_manager.env.get_template(f"{template_name}.j2")
+        config_file = os.path.join(config_dir, config_file_name(hostname))
+
+        backup_file = latest_config_file(backup_dir, hostname) if backup_dir else None
+        if backup_file and supports_delta(device_type) and os.path.exists(backup_file):
+            delta = config_delta(template.render(**variables), parse_file(backup_file, device_type))
+            if not delta:
+                return hostname, 'unchanged'
+            with open(config_file, 'x') as f:
+                f.write(delta)
+            return hostname, 'delta'
+
+        with open(config_file, 'x') as f:
+            f.writelines(template.generate(**variables))
+        return hostname, 'full'
+    except Exception as e:
+        return hostname, str(e)
+
+class Rollout:
+    """Pushes configurations to many devices in waves."""
+
+    def __init__(self, config_manager, git_manager, canary=None, wave_percent=None,
+                 max_failure_rate=None, forks=None, gather_facts=True):
+        """
+        Initialize the rollout.
+
+        Args:
+            config_manager (ConfigManager): Pushes and backs up configurations
+            git_manager (GitManager): Commits the backups of every wave
+            canary (int, optional): Devices in the first wave (default:
+                rollout.canary setting)
+            wave_percent (int, optional): Size of the other waves in percent
+                of all devices (default: rollout.wave_percent)
+            max_failure_rate (float, optional): Percentage of failed devices
+                that halts the rollout (default: rollout.max_failure_rate)
+            forks (int, optional): Devices configured in parallel within a wave
+            gather_facts (bool): Gather device facts before and after pushing
+        """
+        self.config_manager = config_manager
+        self.git_manager = git_manager
+        self.canary = get_setting('rollout', 'canary', 1) if canary is None else canary
+        self.wave_percent = wave_percent or get_setting('rollout', 'wave_percent', 25)
+        self.max_failure_rate = (get_setting('rollout', 'max_failure_rate', 10)
+                                 if max_failure_rate is None else max_failure_rate)
+        self.forks = forks
+        self.gather_facts = gather_facts
+
+    def plan(self, hostnames):
+        """
+        Split devices into the waves this rollout would push them in.
+
+        Args:
+            hostnames (list): Hostnames of the devices
+
+        Returns:
+            list: Waves, each a list of hostnames
+        """
+        return plan_waves(hostnames, self.canary, self.wave_percent)
+
+    def run(self, config_dir, hostnames, description, on_event=None, on_wave=None, delta_hosts=None):
+        """
+        Push configurations wave by wave.
+
+        A failure in the canary wave halts the rollout, as does the share of
+        failed devices so far exceeding max_failure_rate after any wave. The
+        devices configured in a wave are backed up and committed to Git
+        before the next wave starts.
+
+        Args:
+            config_dir (str): Directory holding each device's configuration
+            hostnames (list): Hostnames of the devices, in rollout order
+            description (str): What is rolled out, for the commit messages
+            on_event (callable, optional): Called with each Ansible event
+            on_wave (callable, optional): Called with each wave's report
+            delta_hosts (list, optional): Devices whose file only holds the
+                lines they lack (see render_configs)
+
+        Returns:
+            dict: 'waves' (a report per wave pushed, see _run_wave), 'halted'
+                (reason the rollout stopped early, or None) and 'skipped'
+                (hostnames never pushed to)
+        """
+        waves = self.plan(hostnames)
+        reports = []
+        halted = None
+        pushed = failed = 0
+
+        for number, wave in enumerate(waves, 1):
+            canary = number == 1 and self.canary > 0
+            report = self._run_wave(number, wave, canary, config_dir, description, on_event, delta_hosts)
+            reports.append(report)
+            if on_wave:
+                on_wave(report)
+
+            pushed += len(wave)
+            failed += len(report['failed'])
+            if canary and report['failed']:
+                halted = "Canary wave failed"
+            elif failed * 100 / pushed > self.max_failure_rate:
+                halted = (f"{failed} of {pushed} devices failed, more than "
+                          f"{self.max_failure_rate:g}%")
+            if halted:
+                break
+
+        skipped = [hostname for wave in waves[len(reports):] for hostname in wave]
+        return {'waves': reports, 'halted': halted, 'skipped': skipped}
+
+    def _run_wave(self, number, hostnames, canary, config_dir, description, on_event, delta_hosts):
+        """
+        Push one wave, then back up and commit its configured devices.
+
+        Returns:
+            dict: 'wave', 'canary', 'hosts', 'applied' and 'failed' hostnames,
+                'committed', and 'push_seconds' and 'backup_seconds' timings
+        """
+        start = time.perf_counter()
+        results = self.config_manager.push_configs(config_dir, hostnames, forks=self.forks, on_event=on_event,
+                                                   delta_hosts=delta_hosts, gather_facts=self.gather_facts)
+        applied = [hostname for hostname in hostnames if results[hostname]]
+        pushed = time.perf_counter()
+
+        committed = False
+        if applied:
+            backups = self.config_manager.backup_configs(applied, forks=self.forks)
+            backed_up = [hostname for hostname in applied if backups.get(hostname)]
+            if backed_up:
+                committed = self.git_manager.commit_changes(
+                    f"{description}, wave {number}: {len(backed_up)} devices")
+
+        return {
+            'wave': number,
+            'canary': canary,
+            'hosts': hostnames,
+            'applied': applied,
+            'failed': [hostname for hostname in hostnames if not results[hostname]],
+            'committed': committed,
+            'push_seconds': pushed - start,
+            'backup_seconds': time.perf_counter() - pushed
+        }
@@ -0,0 +1,151 @@
+"""
+Server module for the Network Device Management tool.
+
+This module runs NetMan as a long-lived process behind a local Unix socket so
+that repeated commands reuse already imported libraries and warm managers,
+and provides the thin client used to forward commands to it.
+
+The protocol is one JSON request line per connection,
+``{"argv": [...], "width": 80, "color": false, "cwd": "/home/user"}``,
+answered by one JSON response line, ``{"exit_code": 0, "output": "..."}``.
+
+Commands run in the server's directory and environment: the inventory,
+templates, backups and settings are those of the server's workspace. Only
+relative file paths given on the command line (such as --vars and --output)
+are resolved against the client's directory. Environment variables of the
+client, including NETMAN_DEMO_MODE and ANSIBLE_*, are ignored.
+"""
+import os
+import json
+import socket
+import socketserver
+
+# Default location of the server socket
+DEFAULT_SOCKET = os.path.join('data', 'netman.sock')
+
+# Seconds a client waits for the server to accept a connection
+CONNECT_TIMEOUT = 1.0
+
+class NetManServer:
+    """Serves NetMan commands over a local Unix socket."""
+
+    def __init__(self, run_command, socket_path=DEFAULT_SOCKET):
+        """
+        Initialize the server.
+
+        Args:
+            run_command (callable): Called as run_command(argv, width, color, cwd)
+                for each request, returning a (exit_code, output) tuple;
+                cwd is the client's directory, or None if it did not send one
+            socket_path (str): Path of the Unix socket to listen on
+        """
+        self.run_command = run_command
+        self.socket_path = socket_path
+        self.requests_served = 0
+
+    def serve_forever(self):
+        """
+        Listen for commands until interrupted.
+
+        Requests are handled one at a time, in the order they arrive.
+
+        Raises:
+            RuntimeError: If another server is already listening on the socket
+        """
+        if os.path.exists(self.socket_path):
+            if is_server_running(self.socket_path):
+                raise RuntimeError(f"A NetMan server is already listening on {self.socket_path}")
+            # Left behind by a server that did not shut down cleanly
+            os.remove(self.socket_path)
+
+        server = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            """Runs one forwarded command."""
+
+            def handle(self):
+                """Read a request, run it and write the response."""
+                line = self.rfile.readline()
+                if not line:
+                    # A liveness probe from is_server_running
+                    return
+
+                try:
+                    request = json.loads(line)
+                    exit_code, output = server.run_command(
+                        request['argv'],
+                        request.get('width', 80),
+                        request.get('color', False),
+                        request.get('cwd')
+                    )
+                except Exception as e:
+                    exit_code, output = 1, f"Error: {str(e)}\n"
+
+                server.requests_served += 1
+                response = json.dumps({'exit_code': exit_code, 'output': output})
+                self.wfile.write(response.encode('utf-8') + b'\n')
+
+        with socketserver.UnixStreamServer(self.socket_path, RequestHandler) as unix_server:
+            os.chmod(self.socket_path, 0o600)
+            try:
+                unix_server.serve_forever()
+            finally:
+                if os.path.exists(self.socket_path):
+                    os.remove(self.socket_path)
+
+def forward_command(socket_path, argv, width=80, color=False, cwd=None):
+    """
+    Run a command on a NetMan server.
+
+    Args:
+        socket_path (str): Path of the server's Unix socket
+        argv (list): Command line arguments, without the program name
+        width (int): Terminal width to render output for
+        color (bool): Whether the output may contain terminal colors
+        cwd (str, optional): Directory relative paths in argv are resolved
+            against (default: the current directory)
+
+    Returns:
+        tuple: (exit_code, output), or None if no server is reachable
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(CONNECT_TIMEOUT)
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+
+    with client:
+        # Commands may legitimately run for a long time once accepted
+        client.settimeout(None)
+        request = json.dumps({'argv': argv, 'width': width, 'color': color, 'cwd': cwd or os.getcwd()})
+        client.sendall(request.encode('utf-8') + b'\n')
+
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    response = json.loads(b''.join(chunks))
+    return response['exit_code'], response['output']
+
+def is_server_running(socket_path=DEFAULT_SOCKET):
+    """
+    Check whether a server is accepting connections on a socket.
+
+    Args:
+        socket_path (str): Path of the server's Unix socket
+
+    Returns:
+        bool: True if a server is listening
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(CONNECT_TIMEOUT)
+            client.connect(socket_path)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,62 @@
+"""
+Settings module for the Network Device Management tool.
+
+This module reads the global settings in config/settings.yml. The parsed file
+is kept in memory and only re-read when it changes on disk.
+"""
+import os
+
+# Location of the global settings file
+SETTINGS_FILE = os.path.join('config', 'settings.yml')
+
+# Parsed settings per file, with the (mtime, size) signature they were read at
+_cache = {}
+
+def load_settings(settings_file=SETTINGS_FILE):
+    """
+    Load the global settings.
+
+    Args:
+        settings_file (str): Path to the settings file
+
+    Returns:
+        dict: Settings by section, empty if the file is missing or invalid
+    """
+    try:
+        stat = os.stat(settings_file)
+    except FileNotFoundError:
+        return {}
+
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _cache.get(settings_file)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    # PyYAML is only needed once settings are actually read
+    import yaml
+
+    try:
+        with open(settings_file, 'r') as f:
+            settings = yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"Error loading settings: {str(e)}")
+        settings = {}
+
+    _cache[settings_file] = (signature, settings)
+    return settings
+
+def get_setting(section, key, default=None, settings_file=SETTINGS_FILE):
+    """
+    Get a single setting.
+
+    Args:
+        section (str): Settings section, e.g. 'ansible'
+        key (str): Setting name within the section
+        default: Value to use if the setting is not configured
+        settings_file (str): Path to the settings file
+
+    Returns:
+        The configured value, or default
+    """
+    value = (load_settings(settings_file).get(section) or {}).get(key)
+    return default if value is None else value
@@ -0,0 +1,138 @@
+"""
+Interactive shell module for the Network Device Management tool.
+
+This module provides a REPL over the NetMan command tree. Commands run in the
+same process, so the inventory indexes, compiled templates, Git repository
+handle and simulator responses loaded by one command are reused by the next.
+"""
+import os
+import cmd
+import shlex
+import click
+
+# Commands that make no sense inside the shell
+NESTED_COMMANDS = ('shell', 'serve')
+
+# Options completed with inventory groups or template names
+GROUP_OPTIONS = ('--group', '--groups')
+TEMPLATE_OPTIONS = ('--template',)
+
+class NetManShell(cmd.Cmd):
+    """Interactive NetMan shell with inventory-aware tab completion."""
+
+    intro = "NetMan interactive shell. Type 'help' for commands, 'exit' to quit."
+    prompt = "netman> "
+
+    def __init__(self, cli_group, run_command, inventory_manager, template_manager,
+                 history_file=os.path.join('data', '.netman_history')):
+        """
+        Initialize the shell.
+
+        Args:
+            cli_group (click.Group): Root NetMan command group
+            run_command (callable): Called with an argv list to run a command
+            inventory_manager (InventoryManager): Source of hostname and group completions
+            template_manager (TemplateManager): Source of template name completions
+            history_file (str): Where to keep command history between sessions
+        """
+        super().__init__()
+        self.cli_group = cli_group
+        self.run_command = run_command
+        self.inventory_manager = inventory_manager
+        self.template_manager = template_manager
+        self.history_file = history_file
+
+    def preloop(self):
+        """Configure readline completion and load the command history."""
+        try:
+            import readline
+        except ImportError:
+            return
+
+        # Hostnames such as demo-router1 contain characters readline would
+        # otherwise treat as word boundaries
+        readline.set_completer_delims(" \t\n")
+        if os.path.exists(self.history_file):
+            readline.read_history_file(self.history_file)
+
+    def postloop(self):
+        """Save the command history."""
+        try:
+            import readline
+            readline.write_history_file(self.history_file)
+        except (ImportError, OSError):
+            pass
+
+    def emptyline(self):
+        """Do nothing on an empty line instead of repeating the last command."""
+        return False
+
+    def default(self, line):
+        """Run a NetMan command line."""
+        try:
+            argv = shlex.split(line)
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+            return False
+
+        if argv and argv[0] in NESTED_COMMANDS:
+            print(f"'{argv[0]}' is not available inside the shell")
+            return False
+
+        self.run_command(argv)
+        return False
+
+    def do_help(self, arg):
+        """Show help for NetMan or one of its commands."""
+        self.run_command(shlex.split(arg) + ['--help'])
+
+    def complete_help(self, text, line, begidx, endidx):
+        """Complete command names after 'help'."""
+        return self.completedefault(text, line, begidx, endidx)
+
+    def do_exit(self, arg):
+        """Leave the shell."""
+        return True
+
+    do_quit = do_exit
+
+    def do_EOF(self, arg):
+        """Leave the shell on Ctrl+D."""
+        print()
+        return True
+
+    def completenames(self, text, *ignored):
+        """Complete top-level command names."""
+        names = [name for name in self.cli_group.commands if name not in NESTED_COMMANDS]
+        names += ['help', 'exit', 'quit']
+        return [name for name in sorted(names) if name.startswith(text)]
+
+    def completedefault(self, text, line, begidx, endidx):
+        """Complete subcommands, options, hostnames, groups and template names."""
+        try:
+            words = shlex.split(line[:begidx])
+        except ValueError:
+            return []
+
+        if words and words[0] == 'help':
+            words = words[1:]
+
+        # Walk down the command tree as far as the typed words go
+        command = self.cli_group
+        for word in words:
+            if isinstance(command, click.Group) and word in command.commands:
+                command = command.commands[word]
+
+        if isinstance(command, click.Group):
+            candidates = list(command.commands)
+        elif words and words[-1] in GROUP_OPTIONS:
+            candidates = self.inventory_manager.list_groups()
+        elif words and words[-1] in TEMPLATE_OPTIONS:
+            candidates = [template['name'] for template in self.template_manager.list_templates()]
+        elif text.startswith('-'):
+            candidates = [option for param in command.params for option in getattr(param, 'opts', [])
+                          if option.startswith('--')]
+        else:
+            candidates = self.inventory_manager.list_hostnames()
+
+        return [candidate for candidate in sorted(candidates) if candidate.startswith(text)]
@@ -225,7 +225,61 @@ Internal build ID: 58fde4bc-f991-4810-b717-d670e436da94
 
 Uptime: 1 day, 2 hours and 5 minutes
 Total memory: 8051592 kB
-Free memory: 5337688 kB"""
+Free memory: 5337688 kB""",
+                "show interfaces": """Ethernet1 is up, line protocol is up (connected)
+  Hardware is Ethernet, address is 001c.7312.0001 (bia 001c.7312.0001)
+  Description: Uplink to core
+  Internet address is 10.1.1.1/31
+  Broadcast address is 255.255.255.255
+  IP MTU 1500 bytes , BW 10000000 kbit
+  Full-duplex, 10Gb/s, auto negotiation: off, uni-link: n/a
+  Up 1 day, 2 hours, 5 minutes, 12 seconds
+  Loopback Mode : None
+  2 link status changes since last clear
+  Last clearing of "show interface" counters never
+  5 minutes input rate 1.52 Mbps (0.0% with framing overhead), 210 packets/sec
+  5 minutes output rate 987 kbps (0.0% with framing overhead), 180 packets/sec
+     18234567 packets input, 14398765432 bytes
+     Received 12 broadcasts, 40211 multicast
+     0 runts, 0 giants
+     3 input errors, 1 CRC, 0 alignment, 2 symbol, 5 input discards
+     0 PAUSE input
+     15234890 packets output, 9876543210 bytes
+     Sent 8 broadcasts, 40190 multicast
+     0 output errors, 0 collisions
+     0 late collision, 0 deferred, 7 output discards
+     0 PAUSE output
+Ethernet2 is up, line protocol is down (notconnect)
+  Hardware is Ethernet, address is 001c.7312.0002 (bia 001c.7312.0002)
+  Description: Server rack 4
+  Ethernet MTU 9214 bytes , BW 1000000 kbit
+  Full-duplex, 1Gb/s, auto negotiation: on, uni-link: n/a
+  Down 3 hours, 12 minutes, 40 seconds
+  1 link status changes since last clear
+  Last clearing of "show interface" counters never
+  5 minutes input rate 0 bps (0.0% with framing overhead), 0 packets/sec
+  5 minutes output rate 0 bps (0.0% with framing overhead), 0 packets/sec
+     120 packets input, 15360 bytes
+     0 input errors, 0 CRC, 0 alignment, 0 symbol, 0 input discards
+     98 packets output, 12544 bytes
+     0 output errors, 0 collisions
+     0 late collision, 0 deferred, 0 output discards
+Ethernet3 is administratively down, line protocol is down (disabled)
+  Hardware is Ethernet, address is 001c.7312.0003 (bia 001c.7312.0003)
+  Ethernet MTU 9214 bytes , BW 10000000 kbit
+  Full-duplex, 10Gb/s, auto negotiation: off, uni-link: n/a
+  0 link status changes since last clear
+Management1 is up, line protocol is up (connected)
+  Hardware is Ethernet, address is 001c.7312.00ff (bia 001c.7312.00ff)
+  Internet address is 192.168.100.20/24
+  IP MTU 1500 bytes , BW 1000000 kbit
+  Full-duplex, 1Gb/s, auto negotiation: on, uni-link: n/a
+  5 minutes input rate 2.10 kbps (0.0% with framing overhead), 3 packets/sec
+  5 minutes output rate 1.80 kbps (0.0% with framing overhead), 2 packets/sec
+     52341 packets input, 6543210 bytes
+     0 input errors, 0 CRC, 0 alignment, 0 symbol, 0 input discards
+     48765 packets output, 7654321 bytes
+     0 output errors, 0 collisions"""
             }
         }
     
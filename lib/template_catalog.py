@@ -0,0 +1,166 @@
+"""
+Template catalog module for the Network Device Management tool.
+
+This module builds a lightweight index of the available templates by reading
+only the header of each template file and caching the result keyed by file
+modification time.
+"""
+import os
+import json
+
+# Number of bytes read from the start of a template to find its header
+HEADER_BYTES = 2048
+
+# Number of lines at the start of a template searched for metadata
+HEADER_LINES = 5
+
+# Bump when the layout of cached entries changes
+INDEX_VERSION = 1
+
+class TemplateCatalog:
+    """Indexes template metadata without reading whole template files."""
+
+    def __init__(self, templates_dir="templates", index_file=None):
+        """Initialize with the templates directory and index file path."""
+        self.templates_dir = templates_dir
+        self.index_file = index_file or os.path.join(templates_dir, ".catalog.json")
+
+    def list_templates(self, vendor=None, tag=None):
+        """
+        List templates from the catalog, refreshing stale entries.
+
+        Args:
+            vendor (str, optional): Only return templates for this vendor
+            tag (str, optional): Only return templates carrying this tag
+
+        Returns:
+            list: List of template dictionaries sorted by name
+        """
+        index = self._load_index()
+        entries = {}
+        changed = False
+
+        try:
+            scanner = os.scandir(self.templates_dir)
+        except FileNotFoundError:
+            return []
+
+        with scanner:
+            for dir_entry in scanner:
+                if not dir_entry.name.endswith('.j2') or not dir_entry.is_file():
+                    continue
+
+                stat = dir_entry.stat()
+                cached = index.get(dir_entry.name)
+                if cached and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size:
+                    entries[dir_entry.name] = cached
+                    continue
+
+                entry = self._read_header(dir_entry.path)
+                entry['mtime_ns'] = stat.st_mtime_ns
+                entry['size'] = stat.st_size
+                entries[dir_entry.name] = entry
+                changed = True
+
+        # Entries for deleted templates also make the index stale
+        if changed or len(entries) != len(index):
+            self._save_index(entries)
+
+        templates = []
+        for file_name, entry in sorted(entries.items()):
+            if vendor and entry['vendor'] != vendor.lower():
+                continue
+            if tag and tag.lower() not in entry['tags']:
+                continue
+
+            templates.append({
+                'name': file_name[:-len('.j2')],
+                'path': os.path.join(self.templates_dir, file_name),
+                'description': entry['description'],
+                'vendor': entry['vendor'],
+                'tags': entry['tags'],
+                'variables': entry['variables'],
+                'size': entry['size']
+            })
+
+        return templates
+
+    def _read_header(self, file_path):
+        """
+        Extract metadata from the header of a template.
+
+        Metadata lives in Jinja2 comments near the top of the file, either as
+        single-line comments (``{# description: ... #}``) or as ``key: value``
+        lines inside a leading comment block. Recognised keys are description,
+        vendor, tags and variables. A leading comment block without a
+        description key uses its first line as the description.
+
+        Args:
+            file_path (str): Path to the template file
+
+        Returns:
+            dict: Template metadata
+        """
+        with open(file_path, 'rb') as f:
+            header = f.read(HEADER_BYTES).decode('utf-8', errors='replace')
+
+        metadata = {}
+        block_title = None
+        in_block = False
+
+        for line in header.split('\n')[:HEADER_LINES]:
+            text = line.strip()
+            if text.startswith('{#'):
+                in_block = True
+                text = text[2:]
+            if not in_block:
+                continue
+
+            closes = '#}' in text
+            text = text.split('#}', 1)[0].strip()
+            if ':' in text:
+                key, value = text.split(':', 1)
+                key = key.strip().lower()
+                if key in ('description', 'vendor', 'tags', 'variables'):
+                    metadata[key] = value.strip()
+            elif text and block_title is None:
+                block_title = text
+
+            if closes:
+                in_block = False
+
+        file_name = os.path.basename(file_path)
+        return {
+            'description': metadata.get('description') or block_title or "No description available",
+            'vendor': metadata.get('vendor', file_name.split('_', 1)[0]).lower(),
+            'tags': _split_list(metadata.get('tags', '')),
+            'variables': _split_list(metadata.get('variables', ''), lower=False)
+        }
+
+    def _load_index(self):
+        """Load cached catalog entries, ignoring a missing or outdated index."""
+        try:
+            with open(self.index_file, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                return data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save_index(self, entries):
+        """Atomically write catalog entries to the index file."""
+        temp_file = f"{self.index_file}.{os.getpid()}.tmp"
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump({'version': INDEX_VERSION, 'entries': entries}, f)
+            os.replace(temp_file, self.index_file)
+        except OSError:
+            # A read-only template repository still lists fine, just uncached
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+
+def _split_list(value, lower=True):
+    """Split a comma-separated header value into a list of items."""
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    return [item.lower() for item in items] if lower else items
@@ -4,11 +4,19 @@ Template management module for the Network Device Management tool.
 This module handles Jinja2 templates for network device configurations.
 """
 import os
-import yaml
-import json
+import math
 import datetime
+from functools import partial
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from .template_catalog import TemplateCatalog
+from .vars_loader import VarsLoader
+
+# Renders per worker process when rendering in parallel; starting a worker
+# takes about a second, which only pays off with this many renders to do
+PARALLEL_RENDER_MIN = 200
+
+# Template manager of a render worker process, see _init_render_worker
+_worker_template_manager = None
 
 class TemplateManager:
     """Manages configuration templates."""
@@ -16,85 +24,63 @@ class TemplateManager:
     def __init__(self, templates_dir="templates"):
         """Initialize with the templates directory."""
         self.templates_dir = templates_dir
-        self._ensure_dir_exists()
+        self.catalog = TemplateCatalog(templates_dir)
+        self.vars_loader = VarsLoader()
         
-        # Initialize Jinja2 environment
-        self.env = Environment(
-            loader=FileSystemLoader(templates_dir),
-            autoescape=select_autoescape(['html', 'xml']),
-            trim_blocks=True,
-            lstrip_blocks=True
-        )
-        
-        # Add functions to the Jinja2 environment
-        self.env.globals['now'] = lambda: datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # The Jinja2 environment is created on first render (see env)
+        self._env = None
     
-    def _ensure_dir_exists(self):
-        """Ensure templates directory exists."""
-        os.makedirs(self.templates_dir, exist_ok=True)
+    @property
+    def env(self):
+        """Environment: Jinja2 environment, created on first use."""
+        if self._env is None:
+            from jinja2 import Environment, FileSystemLoader, select_autoescape
+            
+            self._env = Environment(
+                loader=FileSystemLoader(self.templates_dir),
+                autoescape=select_autoescape(['html', 'xml']),
+                trim_blocks=True,
+                lstrip_blocks=True
+            )
+            
+            # Add functions to the Jinja2 environment
+            self._env.globals['now'] = lambda: datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return self._env
     
-    def list_templates(self):
+    def list_templates(self, vendor=None, tag=None):
         """
         List available templates.
         
+        Args:
+            vendor (str, optional): Only list templates for this vendor
+            tag (str, optional): Only list templates carrying this tag
+            
         Returns:
             list: List of template dictionaries
         """
         try:
-            templates = []
-            
-            for file_path in Path(self.templates_dir).glob('*.j2'):
-                template_name = file_path.stem
-                
-                # Try to extract description from template
-                description = "No description available"
-                with open(file_path, 'r') as f:
-                    content = f.read()
-                    # Look for a description comment in the first few lines
-                    for line in content.split('\n')[:5]:
-                        if line.strip().startswith('{#') and 'description:' in line.lower():
-                            description = line.split('description:', 1)[1].strip().rstrip('#}').strip()
-                            break
-                
-                templates.append({
-                    'name': template_name,
-                    'path': str(file_path),
-                    'description': description
-                })
-            
-            return templates
+            return self.catalog.list_templates(vendor=vendor, tag=tag)
         except Exception as e:
             print(f"Error listing templates: {str(e)}")
             return []
     
-    def render_template(self, template_name, vars_file=None):
+    def render_template(self, template_name, vars_file=None, variables=None):
         """
         Render a template with variables.
         
         Args:
             template_name (str): Name of the template (without .j2 extension)
             vars_file (str, optional): Path to a JSON/YAML variables file
+            variables (dict, optional): Already loaded variables, used
+                instead of vars_file (see VarsLoader.load_layered)
             
         Returns:
             str: Rendered template content or None if failed
         """
         try:
-            # Load template
             template = self.env.get_template(f"{template_name}.j2")
-            
-            # Load variables
-            variables = {}
-            if vars_file:
-                if not os.path.exists(vars_file):
-                    raise FileNotFoundError(f"Variables file {vars_file} not found")
-                
-                with open(vars_file, 'r') as f:
-                    if vars_file.endswith('.json'):
-                        variables = json.load(f)
-                    elif vars_file.endswith(('.yml', '.yaml')):
-                        variables = yaml.safe_load(f)
-                    else:
-                        raise ValueError("Variables file must be JSON or YAML")
+            if variables is None:
+                variables = self.vars_loader.load(vars_file) if vars_file else {}
             
             # Render template
             return template.render(**variables)
@@ -102,6 +88,61 @@ class TemplateManager:
             print(f"Error rendering template: {str(e)}")
             return None
     
+    def render_template_stream(self, template_name, vars_file=None, variables=None):
+        """
+        Render a template incrementally.
+        
+        The template and variables are loaded up front so that missing files
+        are reported immediately; the returned iterator then produces the
+        rendered output chunk by chunk without building it in memory.
+        
+        Args:
+            template_name (str): Name of the template (without .j2 extension)
+            vars_file (str, optional): Path to a JSON/YAML variables file
+            variables (dict, optional): Already loaded variables, used
+                instead of vars_file (see VarsLoader.load_layered)
+            
+        Returns:
+            iterator: Rendered text chunks or None if failed
+        """
+        try:
+            template = self.env.get_template(f"{template_name}.j2")
+            if variables is None:
+                variables = self.vars_loader.load(vars_file) if vars_file else {}
+            
+            return template.generate(**variables)
+        except Exception as e:
+            print(f"Error rendering template: {str(e)}")
+            return None
+    
+    def render_to_file(self, template_name, output_path, vars_file=None, variables=None):
+        """
+        Render a template straight to a file.
+        
+        Args:
+            template_name (str): Name of the template (without .j2 extension)
+            output_path (str): Path of the file to write
+            vars_file (str, optional): Path to a JSON/YAML variables file
+            variables (dict, optional): Already loaded variables, used
+                instead of vars_file (see VarsLoader.load_layered)
+            
+        Returns:
+            str: Path to the rendered file or None if failed
+        """
+        chunks = self.render_template_stream(template_name, vars_file, variables)
+        if chunks is None:
+            return None
+        
+        try:
+            with open(output_path, 'w') as f:
+                f.writelines(chunks)
+            return output_path
+        except Exception as e:
+            print(f"Error rendering template: {str(e)}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return None
+    
     def get_template_content(self, template_name):
         """
         Get the raw content of a template.
@@ -123,3 +164,69 @@ class TemplateManager:
         except Exception as e:
             print(f"Error getting template: {str(e)}")
             return None
+    
+    def signature(self):
+        """
+        Get a signature of all templates, which changes when any of them does.
+        
+        Returns:
+            str: Names, sizes and modification times of the template files
+        """
+        entries = []
+        for template_path in sorted(Path(self.templates_dir).rglob('*.j2')):
+            stat = template_path.stat()
+            entries.append(f"{template_path}:{stat.st_size}:{stat.st_mtime_ns}")
+        return '|'.join(entries)
+
+def map_renders(template_manager, function, tasks, workers=None):
+    """
+    Call a render function for many tasks, in worker processes for large batches.
+    
+    Small batches run in this process. Larger ones are spread over up to
+    `workers` spawned processes, each with its own TemplateManager for the
+    same templates and variables directories. Either way variables files are
+    treated as one batch (see VarsLoader.batch).
+    
+    Args:
+        template_manager (TemplateManager): Template manager to render with
+        function (callable): Module-level function, called as
+            function(template_manager, task)
+        tasks (list): Picklable arguments, one per call
+        workers (int, optional): Most worker processes to use (default: one per CPU)
+        
+    Returns:
+        list: Results in the order of tasks
+    """
+    workers = min(workers or os.cpu_count() or 1, math.ceil(len(tasks) / PARALLEL_RENDER_MIN))
+    
+    if workers <= 1:
+        with template_manager.vars_loader.batch():
+            return [function(template_manager, task) for task in tasks]
+    
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    
+    # Spawned workers are safe to start from the threads of `netman serve`
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_render_worker,
+        initargs=(template_manager.templates_dir, template_manager.vars_loader.vars_dir)
+    ) as pool:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        return list(pool.map(partial(_call_in_worker, function), tasks, chunksize=chunksize))
+
+def _init_render_worker(templates_dir, vars_dir):
+    """Create the template manager of a render worker process."""
+    global _worker_template_manager
+    
+    _worker_template_manager = TemplateManager(templates_dir)
+    _worker_template_manager.vars_loader.vars_dir = vars_dir
+    
+    # Variables files do not change during a render, so the worker treats
+    # them as one batch for its whole life
+    _worker_template_manager.vars_loader.batch().__enter__()
+
+def _call_in_worker(function, task):
+    """Call a render function in a render worker process."""
+    return function(_worker_template_manager, task)
@@ -0,0 +1,168 @@
+"""
+Variables loading module for the Network Device Management tool.
+
+This module loads JSON/YAML template variables, caching parsed files by path
+and modification time, and merges layered variables the way Ansible does
+with group_vars and host_vars.
+"""
+import os
+import json
+import time
+from contextlib import contextmanager
+import yaml
+
+# Prefer the libyaml based loader, it parses large files many times faster
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+VARS_EXTENSIONS = ('.yml', '.yaml', '.json')
+
+class VarsLoader:
+    """Loads and caches template variables files."""
+
+    def __init__(self, vars_dir="data"):
+        """Initialize with the directory holding group_vars and host_vars."""
+        self.vars_dir = vars_dir
+        self._cache = {}
+        self._in_batch = False
+        self._layer_paths = {}
+        self._group_layers = {}
+        self._stats = {
+            'files_parsed': 0,
+            'cache_hits': 0,
+            'parse_seconds': 0.0,
+            'merge_seconds': 0.0
+        }
+
+    @property
+    def stats(self):
+        """dict: Load counters and cumulative timings in seconds."""
+        return dict(self._stats, cached_files=len(self._cache))
+
+    def load(self, vars_file):
+        """
+        Load a variables file, reusing the parsed result while it is unchanged.
+
+        Args:
+            vars_file (str): Path to a JSON/YAML variables file
+
+        Returns:
+            dict: Variables from the file
+        """
+        if not vars_file.endswith(VARS_EXTENSIONS):
+            raise ValueError("Variables file must be JSON or YAML")
+
+        cached = self._cache.get(vars_file)
+        if cached and self._in_batch:
+            self._stats['cache_hits'] += 1
+            return cached[1]
+
+        try:
+            stat = os.stat(vars_file)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Variables file {vars_file} not found")
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if cached and cached[0] == signature:
+            self._stats['cache_hits'] += 1
+            return cached[1]
+
+        start_time = time.perf_counter()
+        with open(vars_file, 'r') as f:
+            if vars_file.endswith('.json'):
+                variables = json.load(f)
+            else:
+                variables = yaml.load(f, Loader=SafeLoader)
+        self._stats['parse_seconds'] += time.perf_counter() - start_time
+        self._stats['files_parsed'] += 1
+
+        variables = variables or {}
+        self._cache[vars_file] = (signature, variables)
+        return variables
+
+    def load_layered(self, hostname=None, groups=None, vars_file=None):
+        """
+        Load variables for a device from all applicable layers.
+
+        Layers are applied in order, later layers replacing top-level keys of
+        earlier ones: group_vars/all, group_vars/<group> for each group,
+        host_vars/<hostname> and finally the explicit variables file.
+
+        Args:
+            hostname (str, optional): Device hostname
+            groups (list, optional): Groups the device belongs to
+            vars_file (str, optional): Path to an explicit variables file
+
+        Returns:
+            dict: Merged variables
+        """
+        groups = tuple(groups or ())
+
+        # The global and group layers are shared by every device in the same
+        # groups, so within a batch they are merged only once
+        base = self._group_layers.get(groups) if self._in_batch else None
+        if base is None:
+            base = {}
+            for name in ('all',) + groups:
+                base = self._merge(base, self._load_layer('group_vars', name))
+            if self._in_batch:
+                self._group_layers[groups] = base
+
+        variables = base
+        if hostname:
+            variables = self._merge(variables, self._load_layer('host_vars', hostname))
+        if vars_file:
+            variables = self._merge(variables, self.load(vars_file))
+
+        # Never hand out the shared cached dictionaries themselves
+        return dict(variables)
+
+    @contextmanager
+    def batch(self):
+        """
+        Treat variables files as unchanged for the duration of a batch.
+
+        Inside the block each file is checked on disk at most once and merged
+        group layers are reused across devices.
+        """
+        self._in_batch = True
+        try:
+            yield self
+        finally:
+            self._in_batch = False
+            self._layer_paths.clear()
+            self._group_layers.clear()
+
+    def clear_cache(self):
+        """Forget all parsed files."""
+        self._cache.clear()
+
+    def _load_layer(self, kind, name):
+        """Load group_vars or host_vars for a name, if such a file exists."""
+        key = (kind, name)
+        if self._in_batch and key in self._layer_paths:
+            path = self._layer_paths[key]
+        else:
+            path = None
+            for extension in VARS_EXTENSIONS:
+                candidate = os.path.join(self.vars_dir, kind, f"{name}{extension}")
+                if os.path.isfile(candidate):
+                    path = candidate
+                    break
+            if self._in_batch:
+                self._layer_paths[key] = path
+
+        return self.load(path) if path else {}
+
+    def _merge(self, base, overrides):
+        """Merge two variable layers, replacing top-level keys like Ansible."""
+        if not overrides:
+            return base
+
+        start_time = time.perf_counter()
+        merged = dict(base)
+        merged.update(overrides)
+        self._stats['merge_seconds'] += time.perf_counter() - start_time
+        return merged
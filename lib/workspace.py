@@ -0,0 +1,69 @@
+"""
+Workspace bootstrap module for the Network Device Management tool.
+
+This module creates the directories, inventory files and Git repository NetMan
+works with, and records that the workspace is ready so that ordinary commands
+can skip all setup work.
+"""
+import os
+import json
+import time
+
+# Directories every NetMan workspace needs
+WORKSPACE_DIRS = ('data', 'configs', 'logs')
+
+# Written once the workspace has been bootstrapped
+MARKER_FILE = os.path.join('data', '.netman_workspace')
+
+# Recorded in the marker so later releases can recognise older workspaces
+WORKSPACE_VERSION = 1
+
+def is_workspace_ready(marker_file=MARKER_FILE):
+    """
+    Check whether the workspace has been bootstrapped.
+
+    This is a single stat call so it can run before every command.
+
+    Args:
+        marker_file (str): Path to the workspace marker file
+
+    Returns:
+        bool: True if the workspace is ready
+    """
+    return os.path.exists(marker_file)
+
+def bootstrap_workspace(marker_file=MARKER_FILE):
+    """
+    Create the NetMan workspace and mark it as ready.
+
+    Safe to run repeatedly; existing files and repositories are left alone.
+
+    Args:
+        marker_file (str): Path to the workspace marker file
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    from .git_manager import GitManager
+    from .inventory import InventoryManager
+
+    try:
+        for directory in WORKSPACE_DIRS:
+            os.makedirs(directory, exist_ok=True)
+
+        InventoryManager().ensure_files_exist()
+
+        git_manager = GitManager('configs')
+        if not os.path.exists(os.path.join('configs', '.git')) and not git_manager.init_repo():
+            return False
+
+        with open(marker_file, 'w') as f:
+            json.dump({
+                'version': WORKSPACE_VERSION,
+                'created': time.strftime('%Y-%m-%d %H:%M:%S')
+            }, f)
+
+        return True
+    except Exception as e:
+        print(f"Error initializing workspace: {str(e)}")
+        return False
@@ -7,45 +7,285 @@ of network devices.
 """
 import os
 import sys
+
+# Thin client mode: when NETMAN_SERVER points at the socket of a running
+# `netman serve`, hand the command over before importing anything else
+if __name__ == "__main__" and os.environ.get("NETMAN_SERVER") and sys.argv[1:2] not in (["serve"], ["shell"]):
+    import shutil
+    from lib.server import forward_command
+    
+    response = forward_command(
+        os.environ["NETMAN_SERVER"],
+        sys.argv[1:],
+        width=shutil.get_terminal_size().columns,
+        color=sys.stdout.isatty(),
+        cwd=os.getcwd()
+    )
+    if response is not None:
+        exit_code, output = response
+        sys.stdout.write(output)
+        sys.exit(exit_code)
+    # No server listening, run the command locally
+
+from functools import lru_cache
 import click
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-
-# Import our library modules
-from lib.inventory import InventoryManager
-from lib.config_manager import ConfigManager
-from lib.monitoring import Monitor
-from lib.git_manager import GitManager
-from lib.ansible_runner import AnsibleRunner
-from lib.template_manager import TemplateManager
+
+# Heavy libraries (rich, jinja2, GitPython, PyYAML) and the manager classes are
+# imported on first use so that short commands and --help start quickly.
+
+class LazyConsole:
+    """Rich console proxy that only imports and creates the console when used."""
+    
+    def __init__(self):
+        """Initialize without creating the underlying console."""
+        self._console = None
+    
+    def __getattr__(self, name):
+        """Create the console on first attribute access and delegate to it."""
+        return getattr(self.get_console(), name)
+    
+    def get_console(self):
+        """Get the underlying console, e.g. for rich objects that take one."""
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return self._console
+    
+    def redirect(self, console):
+        """
+        Send output to another console until restore() is called.
+        
+        Args:
+            console (Console): Console to use instead
+            
+        Returns:
+            Console: The console being replaced, to pass to restore()
+        """
+        previous = self._console
+        self._console = console
+        return previous
+    
+    def restore(self, previous):
+        """Switch back to the console returned by redirect()."""
+        self._console = previous
 
 # Initialize console for rich output
-console = Console()
+console = LazyConsole()
 
-# Create instances of our managers
-inventory_manager = InventoryManager()
-config_manager = ConfigManager()
-monitor = Monitor()
-git_manager = GitManager()
-ansible_runner = AnsibleRunner()
-template_manager = TemplateManager()
+# Directory of the client whose command is running, see run_in_process
+client_directory = None
+
+class ClientPath(click.Path):
+    """File path option resolved against the directory of the caller.
+    
+    Commands forwarded to `netman serve` run in the server's directory, so
+    relative paths are joined to the directory the client was started in.
+    """
+    
+    def convert(self, value, param, ctx):
+        """Resolve a relative path before Click checks it."""
+        if client_directory and isinstance(value, str) and not os.path.isabs(value):
+            value = os.path.join(client_directory, value)
+        return super().convert(value, param, ctx)
+
+# Managers are created once per process, the first time a command needs them
+
+@lru_cache(maxsize=None)
+def get_inventory_manager():
+    """Get the shared InventoryManager."""
+    from lib.inventory import InventoryManager
+    return InventoryManager()
+
+@lru_cache(maxsize=None)
+def get_config_manager():
+    """Get the shared ConfigManager."""
+    from lib.config_manager import ConfigManager
+    return ConfigManager()
+
+@lru_cache(maxsize=None)
+def get_git_manager():
+    """Get the shared GitManager."""
+    from lib.git_manager import GitManager
+    return GitManager()
+
+@lru_cache(maxsize=None)
+def get_template_manager():
+    """Get the shared TemplateManager."""
+    from lib.template_manager import TemplateManager
+    return TemplateManager()
+
+def get_monitor():
+    """Get the Monitor class."""
+    from lib.monitoring import Monitor
+    return Monitor
 
 @click.group()
 @click.version_option(version="1.0.0")
-def cli():
+@click.option("--timings", is_flag=True, help="Show how long loading template variables took")
+@click.pass_context
+def cli(ctx, timings):
     """NetMan - Network Device Management CLI Tool.
     
     A Python CLI tool for managing network devices using Ansible.
     """
-    # Ensure our directory structure exists
-    os.makedirs('data', exist_ok=True)
-    os.makedirs('configs', exist_ok=True)
-    os.makedirs('logs', exist_ok=True)
+    from lib.workspace import is_workspace_ready, bootstrap_workspace
+    
+    # Setting up directories and the Git repository is done once by
+    # `netman init`; afterwards this is a single stat of the marker file
+    if ctx.invoked_subcommand != "init" and not is_workspace_ready():
+        bootstrap_workspace()
+    
+    if timings:
+        # In serve and shell the counters are per process, so report what
+        # this command added to them
+        before = get_template_manager().vars_loader.stats
+        ctx.call_on_close(lambda: show_vars_timings(before))
+
+def show_vars_timings(before):
+    """
+    Print what loading template variables cost since a stats snapshot.
+    
+    Args:
+        before (dict): VarsLoader.stats taken before the command ran
+    """
+    stats = get_template_manager().vars_loader.stats
+    delta = {key: stats[key] - before[key] for key in ('files_parsed', 'cache_hits', 'parse_seconds', 'merge_seconds')}
+    console.print(
+        f"[dim]Variables: {delta['files_parsed']} files parsed in {delta['parse_seconds'] * 1000:.1f}ms, "
+        f"{delta['cache_hits']} cache hits, layers merged in {delta['merge_seconds'] * 1000:.1f}ms, "
+        f"{stats['cached_files']} files cached[/dim]"
+    )
+
+@cli.command("init")
+def init_workspace():
+    """Create the data, configs and logs directories and the Git repository."""
+    from lib.workspace import bootstrap_workspace
+    
+    if bootstrap_workspace():
+        console.print("[green]✓ NetMan workspace initialized[/green]")
+    else:
+        console.print("[red]✗ Failed to initialize NetMan workspace[/red]")
+
+def run_command(argv):
+    """
+    Run a NetMan command in this process.
+    
+    Click's usage errors, aborted prompts and errors raised by the command
+    are reported instead of exiting the process, so long-lived callers such
+    as `netman serve` and `netman shell` keep running.
+    
+    Args:
+        argv (list): Command line arguments, without the program name
+        
+    Returns:
+        int: Exit code of the command
+    """
+    try:
+        exit_code = cli.main(args=list(argv), prog_name="netman", standalone_mode=False)
+    except click.exceptions.Abort:
+        click.echo("Aborted!", err=True)
+        exit_code = 1
+    except click.ClickException as e:
+        e.show()
+        exit_code = e.exit_code
+    except Exception as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        exit_code = 1
+    
+    return exit_code if isinstance(exit_code, int) else 0
+
+def run_in_process(argv, width=80, color=False, cwd=None):
+    """
+    Run a NetMan command in this process and capture its output.
+    
+    Used by `netman serve` so that forwarded commands reuse the managers,
+    parsed inventory and compiled templates already held in memory.
+    Interactive prompts read an empty stdin and therefore abort; pass
+    --force where a command supports it.
+    
+    Args:
+        argv (list): Command line arguments, without the program name
+        width (int): Terminal width to render output for
+        color (bool): Whether to emit terminal colors
+        cwd (str, optional): Directory of the caller; relative file paths in
+            argv are resolved against it (see ClientPath)
+        
+    Returns:
+        tuple: (exit_code, output)
+    """
+    import io
+    import contextlib
+    from rich.console import Console
+    global client_directory
+    
+    buffer = io.StringIO()
+    previous = console.redirect(Console(file=buffer, width=width, force_terminal=color))
+    stdin = sys.stdin
+    client_directory = cwd
+    try:
+        with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+            sys.stdin = io.StringIO()
+            exit_code = run_command(argv)
+    finally:
+        client_directory = None
+        sys.stdin = stdin
+        console.restore(previous)
+    
+    return exit_code, buffer.getvalue()
+
+@cli.command("serve")
+@click.option("--socket", "socket_path", default=None, help="Unix socket path (default: data/netman.sock)")
+def serve(socket_path):
+    """Keep NetMan loaded and serve commands over a Unix socket.
+    
+    Point clients at the server with NETMAN_SERVER=SOCKET_PATH; every
+    netman command then runs inside this process.
+    """
+    import signal
+    from lib.server import NetManServer, DEFAULT_SOCKET
+    from lib.ansible_runner import mark_long_lived
+    
+    def stop_server(signum, frame):
+        raise KeyboardInterrupt
+    
+    # Shut down cleanly when stopped by a service manager
+    signal.signal(signal.SIGTERM, stop_server)
+    
+    socket_path = socket_path or DEFAULT_SOCKET
+    server = NetManServer(run_in_process, socket_path)
+    
+    # Jobs fork from imported Ansible and facts refresh in the background
+    mark_long_lived()
+    
+    # Warm up the managers so the first forwarded command is fast too
+    get_inventory_manager()
+    get_template_manager()
+    get_git_manager()
+    get_config_manager()
+    get_monitor()
+    
+    console.print(f"[green]NetMan server listening on {socket_path}[/green]")
+    console.print(f"Use it with: export NETMAN_SERVER={socket_path}")
+    try:
+        server.serve_forever()
+    except RuntimeError as e:
+        console.print(f"[red]✗ {str(e)}[/red]")
+    except KeyboardInterrupt:
+        console.print(f"[yellow]Server stopped after {server.requests_served} requests[/yellow]")
+
+@cli.command("shell")
+def shell():
+    """Start an interactive NetMan shell.
+    
+    Commands run in one process, so inventory, templates and the Git
+    repository loaded by one command are reused by the next. Tab completes
+    commands, options, hostnames, groups and template names.
+    """
+    from lib.shell import NetManShell
+    from lib.ansible_runner import mark_long_lived
     
-    # Initialize git repo if it doesn't exist
-    if not os.path.exists(os.path.join('configs', '.git')):
-        git_manager.init_repo('configs')
+    mark_long_lived()
+    NetManShell(cli, run_command, get_inventory_manager(), get_template_manager()).cmdloop()
 
 # --- Inventory Commands ---
 
@@ -64,6 +304,8 @@ def inventory():
 @click.option("--groups", default="", help="Comma-separated list of groups")
 def add_device(hostname, ip, device_type, username, password, ssh_port, groups):
     """Add a new device to inventory."""
+    inventory_manager = get_inventory_manager()
+    
     groups_list = [g.strip() for g in groups.split(',')] if groups else []
     
     success = inventory_manager.add_device(
@@ -85,6 +327,9 @@ def add_device(hostname, ip, device_type, username, password, ssh_port, groups):
 @click.option("--group", help="Filter devices by group")
 def list_devices(group):
     """List devices in inventory."""
+    from rich.table import Table
+    
+    inventory_manager = get_inventory_manager()
     devices = inventory_manager.list_devices(group)
     
     if not devices:
@@ -113,6 +358,8 @@ def list_devices(group):
 @click.option("--force", is_flag=True, help="Force removal without confirmation")
 def remove_device(hostname, force):
     """Remove a device from inventory."""
+    inventory_manager = get_inventory_manager()
+    
     if not force:
         if not click.confirm(f"Are you sure you want to remove {hostname}?"):
             console.print("[yellow]Operation cancelled[/yellow]")
@@ -132,30 +379,96 @@ def config():
     pass
 
 @config.command("push")
-@click.argument("hostname")
+@click.argument("hostname", required=False)
 @click.option("--template", required=True, help="Template name to use")
-@click.option("--vars", help="Path to variables file")
+@click.option("--vars", type=ClientPath(dir_okay=False), help="Path to variables file")
+@click.option("--group", help="Roll out to all devices in a group")
+@click.option("--hosts", help="Roll out to a comma-separated list of devices")
+@click.option("--canary", type=click.IntRange(min=0), help="Devices in the first wave of a rollout")
+@click.option("--wave-percent", type=click.IntRange(1, 100), help="Size of the later waves, in percent of all devices")
+@click.option("--max-failure-rate", type=click.FloatRange(0, 100), help="Halt once more than this percentage of devices failed")
+@click.option("--forks", type=int, help="Number of devices to configure in parallel within a wave")
+@click.option("--delta", is_flag=True, help="Only push lines missing from the latest backup")
+@click.option("--no-facts", is_flag=True, help="Don't gather device facts before and after the push")
 @click.option("--dry-run", is_flag=True, help="Generate but don't apply config")
-def push_config(hostname, template, vars, dry_run):
-    """Push configuration to a device using a template."""
+@click.option("--output", type=ClientPath(dir_okay=False), help="Write the generated config to a file (with --dry-run)")
+def push_config(hostname, template, vars, group, hosts, canary, wave_percent, max_failure_rate, forks,
+                delta, no_facts, dry_run, output):
+    """Push configuration to a device using a template.
+    
+    With --group or --hosts the configuration is rolled out in waves: a
+    canary wave first, then waves of a percentage of the devices. Each wave
+    is backed up and committed to Git, and the rollout halts when too many
+    devices fail.
+    
+    With --delta only the lines the device's latest backup lacks are sent,
+    with the parent lines they belong under (Cisco IOS and Arista EOS).
+    """
+    from rich.panel import Panel
+    
+    inventory_manager = get_inventory_manager()
+    config_manager = get_config_manager()
+    template_manager = get_template_manager()
+    
+    if sum(1 for target in (hostname, group, hosts) if target) != 1:
+        console.print("[red]Error: Specify exactly one of a hostname, --group or --hosts[/red]")
+        return
+    
+    if group or hosts:
+        if group:
+            devices = inventory_manager.list_devices(group)
+        else:
+            names = [name.strip() for name in hosts.split(",") if name.strip()]
+            devices = [inventory_manager.get_device(name) for name in names]
+            missing = [name for name, device in zip(names, devices) if not device]
+            if missing:
+                console.print(f"[red]Error: Devices not found in inventory: {', '.join(missing)}[/red]")
+                return
+        
+        if not devices:
+            console.print("[yellow]No devices to configure[/yellow]")
+            return
+        
+        rollout_config(devices, template, vars, canary, wave_percent, max_failure_rate, forks,
+                       delta, not no_facts, dry_run)
+        return
+    
     # Generate config from template
     try:
-        config_content = template_manager.render_template(template, vars)
+        # Layer group_vars/host_vars for the device under the --vars file
+        device_info = inventory_manager.get_device(hostname) or {}
+        variables = template_manager.vars_loader.load_layered(hostname, device_info.get("groups"), vars)
+        
+        if delta:
+            push_config_delta(hostname, template, variables, not no_facts, dry_run)
+            return
         
         if dry_run:
+            if output:
+                if template_manager.render_to_file(template, output, variables=variables):
+                    console.print(f"[green]✓ Configuration for {hostname} written to {output}[/green]")
+                return
+            
+            config_content = template_manager.render_template(template, variables=variables)
             console.print(Panel(config_content, title=f"Configuration for {hostname} (Dry Run)", 
                                border_style="yellow"))
             return
         
+        # Stream the rendered config straight into the push
+        config_stream = template_manager.render_template_stream(template, variables=variables)
+        if config_stream is None:
+            console.print(f"[red]✗ Failed to render template {template}[/red]")
+            return
+        
         # Apply configuration
-        success = config_manager.push_config(hostname, config_content)
+        success = config_manager.push_config(hostname, config_stream, gather_facts=not no_facts)
         
         if success:
             console.print(f"[green]✓ Configuration applied to {hostname}[/green]")
             # Backup the new config and commit to git
             backup_path = config_manager.backup_config(hostname)
             if backup_path:
-                git_manager.commit_changes(f"Updated configuration for {hostname}")
+                get_git_manager().commit_changes(f"Updated configuration for {hostname}")
                 console.print(f"[green]✓ Configuration backed up and committed to Git[/green]")
         else:
             console.print(f"[red]✗ Failed to apply configuration to {hostname}[/red]")
@@ -163,32 +476,182 @@ def push_config(hostname, template, vars, dry_run):
     except Exception as e:
         console.print(f"[red]Error: {str(e)}[/red]")
 
+def push_config_delta(hostname, template, variables, gather_facts, dry_run):
+    """Push only the lines of a rendered template a device lacks."""
+    from rich.panel import Panel
+    
+    config_manager = get_config_manager()
+    
+    config_content = get_template_manager().render_template(template, variables=variables)
+    if config_content is None:
+        console.print(f"[red]✗ Failed to render template {template}[/red]")
+        return
+    
+    config_delta = config_manager.config_delta(hostname, config_content)
+    if config_delta is None:
+        console.print(f"[yellow]No backup of {hostname} to compare with, or its device type "
+                      f"does not support delta pushes; using the full configuration[/yellow]")
+        config_delta, is_delta = config_content, False
+    elif not config_delta:
+        console.print(f"[green]✓ {hostname} already has this configuration[/green]")
+        return
+    else:
+        is_delta = True
+    
+    if dry_run:
+        title = "Delta" if is_delta else "Configuration"
+        console.print(Panel(config_delta, title=f"{title} for {hostname} (Dry Run)", border_style="yellow"))
+        return
+    
+    if not config_manager.push_config(hostname, config_delta, delta=is_delta, gather_facts=gather_facts):
+        console.print(f"[red]✗ Failed to apply configuration to {hostname}[/red]")
+        return
+    
+    line_count = len(config_delta.splitlines())
+    console.print(f"[green]✓ Configuration applied to {hostname} ({line_count} lines sent)[/green]")
+    backup_path = config_manager.backup_config(hostname)
+    if backup_path:
+        get_git_manager().commit_changes(f"Updated configuration for {hostname}")
+        console.print(f"[green]✓ Configuration backed up and committed to Git[/green]")
+
+def rollout_config(devices, template, vars_file, canary, wave_percent, max_failure_rate, forks,
+                   delta, gather_facts, dry_run):
+    """Render a template for many devices and push it in waves."""
+    import time
+    from rich.table import Table
+    from rich.progress import Progress
+    from lib.ansible_events import host_finished
+    from lib.job_files import JobFiles
+    from lib.rollout import Rollout, render_configs
+    
+    config_manager = get_config_manager()
+    rollout = Rollout(config_manager, get_git_manager(), canary, wave_percent, max_failure_rate, forks,
+                      gather_facts)
+    
+    with JobFiles() as job_files:
+        start_time = time.perf_counter()
+        with console.status(f"[bold green]Rendering {template} for {len(devices)} devices..."):
+            rendered = render_configs(get_template_manager(), template, devices, job_files.directory(), vars_file,
+                                      backup_dir=config_manager.config_dir if delta else None)
+        render_seconds = time.perf_counter() - start_time
+        
+        errors = rendered["errors"]
+        for hostname, error in errors.items():
+            console.print(f"[red]✗ Failed to render configuration for {hostname}: {error}[/red]")
+        console.print(f"Rendered {len(devices) - len(errors)} of {len(devices)} configurations "
+                      f"in {render_seconds:.1f}s")
+        if delta:
+            console.print(f"{len(rendered['delta'])} devices get a delta, "
+                          f"{len(rendered['unchanged'])} already have this configuration")
+        
+        skip = set(errors) | set(rendered["unchanged"])
+        hostnames = [device["hostname"] for device in devices if device["hostname"] not in skip]
+        if not hostnames:
+            return
+        
+        if dry_run:
+            for number, wave in enumerate(rollout.plan(hostnames), 1):
+                label = "canary" if number == 1 and rollout.canary else f"{len(wave)} devices"
+                console.print(f"Wave {number} ({label}): {', '.join(wave)}")
+            return
+        
+        # Progress follows the Ansible events of every wave's push
+        with Progress(console=console.get_console()) as progress:
+            progress_task = progress.add_task("Pushing", total=len(hostnames))
+            finished = set()
+            
+            def show_event(event):
+                if event["type"] == "task_start":
+                    progress.update(progress_task, description=event["task"])
+                elif host_finished(event) and event["host"] not in finished:
+                    finished.add(event["host"])
+                    progress.advance(progress_task)
+            
+            def show_wave(report):
+                label = "Canary wave" if report["canary"] else f"Wave {report['wave']}"
+                color = "red" if report["failed"] else "green"
+                progress.console.print(f"[{color}]{label}: {len(report['applied'])} of {len(report['hosts'])} "
+                                       f"devices configured in {report['push_seconds']:.1f}s[/{color}]")
+                for hostname in report["failed"]:
+                    progress.console.print(f"[red]✗ Failed to apply configuration to {hostname}[/red]")
+            
+            result = rollout.run(job_files.directory(), hostnames, f"Rollout of {template}",
+                                 on_event=show_event, on_wave=show_wave, delta_hosts=rendered["delta"])
+    
+    table = Table(title=f"Rollout of {template}")
+    table.add_column("Wave", style="cyan")
+    table.add_column("Devices", justify="right")
+    table.add_column("Applied", style="green", justify="right")
+    table.add_column("Failed", style="red", justify="right")
+    table.add_column("Push", style="magenta", justify="right")
+    table.add_column("Backup & Commit", style="magenta", justify="right")
+    
+    for report in result["waves"]:
+        table.add_row(
+            "canary" if report["canary"] else str(report["wave"]),
+            str(len(report["hosts"])),
+            str(len(report["applied"])),
+            str(len(report["failed"])),
+            f"{report['push_seconds']:.1f}s",
+            f"{report['backup_seconds']:.1f}s"
+        )
+    
+    console.print(table)
+    if result["halted"]:
+        console.print(f"[red]✗ Rollout halted: {result['halted']}; "
+                      f"{len(result['skipped'])} devices were not configured[/red]")
+    else:
+        console.print(f"[green]✓ Rollout of {template} finished[/green]")
+
 @config.command("backup")
 @click.argument("hostname", required=False)
 @click.option("--all", is_flag=True, help="Backup all devices")
-def backup_config(hostname, all):
+@click.option("--group", help="Backup all devices in a group")
+@click.option("--forks", type=int, help="Number of devices to back up in parallel")
+def backup_config(hostname, all, group, forks):
     """Backup device configuration to Git repository."""
-    if not hostname and not all:
-        console.print("[red]Error: Specify either a hostname or --all flag[/red]")
+    inventory_manager = get_inventory_manager()
+    config_manager = get_config_manager()
+    
+    if not hostname and not all and not group:
+        console.print("[red]Error: Specify either a hostname, --group or --all flag[/red]")
         return
     
     devices = []
     if all:
         devices = [device["hostname"] for device in inventory_manager.list_devices()]
+    elif group:
+        devices = [device["hostname"] for device in inventory_manager.list_devices(group)]
     else:
         devices = [hostname]
     
+    from rich.progress import Progress
+    from lib.ansible_events import host_finished
+    
+    # One Ansible run covers every device; progress follows its events
+    with Progress(console=console.get_console()) as progress:
+        progress_task = progress.add_task("Backing up", total=len(devices))
+        finished = set()
+        
+        def show_event(event):
+            if event["type"] == "task_start":
+                progress.update(progress_task, description=event["task"])
+            elif host_finished(event) and event["host"] not in finished:
+                finished.add(event["host"])
+                progress.advance(progress_task)
+        
+        backups = config_manager.backup_configs(devices, forks=forks, on_event=show_event)
+    
     success_count = 0
     for device in devices:
-        backup_path = config_manager.backup_config(device)
-        if backup_path:
+        if backups.get(device):
             success_count += 1
             console.print(f"[green]✓ Configuration backed up for {device}[/green]")
         else:
             console.print(f"[red]✗ Failed to backup configuration for {device}[/red]")
     
     if success_count > 0:
-        git_manager.commit_changes(f"Backup configuration for {success_count} devices")
+        get_git_manager().commit_changes(f"Backup configuration for {success_count} devices")
         console.print(f"[green]✓ Changes committed to Git repository[/green]")
 
 @config.command("diff")
@@ -196,6 +659,10 @@ def backup_config(hostname, all):
 @click.option("--revisions", default="HEAD~1..HEAD", help="Git revision range")
 def diff_config(hostname, revisions):
     """Show configuration differences between revisions."""
+    from rich.panel import Panel
+    
+    git_manager = get_git_manager()
+    
     diff = git_manager.show_diff(hostname, revisions)
     if diff:
         console.print(Panel(diff, title=f"Configuration Diff for {hostname} ({revisions})", 
@@ -203,6 +670,155 @@ def diff_config(hostname, revisions):
     else:
         console.print("[yellow]No differences found or invalid revision range[/yellow]")
 
+@config.command("compliance")
+@click.option("--template", required=True, help="Golden template to check against")
+@click.option("--group", help="Check the devices in a group (default: all devices)")
+@click.option("--output", type=ClientPath(dir_okay=False), help="Write the fleet report to a file")
+@click.option("--format", "report_format", type=click.Choice(["json", "csv", "html"]),
+              help="Report format (default: from the file extension)")
+@click.option("--workers", type=int, help="Number of processes rendering and comparing configs")
+@click.option("--no-cache", is_flag=True, help="Check every device again, ignoring cached results")
+def check_compliance(template, group, output, report_format, workers, no_cache):
+    """Check device backups against a golden template.
+    
+    The template is rendered for every device and compared section by
+    section with the device's latest backup. A device drifts if its backup
+    lacks lines of the rendered configuration. Results are cached until the
+    templates, the device's variables or its backup change.
+    """
+    from rich.table import Table
+    from lib.compliance import ComplianceChecker, write_report
+    
+    template_manager = get_template_manager()
+    if not template_manager.get_template_content(template):
+        console.print(f"[red]Template '{template}' not found[/red]")
+        return
+    
+    devices = get_inventory_manager().list_devices(group)
+    if not devices:
+        console.print("[yellow]No devices found[/yellow]")
+        return
+    
+    checker = ComplianceChecker(template_manager, get_config_manager().config_dir)
+    with console.status(f"Checking {len(devices)} devices against {template}..."):
+        report = checker.check(template, devices, use_cache=not no_cache, workers=workers)
+    
+    summary = report["summary"]
+    deviating = sorted((result for result in report["devices"] if result["status"] != "compliant"),
+                       key=lambda result: result["delta_lines"], reverse=True)
+    
+    if deviating:
+        table = Table(title=f"Devices Not Compliant with {template}")
+        table.add_column("Hostname", style="cyan")
+        table.add_column("Status")
+        table.add_column("Sections", justify="right")
+        table.add_column("Missing Lines", justify="right")
+        table.add_column("Details", style="yellow")
+    
+        for result in deviating[:20]:
+            details = result["error"] or ", ".join(section["section"] for section in result["sections"][:3])
+            table.add_row(
+                result["hostname"],
+                "[red]drift[/red]" if result["status"] == "drift" else f"[yellow]{result['status']}[/yellow]",
+                str(result["drifted_sections"]),
+                str(result["delta_lines"]),
+                details
+            )
+    
+        console.print(table)
+        if len(deviating) > 20:
+            console.print(f"[yellow]... and {len(deviating) - 20} more devices[/yellow]")
+    
+    percent = summary["compliance_percent"]
+    console.print(f"{summary['compliant']} of {summary['devices']} devices compliant"
+                  f"{f' ({percent:g}% of those with a backup)' if percent is not None else ''}, "
+                  f"{summary['drift']} drifting, {summary['no_backup']} without backup, "
+                  f"{summary['error']} errors")
+    console.print(f"[blue]Checked {summary['checked']} devices, {summary['cached']} from cache, "
+                  f"in {summary['seconds']:.1f}s[/blue]")
+    
+    if output:
+        try:
+            write_report(report, output, report_format)
+            console.print(f"[green]✓ Report written to {output}[/green]")
+        except Exception as e:
+            console.print(f"[red]Error writing report: {str(e)}[/red]")
+
+@config.command("audit")
+@click.option("--group", help="Audit the devices in a group (default: all devices)")
+@click.option("--rules", "rules_file", type=ClientPath(exists=True, dir_okay=False),
+              help="Rules file (default: config/compliance_rules.yml)")
+@click.option("--output", type=ClientPath(dir_okay=False), help="Write the report to a file (JSON or CSV)")
+@click.option("--workers", type=int, help="Number of processes checking backups")
+@click.option("--no-cache", is_flag=True, help="Check every backup again, ignoring cached results")
+def audit_configs(group, rules_file, output, workers, no_cache):
+    """Check device backups against compliance rules.
+    
+    Rules forbid or require configuration lines, or pin the values of
+    lines such as NTP servers. Backups unchanged since the last audit are
+    not checked again.
+    """
+    from rich.table import Table
+    from lib.compliance_rules import load_rules, RuleChecker, write_report
+    
+    try:
+        rule_set = load_rules(rules_file)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error loading compliance rules: {str(e)}[/red]")
+        return
+    
+    devices = get_inventory_manager().list_devices(group)
+    if not devices:
+        console.print("[yellow]No devices found[/yellow]")
+        return
+    
+    checker = RuleChecker(rule_set, get_config_manager().config_dir)
+    with console.status(f"Auditing {len(devices)} devices against {len(rule_set.rules)} rules..."):
+        report = checker.check(devices, use_cache=not no_cache, workers=workers)
+    
+    summary = report["summary"]
+    rules = Table(title="Compliance Rules")
+    rules.add_column("Rule", style="cyan")
+    rules.add_column("Severity")
+    rules.add_column("Violating Devices", justify="right")
+    
+    for rule in rule_set.rules:
+        count = summary["rules"][rule["name"]]
+        rules.add_row(rule["name"], rule.get("severity", "medium"),
+                      f"[red]{count}[/red]" if count else "[green]0[/green]")
+    
+    console.print(rules)
+    
+    violating = [result for result in report["devices"] if result["status"] in ("violations", "error")]
+    if violating:
+        table = Table(title="Devices With Violations")
+        table.add_column("Hostname", style="cyan")
+        table.add_column("Rule")
+        table.add_column("Problem", style="yellow")
+        
+        for result in violating[:20]:
+            if result["error"]:
+                table.add_row(result["hostname"], "", f"[red]{result['error']}[/red]")
+            for violation in result["violations"]:
+                table.add_row(result["hostname"], violation["rule"], violation["message"])
+        
+        console.print(table)
+        if len(violating) > 20:
+            console.print(f"[yellow]... and {len(violating) - 20} more devices[/yellow]")
+    
+    console.print(f"{summary['compliant']} of {summary['devices']} devices compliant, "
+                  f"{summary['violations']} with violations, {summary['no_backup']} without backup, "
+                  f"{summary['error']} errors")
+    console.print(f"[blue]Evaluated {summary['evaluated']} backups, {summary['cached']} unchanged, "
+                  f"in {summary['seconds']:.1f}s[/blue]")
+    
+    if output:
+        try:
+            write_report(report, output)
+            console.print(f"[green]✓ Report written to {output}[/green]")
+        except Exception as e:
+            console.print(f"[red]Error writing report: {str(e)}[/red]")
+
 # --- Monitoring Commands ---
 
 @cli.group()
@@ -215,6 +831,11 @@ def monitor():
 @click.option("--all", is_flag=True, help="Check all devices")
 def check_status(hostname, all):
     """Check connection status of network devices."""
+    from rich.table import Table
+    
+    inventory_manager = get_inventory_manager()
+    Monitor = get_monitor()
+    
     if not hostname and not all:
         console.print("[red]Error: Specify either a hostname or --all flag[/red]")
         return
@@ -250,18 +871,34 @@ def check_status(hostname, all):
             )
     
     console.print(table)
+    
+    from lib.alerting import flush_alerts
+    sent = flush_alerts()
+    if sent:
+        console.print(f"[yellow]Sent {sent} alert notifications[/yellow]")
 
 @monitor.command("facts")
 @click.argument("hostname")
-def get_facts(hostname):
-    """Retrieve system facts from a device."""
+@click.option("--max-age", type=click.IntRange(min=0), help="Gather facts cached longer than this many seconds")
+@click.option("--refresh", is_flag=True, help="Gather all facts, ignoring the fact cache")
+def get_facts(hostname, max_age, refresh):
+    """Retrieve system facts from a device.
+    
+    Facts are served from the fact cache while fresh; stale ones are
+    refreshed in the background for the next call.
+    """
+    from rich.table import Table
+    
+    inventory_manager = get_inventory_manager()
+    Monitor = get_monitor()
+    
     device_info = inventory_manager.get_device(hostname)
     if not device_info:
         console.print(f"[red]Error: Device {hostname} not found in inventory[/red]")
         return
     
     with console.status(f"[bold green]Gathering facts from {hostname}..."):
-        facts = Monitor.get_device_facts(device_info)
+        facts = Monitor.get_device_facts(device_info, max_age=max_age, refresh=refresh)
     
     if facts:
         # Create a table to display the facts
@@ -279,6 +916,236 @@ def get_facts(hostname):
     else:
         console.print(f"[red]Failed to retrieve facts from {hostname}[/red]")
 
+@monitor.command("interfaces")
+@click.argument("hostname", required=False)
+@click.option("--group", help="Monitor the devices in a group (default: all devices)")
+@click.option("--forks", type=click.IntRange(min=1), help="Number of devices polled in parallel")
+@click.option("--workers", type=int, help="Number of processes parsing the outputs")
+def monitor_interfaces(hostname, group, forks, workers):
+    """Show the interface status of devices.
+    
+    All devices are polled in a single Ansible run, each with its vendor's
+    command module. A single device gets a table of its interfaces, several
+    devices a summary per device.
+    """
+    from rich.table import Table
+    
+    inventory_manager = get_inventory_manager()
+    Monitor = get_monitor()
+    
+    if hostname:
+        device_info = inventory_manager.get_device(hostname)
+        if not device_info:
+            console.print(f"[red]Error: Device {hostname} not found in inventory[/red]")
+            return
+        devices = [device_info]
+    else:
+        devices = inventory_manager.list_devices(group)
+    if not devices:
+        console.print("[yellow]No devices found[/yellow]")
+        return
+    
+    with console.status(f"[bold green]Collecting interfaces of {len(devices)} devices..."):
+        results = Monitor.collect_interfaces(devices, forks=forks, workers=workers)
+    
+    if hostname:
+        result = results[hostname]
+        if not result:
+            console.print(f"[red]Failed to retrieve interfaces from {hostname}[/red]")
+            return
+        
+        table = Table(title=f"Interfaces - {hostname}")
+        table.add_column("Interface", style="cyan")
+        table.add_column("Status", style="bold")
+        table.add_column("Protocol")
+        table.add_column("Addresses", style="blue")
+        table.add_column("Speed", style="magenta")
+        table.add_column("Errors In/Out", justify="right")
+        table.add_column("Description", style="green")
+        
+        for interface in result["parsed"].values():
+            status = interface.get("status", "unknown")
+            if interface.get("admin_status") == "down":
+                status = "admin down"
+            counters = interface["counters"]
+            table.add_row(
+                interface["name"],
+                f"[green]{status}[/green]" if status == "up" else f"[red]{status}[/red]",
+                interface.get("protocol", ""),
+                ", ".join(interface["ip_addresses"]),
+                interface.get("speed", ""),
+                f"{counters.get('in_errors', '-')}/{counters.get('out_errors', '-')}",
+                interface["description"]
+            )
+        
+        console.print(table)
+        return
+    
+    table = Table(title="Interface Summary")
+    table.add_column("Hostname", style="cyan")
+    table.add_column("Device Type", style="blue")
+    table.add_column("Interfaces", justify="right")
+    table.add_column("Up", style="green", justify="right")
+    table.add_column("Down", style="red", justify="right")
+    table.add_column("Admin Down", style="yellow", justify="right")
+    table.add_column("Errors", style="magenta", justify="right")
+    
+    failed = []
+    for device in devices:
+        result = results[device["hostname"]]
+        if not result:
+            failed.append(device["hostname"])
+            continue
+        
+        interfaces = result["parsed"].values()
+        admin_down = sum(1 for interface in interfaces if interface.get("admin_status") == "down")
+        up = sum(1 for interface in interfaces if interface.get("status") == "up")
+        errors = sum(interface["counters"].get("in_errors", 0) + interface["counters"].get("out_errors", 0)
+                     for interface in interfaces)
+        table.add_row(
+            device["hostname"],
+            device["device_type"],
+            str(len(interfaces)),
+            str(up),
+            str(len(interfaces) - up - admin_down),
+            str(admin_down),
+            f"{errors:,}"
+        )
+    
+    console.print(table)
+    if failed:
+        console.print(f"[red]Failed to retrieve interfaces from: {', '.join(failed)}[/red]")
+
+@monitor.command("counters")
+@click.option("--group", help="Poll the devices in a group (default: all devices)")
+@click.option("--metric", default="errors", show_default=True,
+              help="Rate to rank interfaces by: errors, drops, packets, bytes or a single counter")
+@click.option("--top", "count", type=click.IntRange(min=1), default=10, show_default=True,
+              help="Number of interfaces to show")
+@click.option("--no-poll", is_flag=True, help="Rank the counters of earlier polls without polling")
+def interface_counters(group, metric, count, no_poll):
+    """Poll interface counters and show the interfaces with the highest rates.
+    
+    Counters are kept between runs, so rates are computed from this poll
+    and the previous one. Run the command twice to get rates.
+    """
+    from rich.table import Table
+    from lib.interface_counters import METRICS, InterfacePoller
+    
+    if metric not in METRICS:
+        console.print(f"[red]Error: Unknown metric '{metric}'. Use one of: {', '.join(METRICS)}[/red]")
+        return
+    
+    devices = get_inventory_manager().list_devices(group)
+    if not devices:
+        console.print("[yellow]No devices found[/yellow]")
+        return
+    
+    poller = InterfacePoller()
+    if not no_poll:
+        with console.status(f"[bold green]Polling interfaces of {len(devices)} devices..."):
+            result = poller.poll(devices)
+        console.print(f"[blue]Polled {result['polled']} devices, {result['interfaces']} interfaces stored[/blue]")
+        if result["failed"]:
+            console.print(f"[yellow]Could not poll: {', '.join(result['failed'])}[/yellow]")
+    
+    top = poller.store.top(metric, count, [device["hostname"] for device in devices])
+    if not top:
+        console.print(f"[yellow]No interface has a {metric} rate above zero[/yellow]")
+        return
+    
+    table = Table(title=f"Highest {metric} Rates")
+    table.add_column("Hostname", style="cyan")
+    table.add_column("Interface", style="blue")
+    table.add_column("Per Second", style="bold", justify="right")
+    table.add_column("Interval", style="magenta", justify="right")
+    
+    for entry in top:
+        table.add_row(entry["hostname"], entry["interface"], f"{entry['rate']:,.2f}", f"{entry['interval']:.0f}s")
+    
+    console.print(table)
+
+@monitor.command("exporter")
+@click.option("--group", help="Monitor the devices in a group (default: all devices)")
+@click.option("--address", help="Address to listen on (default: metrics.address)")
+@click.option("--port", type=click.IntRange(1, 65535), help="Port to listen on (default: metrics.port)")
+@click.option("--interval", type=click.IntRange(min=1),
+              help="Seconds between device checks (default: monitoring.check_interval)")
+@click.option("--interfaces/--no-interfaces", default=None,
+              help="Also collect interface counters (default: metrics.poll_interfaces)")
+def metrics_exporter(group, address, port, interval, interfaces):
+    """Serve monitoring metrics to Prometheus.
+    
+    Devices are probed, and their interfaces and backups checked, every
+    interval in the background; Prometheus scrapes /metrics, which only
+    reads what the last checks recorded. Runs until interrupted.
+    """
+    import threading
+    from lib.metrics import MetricsCollector, serve_metrics
+    
+    devices = get_inventory_manager().list_devices(group)
+    if not devices:
+        console.print("[yellow]No devices found[/yellow]")
+        return
+    
+    try:
+        server = serve_metrics(address, port)
+    except OSError as e:
+        console.print(f"[red]Error starting the metrics endpoint: {str(e)}[/red]")
+        return
+    
+    host, bound_port = server.server_address[:2]
+    console.print(f"[green]Serving metrics of {len(devices)} devices on http://{host}:{bound_port}/metrics[/green]")
+    
+    def report(result):
+        console.print(f"[blue]{result['up']} devices up, {result['down']} down, "
+                      f"checked in {result['seconds']:.1f}s[/blue]")
+    
+    collector = MetricsCollector(devices, get_config_manager().config_dir, poll_interfaces=interfaces)
+    stop_event = threading.Event()
+    try:
+        collector.run(interval, stop_event, on_collect=report)
+    except KeyboardInterrupt:
+        stop_event.set()
+    finally:
+        server.shutdown()
+        console.print("Metrics exporter stopped")
+
+@monitor.command("alerts")
+@click.option("--all", "show_all", is_flag=True, help="Also list devices that are up")
+def alert_states(show_all):
+    """Show the alert state of devices.
+    
+    States come from earlier probes (`monitor status`, `monitor exporter`):
+    a device is down after several failed probes in a row, and flapping
+    while its probes keep alternating.
+    """
+    import time
+    from rich.table import Table
+    from lib.alerting import AlertManager
+    
+    states = AlertManager().states()
+    shown = {hostname: state for hostname, state in states.items() if show_all or state["state"] != "up"}
+    if not shown:
+        console.print("[green]No devices are down or flapping[/green]" if states
+                      else "[yellow]No probe results yet[/yellow]")
+        return
+    
+    colors = {"up": "green", "down": "red", "flapping": "yellow", "unknown": "blue"}
+    table = Table(title="Device Alert States")
+    table.add_column("Hostname", style="cyan")
+    table.add_column("State", style="bold")
+    table.add_column("Since", style="magenta")
+    table.add_column("Last Probe")
+    
+    for hostname, state in sorted(shown.items()):
+        color = colors.get(state["state"], "white")
+        since = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(state["since"])) if state["since"] else "-"
+        last = {True: "answered", False: "failed"}.get(state["up"], "-")
+        table.add_row(hostname, f"[{color}]{state['state']}[/{color}]", since, last)
+    
+    console.print(table)
+
 # --- Template Commands ---
 
 @cli.group()
@@ -287,9 +1154,15 @@ def template():
     pass
 
 @template.command("list")
-def list_templates():
+@click.option("--vendor", help="Filter templates by vendor")
+@click.option("--tag", help="Filter templates by tag")
+def list_templates(vendor, tag):
     """List available configuration templates."""
-    templates = template_manager.list_templates()
+    from rich.table import Table
+    
+    template_manager = get_template_manager()
+    
+    templates = template_manager.list_templates(vendor=vendor, tag=tag)
     
     if not templates:
         console.print("[yellow]No templates available[/yellow]")
@@ -297,12 +1170,14 @@ def list_templates():
     
     table = Table(title="Available Templates")
     table.add_column("Template Name", style="cyan")
+    table.add_column("Vendor", style="blue")
+    table.add_column("Tags", style="magenta")
     table.add_column("Description", style="green")
     
     for template in templates:
         name = template["name"]
         description = template.get("description", "No description available")
-        table.add_row(name, description)
+        table.add_row(name, template.get("vendor", ""), ", ".join(template.get("tags", [])), description)
     
     console.print(table)
 
@@ -310,6 +1185,10 @@ def list_templates():
 @click.argument("template_name")
 def show_template(template_name):
     """Show content of a specific template."""
+    from rich.panel import Panel
+    
+    template_manager = get_template_manager()
+    
     content = template_manager.get_template_content(template_name)
     
     if not content:
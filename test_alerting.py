@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+NetMan Alerting Test Script
+
+This script checks the device state machine and its notifications:
+1. Devices go down, up and flapping only after enough probes
+2. A device still down gets a reminder after repeat_after seconds
+3. A notification held back by the rate limit is sent later
+4. Device states survive a restart
+"""
+import os
+import tempfile
+from lib.alerting import AlertManager, AlertSink
+
+OPTIONS = {
+    'down_after': 3,
+    'up_after': 2,
+    'flap_changes': 4,
+    'flap_window': 600,
+    'repeat_after': 3600,
+    'rate_limit': 60,
+    'state_save_interval': 60
+}
+
+class ListSink(AlertSink):
+    """Keeps the notifications it is sent."""
+
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, alerts):
+        self.alerts.extend(alerts)
+
+def _manager(directory, **options):
+    """Create a manager with a list sink and its state file in a directory."""
+    sink = ListSink()
+    manager = AlertManager([sink], os.path.join(directory, 'alert_state.json'), dict(OPTIONS, **options))
+    return manager, sink
+
+def test_state_transitions():
+    """A device changes state only after enough probes, then flaps."""
+    with tempfile.TemporaryDirectory() as directory:
+        manager, sink = _manager(directory)
+        probes = [(0, True), (10, False), (20, False), (30, False), (40, True), (50, True),
+                  (60, False), (70, True), (700, True)]
+        states = [manager.process('r1', up, timestamp) for timestamp, up in probes]
+        assert states == ['up', None, None, 'down', None, 'up', None, 'flapping', 'up']
+
+        manager.flush()
+        assert [(alert['previous'], alert['state']) for alert in sink.alerts] == [
+            ('up', 'down'), ('down', 'up'), ('up', 'flapping'), ('flapping', 'up')
+        ]
+        assert sink.alerts[0]['severity'] == 'critical'
+
+def test_reminder_and_dedupe():
+    """A device still down is reminded about once repeat_after has passed."""
+    with tempfile.TemporaryDirectory() as directory:
+        manager, sink = _manager(directory)
+        for timestamp in (0, 10, 20, 1000, 3000, 3700, 3800):
+            manager.process('r1', False, timestamp)
+        manager.flush()
+        assert [(alert['state'], alert['reminder']) for alert in sink.alerts] == [
+            ('down', False), ('down', True)
+        ]
+        assert sink.alerts[1]['message'] == "Device r1 is still down"
+
+def test_rate_limited_device_is_notified_later():
+    """A device whose notification was held back gets one once allowed."""
+    with tempfile.TemporaryDirectory() as directory:
+        manager, sink = _manager(directory, rate_limit=1)
+        for hostname in ('r1', 'r2'):
+            for timestamp in (0, 10, 20):
+                manager.process(hostname, False, timestamp)
+        assert manager.flush() == 1
+        assert sink.alerts[0]['hostname'] == 'r1'
+
+        # A minute later the bucket has one token again
+        manager._refilled -= 60
+        assert manager.flush() == 1
+        assert sink.alerts[1]['state'] == 'suppressed'
+
+        manager._refilled -= 60
+        manager.process('r2', False, 30)
+        manager.flush()
+        assert (sink.alerts[2]['hostname'], sink.alerts[2]['state']) == ('r2', 'down')
+
+def test_state_survives_restart():
+    """Saved device states and last notifications load back."""
+    with tempfile.TemporaryDirectory() as directory:
+        manager, sink = _manager(directory)
+        for timestamp in (0, 10, 20):
+            manager.process('r1', False, timestamp)
+        manager.close()
+
+        manager, sink = _manager(directory)
+        assert manager.states()['r1'] == {'state': 'down', 'since': 20, 'up': False}
+        manager.process('r1', False, 30)
+        manager.process('r1', True, 40)
+        assert manager.process('r1', True, 50) == 'up'
+        manager.flush()
+        assert [alert['state'] for alert in sink.alerts] == ['up']
+
+def main():
+    """Run all checks."""
+    for test in (test_state_transitions, test_reminder_and_dedupe,
+                 test_rate_limited_device_is_notified_later, test_state_survives_restart):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+NetMan Ansible Backends Test Script
+
+This script runs jobs through the execution backends against a fake Ansible:
+a package with PlaybookCLI.cli_executor and an `ansible-playbook` entry
+point, which print what they ran with. It checks that:
+1. Forkserver jobs run in the caller's directory and environment, and only
+   the worker imports Ansible
+2. Exit codes and stderr come back, and kill() stops the whole job
+3. Jobs with other ANSIBLE_* values run as a new process
+4. Starting the worker leaves this process's environment alone
+5. serve and shell start jobs from the forkserver backend
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from lib import ansible_runner
+from lib.ansible_backends import ForkserverBackend, SubprocessBackend
+
+FAKE_CLI = """
+import os, sys, json, time, subprocess
+
+with open(os.environ['FAKE_ANSIBLE_IMPORTS'], 'a') as f:
+    f.write(f"{os.getpid()}\\n")
+
+class PlaybookCLI:
+    @staticmethod
+    def cli_executor(args):
+        action = args[1]
+        if action == 'sleep':
+            child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+            print(json.dumps({'child': child.pid}))
+            time.sleep(float(args[2]))
+            child.kill()
+            sys.exit(0)
+        print(json.dumps({'pid': os.getpid(), 'cwd': os.getcwd(), 'fake': os.environ.get('ANSIBLE_FAKE')}))
+        if action == 'fail':
+            print("boom", file=sys.stderr)
+            sys.exit(3)
+        sys.exit(0)
+"""
+
+FAKE_ENTRY_POINT = """#!{python}
+import sys
+from ansible.cli.playbook import PlaybookCLI
+PlaybookCLI.cli_executor(sys.argv)
+"""
+
+def _write(path, text, mode=0o644):
+    """Write a file, creating its directory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+    os.chmod(path, mode)
+
+def _fake_ansible(directory):
+    """Install the fake Ansible in a directory and get the environment using it."""
+    _write(os.path.join(directory, 'ansible', '__init__.py'), '')
+    _write(os.path.join(directory, 'ansible', 'cli', '__init__.py'), '')
+    _write(os.path.join(directory, 'ansible', 'cli', 'playbook.py'), FAKE_CLI)
+    _write(os.path.join(directory, 'ansible', 'cli', 'adhoc.py'), "from .playbook import PlaybookCLI as AdHocCLI\n")
+    _write(os.path.join(directory, 'bin', 'ansible-playbook'), FAKE_ENTRY_POINT.format(python=sys.executable), 0o755)
+
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return dict(
+        os.environ,
+        PYTHONPATH=directory,
+        PATH=os.path.join(directory, 'bin') + os.pathsep + os.environ.get('PATH', ''),
+        FAKE_ANSIBLE_IMPORTS=os.path.join(directory, 'imports.txt'),
+        ANSIBLE_FAKE='1'
+    )
+
+def _run(backend, args, env):
+    """Run a job to the end; get its exit code, output lines and stderr."""
+    with tempfile.TemporaryFile() as stderr_file:
+        with backend.start(['ansible-playbook'] + args, env, stderr_file) as job:
+            lines = [json.loads(line) for line in job.stdout]
+        stderr_file.seek(0)
+        return job.returncode, lines, stderr_file.read().decode()
+
+def _imports(env):
+    """Get the pids of the processes that imported the fake Ansible."""
+    with open(env['FAKE_ANSIBLE_IMPORTS']) as f:
+        return [int(line) for line in f]
+
+def _stop(backend):
+    """Stop a forkserver backend's worker."""
+    backend._control.close()
+    backend._server.wait(5)
+
+def _running(pid):
+    """Whether a process exists and is not a zombie."""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+def test_forkserver_jobs():
+    """Forkserver jobs get the caller's directory and environment; Ansible is imported once."""
+    with tempfile.TemporaryDirectory() as directory:
+        env = _fake_ansible(directory)
+        backend = ForkserverBackend()
+        try:
+            results = [_run(backend, ['run'], env) for _ in range(3)]
+        finally:
+            _stop(backend)
+
+        assert [returncode for returncode, _, _ in results] == [0, 0, 0]
+        outputs = [lines[0] for _, lines, _ in results]
+        assert all(output['cwd'] == os.getcwd() and output['fake'] == '1' for output in outputs)
+        assert _imports(env) == [backend._server.pid]
+        assert len({output['pid'] for output in outputs} | {backend._server.pid}) == 4
+
+def test_exit_code_and_kill():
+    """Exit codes and stderr come back, and kill() stops the job's processes."""
+    with tempfile.TemporaryDirectory() as directory:
+        env = _fake_ansible(directory)
+        backend = ForkserverBackend()
+        try:
+            returncode, _, stderr = _run(backend, ['fail'], env)
+            assert returncode == 3 and stderr == "boom\n"
+
+            with tempfile.TemporaryFile() as stderr_file:
+                job = backend.start(['ansible-playbook', 'sleep', '60'], env, stderr_file)
+                child = json.loads(job.stdout.readline())['child']
+                assert job.poll() is None
+                job.kill()
+                assert job.wait() == -9
+                job.stdout.close()
+
+            deadline = time.monotonic() + 5
+            while _running(child) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert not _running(child)
+        finally:
+            _stop(backend)
+
+def test_concurrent_jobs():
+    """Jobs started from several threads run at the same time."""
+    with tempfile.TemporaryDirectory() as directory:
+        env = _fake_ansible(directory)
+        backend = ForkserverBackend()
+        _run(backend, ['run'], env)
+        results = []
+        try:
+            start_time = time.monotonic()
+            threads = [threading.Thread(target=lambda: results.append(_run(backend, ['sleep', '1'], env)))
+                       for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert time.monotonic() - start_time < 2.5
+        finally:
+            _stop(backend)
+        assert [returncode for returncode, _, _ in results] == [0, 0, 0]
+
+def test_other_ansible_vars_use_a_new_process():
+    """A job with other ANSIBLE_* values runs the ansible-playbook entry point."""
+    with tempfile.TemporaryDirectory() as directory:
+        env = _fake_ansible(directory)
+        backend = ForkserverBackend()
+        try:
+            _run(backend, ['run'], env)
+            returncode, lines, _ = _run(backend, ['run'], dict(env, ANSIBLE_FAKE='2'))
+        finally:
+            _stop(backend)
+
+        assert returncode == 0 and lines[0]['fake'] == '2'
+        assert len(_imports(env)) == 2 and lines[0]['pid'] == _imports(env)[1]
+        assert _run(SubprocessBackend(), ['fail'], env)[0] == 3
+
+def test_environment_untouched():
+    """Starting the worker does not change this process's environment."""
+    with tempfile.TemporaryDirectory() as directory:
+        env = _fake_ansible(directory)
+        before = dict(os.environ)
+        backend = ForkserverBackend()
+        try:
+            _run(backend, ['run'], env)
+        finally:
+            _stop(backend)
+        assert dict(os.environ) == before
+
+def test_long_lived_default_backend():
+    """serve and shell start jobs from the forkserver backend."""
+    assert ansible_runner.AnsibleRunner(backend='subprocess').backend == 'subprocess'
+    ansible_runner.mark_long_lived()
+    try:
+        assert ansible_runner.AnsibleRunner().backend == 'forkserver'
+    finally:
+        ansible_runner._long_lived = False
+
+def main():
+    """Run all checks."""
+    for test in (test_forkserver_jobs, test_exit_code_and_kill, test_concurrent_jobs,
+                 test_other_ansible_vars_use_a_new_process, test_environment_untouched,
+                 test_long_lived_default_backend):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
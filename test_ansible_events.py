@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+NetMan Ansible Events Test Script
+
+This script feeds Ansible callback output to the event parser and the
+result collector, and runs a fake `ansible` printing it. It checks that:
+1. jsonl callback lines become NetMan events as they arrive, and lines
+   that are not JSON are ignored
+2. Per-host results keep counters, failures and the ansible_result fact,
+   and the play recap replaces the counted totals
+3. Output of the plain json callback is parsed when the run ends
+4. Module runs take their results from the events, and their error from
+   the end of stderr
+"""
+import sys
+import json
+from lib.ansible_events import EventParser, ResultCollector, host_finished
+from lib.ansible_runner import AnsibleRunner
+
+JSONL_EVENTS = [
+    {'_event': 'v2_playbook_on_play_start', 'play': {'name': 'Backup'}},
+    {'_event': 'v2_playbook_on_task_start', 'task': {'name': 'Get config'}},
+    {'_event': 'v2_runner_on_ok', 'hosts': {'r1': {'changed': True, 'stdout': 'hostname r1'}}},
+    {'_event': 'v2_runner_on_failed', 'hosts': {'r2': {'msg': 'Auth failed'}}},
+    {'_event': 'v2_playbook_on_task_start', 'task': {'name': 'Report'}},
+    {'_event': 'v2_runner_on_ok', 'hosts': {'r1': {'ansible_facts': {'ansible_result': {'success': True}}}}},
+    {'_event': 'v2_playbook_on_stats', 'stats': {
+        'r1': {'ok': 2, 'changed': 1, 'failures': 0, 'unreachable': 0, 'skipped': 0},
+        'r2': {'ok': 0, 'changed': 0, 'failures': 1, 'unreachable': 0, 'skipped': 0}
+    }}
+]
+
+# Fake ansible: prints jsonl events for one host, then exits with argv[1]
+FAKE_ANSIBLE = """
+import sys, json
+print("[WARNING]: noise that is not JSON")
+print(json.dumps({'_event': 'v2_runner_on_ok', 'task': {'name': 'ping'},
+                  'hosts': {'r1': {'ping': 'pong', 'changed': False}}}))
+print("Authentication failed", file=sys.stderr)
+sys.exit(int(sys.argv[1]))
+"""
+
+class FakeAnsibleRunner(AnsibleRunner):
+    """Runs the fake ansible script instead of ansible."""
+
+    def __init__(self, returncode):
+        super().__init__(backend='subprocess')
+        self.returncode = returncode
+
+    @classmethod
+    def _get_simulator(cls):
+        # Test scripts run before this one may have set NETMAN_DEMO_MODE
+        return None
+
+    def _module_command(self, host, module, module_args, forks):
+        return [sys.executable, '-c', FAKE_ANSIBLE, str(self.returncode)]
+
+def test_jsonl_events():
+    """Each jsonl line gives its events straight away."""
+    parser = EventParser()
+    events = [event for document in JSONL_EVENTS for event in parser.parse(json.dumps(document) + '\n')]
+
+    assert [event['type'] for event in events] == [
+        'play_start', 'task_start', 'host_changed', 'host_failed', 'task_start', 'host_ok', 'recap'
+    ]
+    assert events[3]['play'] == 'Backup' and events[3]['task'] == 'Get config' and events[3]['host'] == 'r2'
+    assert [host_finished(event) for event in events] == [False, False, False, True, False, True, False]
+    assert parser.finish() == []
+
+def test_collected_results():
+    """Results per host come from the events and the recap."""
+    collector = ResultCollector()
+    for event in JSONL_EVENTS:
+        collector.feed(json.dumps(event))
+    collector.feed(json.dumps({'_event': 'v2_runner_on_failed', 'task': {'name': 'Optional'},
+                               'hosts': {'r3': {'msg': 'No such file', 'ignore_errors': True}}}))
+    hosts = collector.finish()
+
+    assert hosts['r1']['success'] and hosts['r1']['ansible_result'] == {'success': True}
+    assert (hosts['r1']['ok'], hosts['r1']['changed']) == (2, 1)
+    assert not hosts['r2']['success'] and hosts['r2']['failed'] == 1
+    assert hosts['r2']['failures'] == [{'task': 'Get config', 'status': 'failed', 'msg': 'Auth failed'}]
+    assert hosts['r3']['success'] and hosts['r3']['failures'][0]['task'] == 'Optional'
+
+def test_plain_json_callback():
+    """A multi-line json callback document is parsed by finish()."""
+    document = {
+        'plays': [{'play': {'name': 'Facts'}, 'tasks': [{
+            'task': {'name': 'Gather'},
+            'hosts': {'r1': {'changed': False}, 'r2': {'unreachable': True, 'msg': 'Timeout'}}
+        }]}],
+        'stats': {'r1': {'ok': 1, 'failures': 0, 'unreachable': 0}, 'r2': {'ok': 0, 'failures': 0, 'unreachable': 1}}
+    }
+    collector = ResultCollector()
+    collector.feed("[WARNING]: Could not match supplied host pattern\n")
+    for line in json.dumps(document, indent=4).splitlines(keepends=True):
+        collector.feed(line)
+    assert collector.hosts == {}
+
+    hosts = collector.finish()
+    assert hosts['r1']['success'] and hosts['r1']['ok'] == 1
+    assert not hosts['r2']['success'] and hosts['r2']['failures'][0]['status'] == 'unreachable'
+
+def test_module_run():
+    """A module run returns the host's result, or stderr when ansible fails."""
+    result = FakeAnsibleRunner(0).run_module('r1', 'ping')
+    assert result['success'] and result['ping'] == 'pong'
+    assert result['hosts']['r1']['ok'] == 1
+
+    failed = FakeAnsibleRunner(4).run_module('r1', 'ping')
+    assert not failed['success'] and failed['error'] == "Authentication failed"
+
+def main():
+    """Run all checks."""
+    for test in (test_jsonl_events, test_collected_results, test_plain_json_callback, test_module_run):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+NetMan Asynchronous Runner Test Script
+
+This script runs AsyncAnsibleRunner jobs against a fake Ansible command,
+a small Python script, and checks that:
+1. A job that runs out of time is stopped and reported as timed out
+2. Cancelling a job stops its whole process group
+3. The limiter never lets more than max_concurrent_jobs run at once
+4. Playbook jobs end with a run_end event carrying timed_out
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+from lib.async_runner import AsyncAnsibleRunner
+
+# Fake Ansible: records start and end times, leaves a grandchild process
+# behind and sleeps; argv is the record file and the seconds to sleep
+FAKE_ANSIBLE = """
+import sys, time, subprocess
+record, seconds = sys.argv[1], float(sys.argv[2])
+child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+with open(record, 'a') as f:
+    f.write(f"start {time.time()} {child.pid}\\n")
+time.sleep(seconds)
+with open(record, 'a') as f:
+    f.write(f"end {time.time()}\\n")
+child.kill()
+"""
+
+class FakeAnsibleRunner(AsyncAnsibleRunner):
+    """Runs the fake Ansible script instead of ansible and ansible-playbook."""
+
+    def __init__(self, directory, seconds, **options):
+        super().__init__(log_dir=directory, **options)
+        self.record = os.path.join(directory, 'record.txt')
+        self.seconds = seconds
+
+    @classmethod
+    def _get_simulator(cls):
+        # Test scripts run before this one may have set NETMAN_DEMO_MODE
+        return None
+
+    def _module_command(self, host, module, module_args, forks):
+        return [sys.executable, '-c', FAKE_ANSIBLE, self.record, str(self.seconds)]
+
+    def _playbook_command(self, playbook_path, extra_vars, limit, forks, job_files):
+        return self._module_command(limit, None, None, forks)
+
+    def records(self, kind):
+        """Get the fields of the record lines of one kind."""
+        with open(self.record) as f:
+            return [line.split()[1:] for line in f if line.startswith(kind)]
+
+def _running(pid):
+    """Whether a process exists and is not a zombie."""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+def _wait_stopped(pid, seconds=5):
+    """Wait for a process to stop; True if it did."""
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if not _running(pid):
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_timeout():
+    """A job over its time limit is stopped with everything it started."""
+    with tempfile.TemporaryDirectory() as directory:
+        runner = FakeAnsibleRunner(directory, 30)
+        start_time = time.monotonic()
+        result = asyncio.run(runner.run_module_async('r1', 'ping', timeout=1))
+
+        assert result['timed_out'] and not result['success']
+        assert result['error'] == "Timed out after 1 seconds"
+        assert time.monotonic() - start_time < 5
+        (_, grandchild), = runner.records('start')
+        assert _wait_stopped(int(grandchild))
+        assert runner.records('end') == []
+
+def test_cancel():
+    """Cancelling the calling task stops the job's process group."""
+    async def cancel_job(runner):
+        job = asyncio.create_task(runner.run_module_async('r1', 'ping'))
+        while not os.path.exists(runner.record):
+            await asyncio.sleep(0.05)
+        job.cancel()
+        try:
+            await job
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    with tempfile.TemporaryDirectory() as directory:
+        runner = FakeAnsibleRunner(directory, 30)
+        assert asyncio.run(cancel_job(runner))
+        (_, grandchild), = runner.records('start')
+        assert _wait_stopped(int(grandchild))
+
+def test_limiter():
+    """At most max_concurrent_jobs jobs run at the same time."""
+    async def run_jobs(runner):
+        return await asyncio.gather(*(runner.run_module_async(f'r{n}', 'ping') for n in range(5)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        runner = FakeAnsibleRunner(directory, 0.5, max_concurrent_jobs=2)
+        results = asyncio.run(run_jobs(runner))
+        assert all(result['success'] for result in results)
+
+        changes = sorted([(float(start), 1) for start, _ in runner.records('start')] +
+                         [(float(end), -1) for end, in runner.records('end')])
+        running = peak = 0
+        for _, change in changes:
+            running += change
+            peak = max(peak, running)
+        assert peak == 2
+
+def test_playbook_run_end():
+    """A timed-out playbook job ends with a run_end event saying so."""
+    async def collect(runner):
+        events = []
+        result = await runner.run_playbook_async('playbooks/backup_config.yml', {'target_host': 'r1'},
+                                                 timeout=1, on_event=events.append)
+        return result, events
+
+    with tempfile.TemporaryDirectory() as directory:
+        runner = FakeAnsibleRunner(directory, 30)
+        result, events = asyncio.run(collect(runner))
+        assert not result['success']
+        assert events[-1]['type'] == 'run_end' and events[-1]['timed_out']
+        assert os.path.exists(events[-1]['log_file'])
+
+def main():
+    """Run all checks."""
+    for test in (test_timeout, test_cancel, test_limiter, test_playbook_run_end):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
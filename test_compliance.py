@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+NetMan Compliance Test Script
+
+This script checks devices against the cisco_base golden template, with
+backups written for the test, and checks that:
+1. A device whose backup matches the template is compliant, and drift is
+   reported per section with the lines a delta push would send
+2. Results are cached until a device's backup changes
+3. Unchanged sections are matched by digest, ignoring line numbers
+4. JSON, CSV and HTML reports hold every device
+"""
+import os
+import csv
+import json
+import tempfile
+import yaml
+from lib.compliance import ComplianceChecker, write_report
+from lib.config_parser import parse
+from lib.template_manager import TemplateManager
+from lib.vars_loader import VarsLoader
+
+GROUP_VARS = {
+    'interfaces': [{'name': 'GigabitEthernet0/1', 'description': 'LAN',
+                    'ip': '10.0.0.1', 'netmask': '255.255.255.0'}],
+    'routing': True,
+    'ospf': {'process_id': 1, 'networks': [{'address': '10.0.0.0', 'wildcard': '0.0.0.255', 'area': 0}]}
+}
+
+# Backup of a device the cisco_base template was applied to
+BACKUP = """Building configuration...
+!
+hostname {hostname}
+!
+ip ssh version 2
+ip ssh authentication-retries 3
+ip ssh time-out 60
+!
+interface GigabitEthernet0/1
+ description LAN
+ ip address 10.0.0.1 255.255.255.0
+ no shutdown
+!
+router ospf 1
+ network 10.0.0.0 0.0.0.255 area 0
+!
+line vty 0 4
+ login local
+ transport input ssh
+!
+end
+"""
+
+DEVICES = [
+    {'hostname': 'r1', 'device_type': 'cisco_ios', 'groups': ['core']},
+    {'hostname': 'r2', 'device_type': 'cisco_ios', 'groups': ['core']},
+    {'hostname': 'r3', 'device_type': 'cisco_ios', 'groups': ['core']}
+]
+
+def _write(path, text):
+    """Write a file, creating its directory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+def _checker(directory):
+    """Create a checker with r1 matching cisco_base, r2 drifting and r3 without a backup."""
+    _write(os.path.join(directory, 'vars', 'group_vars', 'all.yml'), yaml.safe_dump(GROUP_VARS))
+    for device in DEVICES:
+        hostname = device['hostname']
+        _write(os.path.join(directory, 'vars', 'host_vars', f"{hostname}.yml"), f"hostname: {hostname}\n")
+
+    _write(os.path.join(directory, 'configs', 'r1', 'r1_latest.cfg'), BACKUP.format(hostname='r1'))
+    _write(os.path.join(directory, 'configs', 'r2', 'r2_latest.cfg'),
+           BACKUP.format(hostname='r2').replace(" login local\n", ""))
+
+    template_manager = TemplateManager('templates')
+    template_manager.vars_loader = VarsLoader(os.path.join(directory, 'vars'))
+    return ComplianceChecker(template_manager, os.path.join(directory, 'configs'),
+                             os.path.join(directory, 'compliance_cache.json'))
+
+def test_check():
+    """Matching devices are compliant and drift lists the missing lines."""
+    with tempfile.TemporaryDirectory() as directory:
+        report = _checker(directory).check('cisco_base', DEVICES)
+        r1, r2, r3 = report['devices']
+
+        assert r1['status'] == 'compliant' and r1['sections'] == []
+        assert r2['status'] == 'drift'
+        assert r2['sections'] == [{'section': 'line vty 0 4', 'missing': ['line vty 0 4', ' login local']}]
+        assert r2['delta_lines'] == 2
+        assert r3['status'] == 'no_backup'
+        assert report['summary']['compliance_percent'] == 50.0
+
+def test_cache():
+    """A second check reuses results until a backup changes."""
+    with tempfile.TemporaryDirectory() as directory:
+        checker = _checker(directory)
+        first = checker.check('cisco_base', DEVICES)
+        assert first['summary']['checked'] == 3
+
+        second = checker.check('cisco_base', DEVICES)
+        assert second['summary']['cached'] == 3
+        assert second['devices'] == first['devices']
+
+        _write(os.path.join(directory, 'configs', 'r2', 'r2_latest.cfg'), BACKUP.format(hostname='r2'))
+        third = checker.check('cisco_base', DEVICES)
+        assert third['summary']['checked'] == 1
+        assert [result['status'] for result in third['devices']] == ['compliant', 'compliant', 'no_backup']
+
+        assert checker.check('cisco_base', DEVICES, use_cache=False)['summary']['checked'] == 3
+
+def test_section_digest():
+    """Sections with the same lines have the same digest wherever they are."""
+    intended = parse("line vty 0 4\n transport input ssh\n exit\n", 'cisco_ios').get('line vty 0 4')
+    running = parse(BACKUP.format(hostname='r1').replace(" login local\n", ""), 'cisco_ios')
+
+    assert intended.digest() == running.get('line vty 0 4').digest()
+    assert intended.digest() != parse(BACKUP.format(hostname='r1'), 'cisco_ios').get('line vty 0 4').digest()
+
+def test_reports():
+    """Reports in every format hold a row per device."""
+    with tempfile.TemporaryDirectory() as directory:
+        report = _checker(directory).check('cisco_base', DEVICES)
+
+        json_file = os.path.join(directory, 'report.json')
+        write_report(report, json_file)
+        with open(json_file) as f:
+            assert json.load(f) == report
+
+        csv_file = os.path.join(directory, 'report.csv')
+        write_report(report, csv_file)
+        with open(csv_file, newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert [(row['hostname'], row['status'], row['sections']) for row in rows] == [
+            ('r1', 'compliant', ''), ('r2', 'drift', 'line vty 0 4'), ('r3', 'no_backup', '')
+        ]
+
+        html_file = os.path.join(directory, 'report.txt')
+        write_report(report, html_file, 'html')
+        with open(html_file) as f:
+            page = f.read()
+        assert "1 of 3 devices compliant, 1 drifting, 1 without backup" in page
+        assert '<td class="drift">drift</td>' in page
+        assert "<pre>line vty 0 4\n login local</pre>" in page
+
+def main():
+    """Run all checks."""
+    for test in (test_check, test_cache, test_section_digest, test_reports):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+NetMan Compliance Rules Test Script
+
+This script checks backups against the shipped rules file and rules written
+for the test, and checks that:
+1. forbid, require, match and section rules report the lines concerned,
+   and rules for other device types are skipped
+2. Patterns matching the same line are all reported
+3. Invalid rules are refused with the reason
+4. Results are cached per backup until its content or the rules change,
+   and reports list every violation
+"""
+import os
+import csv
+import time
+import tempfile
+from lib.compliance_rules import RuleSet, RuleChecker, load_rules, write_report
+
+BACKUP = """hostname r1
+snmp-server community public RO
+ntp server 10.0.0.10
+ntp server 10.9.9.9
+ip http server
+line vty 0 4
+ transport input telnet ssh
+line vty 5 15
+ transport input ssh
+end
+"""
+
+def test_shipped_rules():
+    """The shipped rules find the violations of a backup."""
+    rule_set = load_rules('config/compliance_rules.yml')
+    violations = {violation['rule']: violation for violation in rule_set.evaluate(BACKUP, 'cisco_ios')}
+
+    assert sorted(violations) == ['no-http-server', 'no-public-snmp', 'ntp-servers', 'vty-ssh-only']
+    assert violations['no-public-snmp']['lines'] == [{'line': 2, 'text': 'snmp-server community public RO'}]
+    assert violations['ntp-servers']['message'] == "Missing 10.0.0.11; Unexpected 10.9.9.9"
+    assert violations['vty-ssh-only']['message'] == "Required line missing in 1 section(s)"
+    assert violations['vty-ssh-only']['lines'] == [{'line': 6, 'text': 'line vty 0 4'}]
+    assert violations['no-http-server']['lines'] == []
+
+    juniper = rule_set.evaluate(BACKUP, 'juniper_junos')
+    assert 'no-http-server' not in {violation['rule'] for violation in juniper}
+
+def test_overlapping_patterns():
+    """Every rule whose pattern matches a line reports it."""
+    rule_set = RuleSet([
+        {'name': 'ntp', 'match': 'ntp server (\\S+)', 'values': ['10.0.0.10']},
+        {'name': 'no-lab-ntp', 'forbid': 'ntp server 10\\.9\\.'},
+        {'name': 'telnet', 'section': 'line vty', 'forbid': 'transport input .*telnet'}
+    ])
+    violations = {violation['rule']: violation for violation in rule_set.evaluate(BACKUP)}
+
+    assert violations['ntp']['message'] == "Unexpected 10.9.9.9"
+    assert violations['no-lab-ntp']['lines'] == [{'line': 4, 'text': 'ntp server 10.9.9.9'}]
+    assert violations['telnet']['lines'] == [{'line': 7, 'text': 'transport input telnet ssh'}]
+
+def test_invalid_rules():
+    """Malformed rules are refused with what is wrong."""
+    cases = [
+        ([{'forbid': 'x'}], "Rule 1 has no name"),
+        ([{'name': 'a', 'forbid': 'x', 'require': 'y'}], "Rule a needs exactly one of forbid, require or match"),
+        ([{'name': 'a', 'match': 'x (\\S+)'}], "Rule a needs a list of values to match"),
+        ([{'name': 'a', 'forbid': '(?P<word>x)'}], "Rule a uses named groups in its forbid pattern"),
+        ([{'name': 'a', 'forbid': 'x', 'severity': 'urgent'}], "Rule a has unknown severity urgent"),
+        ([{'name': 'a', 'forbid': 'x'}, {'name': 'a', 'require': 'y'}], "Duplicate rule names: a")
+    ]
+    for rules, message in cases:
+        try:
+            RuleSet(rules)
+            assert False, f"accepted {rules}"
+        except ValueError as e:
+            assert str(e) == message, str(e)
+
+def _write(path, text, mtime=None):
+    """Write a file, creating its directory, optionally with a modification time."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+    if mtime:
+        os.utime(path, (mtime, mtime))
+
+def test_checker_cache_and_report():
+    """Unchanged backups are not evaluated again; reports have a row per violation."""
+    devices = [{'hostname': 'r1', 'device_type': 'cisco_ios'}, {'hostname': 'r2', 'device_type': 'cisco_ios'}]
+    rules = [{'name': 'no-public-snmp', 'forbid': 'snmp-server community public'}]
+
+    with tempfile.TemporaryDirectory() as directory:
+        backup_file = os.path.join(directory, 'configs', 'r1', 'r1_latest.cfg')
+        cache_file = os.path.join(directory, 'rules_cache.json')
+        _write(backup_file, BACKUP, time.time() - 60)
+        checker = RuleChecker(RuleSet(rules), os.path.join(directory, 'configs'), cache_file)
+
+        report = checker.check(devices)
+        assert [result['status'] for result in report['devices']] == ['violations', 'no_backup']
+        assert report['summary']['evaluated'] == 1 and report['summary']['rules'] == {'no-public-snmp': 1}
+
+        assert checker.check(devices)['summary']['cached'] == 1
+
+        # A new backup with the same content is hashed but not evaluated
+        _write(backup_file, BACKUP)
+        assert checker.check(devices)['summary']['evaluated'] == 0
+
+        _write(backup_file, BACKUP.replace('public', 'n3tm4n'))
+        assert checker.check(devices)['devices'][0]['status'] == 'compliant'
+
+        stricter = RuleChecker(RuleSet(rules + [{'name': 'ssh', 'require': 'ip ssh version 2$'}]),
+                               os.path.join(directory, 'configs'), cache_file)
+        report = stricter.check(devices)
+        assert report['summary']['evaluated'] == 1 and report['summary']['rules'] == {'no-public-snmp': 0, 'ssh': 1}
+
+        csv_file = os.path.join(directory, 'report.csv')
+        write_report(report, csv_file)
+        with open(csv_file, newline='') as f:
+            rows = [(row['hostname'], row['status'], row['rule'], row['message']) for row in csv.DictReader(f)]
+        assert rows == [('r1', 'violations', 'ssh', 'Required line missing'), ('r2', 'no_backup', '', '')]
+
+def main():
+    """Run all checks."""
+    for test in (test_shipped_rules, test_overlapping_patterns, test_invalid_rules, test_checker_cache_and_report):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
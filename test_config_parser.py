@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+NetMan Configuration Parser Test Script
+
+This script checks that configurations parse into the expected trees:
+1. Access lists keep repeated entries such as remarks, in order
+2. Cached trees come back the same
+3. Delta and drift pair repeated lines by occurrence
+4. Set commands, curly-brace Junos and PAN-OS XML give the same tree
+5. Section exits and exec-mode commands of a rendered template are not
+   configuration, so a device that matches it needs no delta
+"""
+from lib.config_parser import parse, _to_tuple, _from_tuple
+from lib.config_diff import config_delta, section_drift
+from lib.template_manager import TemplateManager
+
+IOS_CONFIG = """!
+ip access-list extended WEB
+ remark ----
+ permit tcp any any eq 80
+ remark ----
+ permit tcp any any eq 443
+access-list 10 remark mgmt
+access-list 10 permit 10.0.0.0 0.0.0.255
+access-list 10 remark mgmt
+interface GigabitEthernet0/1
+ description LAN
+ no shutdown
+end
+"""
+
+def test_acls_keep_repeated_entries():
+    """Repeated ACL lines stay separate entries in config order."""
+    acls = parse(IOS_CONFIG, 'cisco_ios').acls()
+    assert acls['WEB'] == [
+        'remark ----', 'permit tcp any any eq 80',
+        'remark ----', 'permit tcp any any eq 443'
+    ]
+    assert acls['10'] == ['remark mgmt', 'permit 10.0.0.0 0.0.0.255', 'remark mgmt']
+
+def test_cached_tree_round_trip():
+    """A tree rebuilt from its cached form has the same lines and lookups."""
+    tree = parse(IOS_CONFIG, 'cisco_ios')
+    root = _from_tuple(_to_tuple(tree.root))
+    assert root.lines() == tree.root.lines()
+    assert len(root.named('access-list 10 remark mgmt')) == 2
+    assert root.get('interface GigabitEthernet0/1', 'no shutdown') is not None
+
+def test_delta_pairs_repeated_lines():
+    """Only the second remark and its entry are missing from the device."""
+    running = "ip access-list extended WEB\n remark ----\n permit tcp any any eq 80\n"
+    intended = ("ip access-list extended WEB\n remark ----\n permit tcp any any eq 80\n"
+                " remark ----\n permit tcp any any eq 443\n")
+    assert config_delta(intended, running) == (
+        "ip access-list extended WEB\n remark ----\n permit tcp any any eq 443\n"
+    )
+    assert config_delta(intended, intended) == ''
+    assert section_drift(intended, running) == [{
+        'section': 'ip access-list extended WEB',
+        'missing': ['ip access-list extended WEB', ' remark ----', ' permit tcp any any eq 443']
+    }]
+
+def test_set_formats_give_the_same_tree():
+    """Set commands, Junos statements and PAN-OS XML merge repeated words."""
+    set_tree = parse("set interfaces ge-0/0/0 unit 0 family inet\n"
+                     "set interfaces ge-0/0/0 description uplink\n")
+    junos_tree = parse("interfaces {\n    ge-0/0/0 {\n        description uplink;\n"
+                       "        unit 0 {\n            family inet;\n        }\n    }\n}\n")
+    assert sorted(set_tree.root.paths()) == sorted(junos_tree.root.paths())
+    assert list(set_tree.interfaces()) == ['ge-0/0/0']
+
+    xml_tree = parse('<config><devices><entry name="localhost.localdomain"><network><interface>'
+                     '<ethernet><entry name="ethernet1/1"/></ethernet></interface></network>'
+                     '</entry></devices></config>')
+    assert xml_tree.format == 'xml'
+    assert list(xml_tree.interfaces()) == ['ethernet1/1']
+
+BASE_VARS = {
+    'hostname': 'r1',
+    'interfaces': [{'name': 'GigabitEthernet0/1', 'description': 'LAN',
+                    'ip': '10.0.0.1', 'netmask': '255.255.255.0'}],
+    'routing': True,
+    'ospf': {'process_id': 1, 'networks': [{'address': '10.0.0.0', 'wildcard': '0.0.0.255', 'area': 0}]}
+}
+
+# Running config of a device the cisco_base template was applied to
+BASE_RUNNING = """Building configuration...
+
+Current configuration : 1024 bytes
+!
+version 15.2
+hostname r1
+!
+ip ssh time-out 60
+ip ssh authentication-retries 3
+ip ssh version 2
+!
+interface GigabitEthernet0/1
+ description LAN
+ ip address 10.0.0.1 255.255.255.0
+ no shutdown
+!
+router ospf 1
+ network 10.0.0.0 0.0.0.255 area 0
+!
+line con 0
+line vty 0 4
+ login local
+ transport input ssh
+!
+end
+"""
+
+def test_template_exits_are_not_config():
+    """A rendered cisco_base needs no delta on a device that already has it."""
+    intended = TemplateManager().render_template('cisco_base', variables=BASE_VARS)
+    lines = parse(intended, 'cisco_ios').root.lines()
+    assert 'write memory' not in lines and not any(line.strip() == 'exit' for line in lines)
+    assert parse(intended, 'cisco_ios').get('line vty 0 4').lines() == ['transport input ssh', 'login local']
+
+    assert config_delta(intended, BASE_RUNNING) == ''
+    assert section_drift(intended, BASE_RUNNING) == []
+
+    running = BASE_RUNNING.replace(" login local\n", "")
+    assert config_delta(intended, running) == "line vty 0 4\n login local\n"
+
+def main():
+    """Run all checks."""
+    for test in (test_acls_keep_repeated_entries, test_cached_tree_round_trip,
+                 test_delta_pairs_repeated_lines, test_set_formats_give_the_same_tree,
+                 test_template_exits_are_not_config):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+NetMan Fact Cache Test Script
+
+This script checks the fact cache and the facts command's use of it, with
+gathering replaced by a fake that writes the cache like Ansible would:
+1. Subsets are fresh until their TTL or the given max age passes, and lose
+   their timestamps when Ansible's cache file is gone
+2. Fresh facts are served without gathering, and missing subsets are
+   gathered before answering
+3. One-off commands gather facts past their TTL, falling back to the cache
+4. Long-lived processes answer from the cache and refresh in the
+   background, once per device, reporting a failed refresh later
+"""
+import os
+import json
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from lib import ansible_runner, monitoring
+from lib.fact_cache import FactCache, CACHE_PREFIX, FACT_SUBSETS
+from lib.monitoring import Monitor
+
+DEVICE = {'hostname': 'r1', 'device_type': 'cisco_ios'}
+
+NET_FACTS = {'ansible_net_hostname': 'r1', 'ansible_net_version': '15.2', 'ansible_net_model': 'C2901'}
+
+def _gathered(cache, subsets, age=0):
+    """Write a device's facts like Ansible and record subsets as gathered age seconds ago."""
+    os.makedirs(cache.cache_dir, exist_ok=True)
+    with open(os.path.join(cache.cache_dir, CACHE_PREFIX + 'r1'), 'w') as f:
+        json.dump(NET_FACTS, f)
+    cache.store('r1', subsets, {'status': ['r1 uptime is 2 days']})
+
+    record_file = os.path.join(cache.cache_dir, 'netman_r1.json')
+    with open(record_file) as f:
+        record = json.load(f)
+    for subset in subsets:
+        record['gathered'][subset] -= age
+    with open(record_file, 'w') as f:
+        json.dump(record, f)
+
+@contextmanager
+def _fake_gathering(directory, succeed=True, release=None):
+    """Replace fact gathering; yields the list of gathered subset lists."""
+    calls = []
+
+    def gather_facts(cls, device_info, subsets, cache):
+        calls.append(list(subsets))
+        if release is not None:
+            release.wait(5)
+        if not succeed:
+            return None
+        _gathered(cache, subsets)
+        return cache.load(device_info['hostname'])
+
+    original_gather, original_cache = Monitor.__dict__['_gather_facts'], monitoring.FactCache
+    demo_mode = monitoring.DEMO_MODE
+    Monitor._gather_facts = classmethod(gather_facts)
+    monitoring.FactCache = lambda: FactCache(directory)
+    # Other test scripts run in demo mode, where the simulator answers
+    monitoring.DEMO_MODE = False
+    try:
+        yield calls
+    finally:
+        Monitor._gather_facts = original_gather
+        monitoring.FactCache = original_cache
+        monitoring.DEMO_MODE = demo_mode
+        ansible_runner._long_lived = False
+        Monitor._refresh_errors.clear()
+
+def test_freshness():
+    """Subsets go stale after their TTL or max_age."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = FactCache(directory)
+        assert cache.stale_subsets(cache.load('r1')) == list(FACT_SUBSETS)
+
+        _gathered(cache, FACT_SUBSETS, age=600)
+        entry = cache.load('r1')
+        assert entry['facts'] == NET_FACTS and entry['status'] == ['r1 uptime is 2 days']
+        assert cache.stale_subsets(entry) == ['status']
+        assert cache.stale_subsets(entry, max_age=60) == list(FACT_SUBSETS)
+        assert cache.stale_subsets(entry, max_age=3600) == []
+
+        os.remove(os.path.join(directory, CACHE_PREFIX + 'r1'))
+        assert list(cache.load('r1')['gathered']) == ['status']
+
+def test_fresh_and_missing():
+    """Fresh facts need no gathering; missing subsets are gathered first."""
+    with tempfile.TemporaryDirectory() as directory:
+        with _fake_gathering(directory) as calls:
+            facts = Monitor.get_device_facts(DEVICE)
+            assert calls == [list(FACT_SUBSETS)]
+            assert facts['version'] == '15.2' and facts['uptime'] == '2 days'
+
+            Monitor.get_device_facts(DEVICE)
+            assert len(calls) == 1
+
+            Monitor.get_device_facts(DEVICE, refresh=True)
+            assert calls[-1] == list(FACT_SUBSETS)
+
+def test_one_off_commands():
+    """Past their TTL, one-off commands gather and fall back to the cache."""
+    with tempfile.TemporaryDirectory() as directory:
+        _gathered(FactCache(directory), FACT_SUBSETS, age=600)
+        with _fake_gathering(directory, succeed=False) as calls:
+            facts = Monitor.get_device_facts(DEVICE)
+            assert calls == [['status']]
+            assert facts['model'] == 'C2901' and 'refresh_error' not in facts
+
+def test_background_refresh():
+    """serve and shell answer from the cache and refresh in the background."""
+    with tempfile.TemporaryDirectory() as directory:
+        _gathered(FactCache(directory), FACT_SUBSETS, age=600)
+        release = threading.Event()
+        with _fake_gathering(directory, succeed=False, release=release) as calls:
+            ansible_runner.mark_long_lived()
+            assert Monitor.get_device_facts(DEVICE)['model'] == 'C2901'
+            assert Monitor.get_device_facts(DEVICE)['model'] == 'C2901'
+            release.set()
+
+            deadline = time.monotonic() + 5
+            while 'r1' not in Monitor._refresh_errors and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert calls == [['status']]
+            facts = Monitor.get_device_facts(DEVICE)
+            assert facts['refresh_error'] == "Background refresh failed: Gathering the facts failed"
+
+            # That call started another refresh; let it end before unpatching
+            while Monitor._refreshing and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+def main():
+    """Run all checks."""
+    for test in (test_freshness, test_fresh_and_missing, test_one_off_commands, test_background_refresh):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
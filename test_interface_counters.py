@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+NetMan Interface Counters Test Script
+
+This script checks how counter increases and rates are computed:
+1. A 32-bit counter just below 2^32 that comes back small has wrapped
+2. A counter that goes backwards from anywhere else was reset
+3. Rates and top interfaces come from the last two polls
+4. Saved counters load back the same
+"""
+import os
+import math
+import tempfile
+from lib.interface_counters import counter_delta, CounterStore, WRAP_WINDOW
+
+def test_32_bit_wrap():
+    """A 32-bit counter near its top that comes back small has wrapped."""
+    assert counter_delta(150, 100) == 50
+    assert counter_delta(100, 2 ** 32 - 50) == 150
+    assert counter_delta(WRAP_WINDOW // 2, 2 ** 32 - WRAP_WINDOW // 4) == WRAP_WINDOW * 3 // 4
+
+def test_reset():
+    """A counter going backwards from anywhere else was reset."""
+    assert counter_delta(100, 3_000_000_000) == 100
+    assert counter_delta(100, 5_000_000_000) == 100
+    assert counter_delta(100, 2 ** 64 - 50) == 100
+    assert counter_delta(0, 1) == 0
+
+def _poll(store, hostname, timestamp, **counters):
+    """Store one interface of a device with the given counters."""
+    store.update(hostname, {'Ethernet1': {'counters': counters}}, timestamp)
+
+def test_rates_and_top():
+    """Rates come from the last two polls, highest first."""
+    with tempfile.TemporaryDirectory() as directory:
+        store = CounterStore(os.path.join(directory, 'counters.bin'))
+        _poll(store, 'sw1', 100.0, in_errors=10, in_bytes=1000)
+        _poll(store, 'sw2', 100.0, in_errors=5)
+        _poll(store, 'sw1', 110.0, in_errors=30, in_bytes=100)
+        _poll(store, 'sw2', 110.0, in_errors=2 ** 32 - 10)
+
+        rates = {entry['hostname']: entry['rate'] for entry in store.top('in_errors')}
+        assert rates == {'sw1': 2.0, 'sw2': (2 ** 32 - 15) / 10}
+        assert [entry['hostname'] for entry in store.top('errors', count=1)] == ['sw2']
+
+        sw1 = store.interfaces('sw1')[0]
+        assert sw1['rates']['in_bytes'] == 10.0
+        assert 'out_bytes' not in sw1['counters']
+        assert math.isnan(store.rates('out_bytes')[0])
+
+def test_save_and_load():
+    """Saved counters load back with the same rates."""
+    with tempfile.TemporaryDirectory() as directory:
+        counters_file = os.path.join(directory, 'counters.bin')
+        store = CounterStore(counters_file)
+        _poll(store, 'sw1', 100.0, in_packets=10)
+        _poll(store, 'sw1', 104.0, in_packets=30)
+        assert store.save()
+
+        loaded = CounterStore(counters_file)
+        assert len(loaded) == 1
+        assert loaded.interfaces() == store.interfaces()
+
+def main():
+    """Run all checks."""
+    for test in (test_32_bit_wrap, test_reset, test_rates_and_top, test_save_and_load):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+NetMan Interface Monitoring Test Script
+
+This script polls the interfaces of a group of devices through a fake
+Ansible runner and checks that:
+1. All devices are polled in one free-strategy run, each with its vendor's
+   command module and interface command
+2. Each device's output is parsed with its own parser and recorded in the
+   interface metrics
+3. Devices that failed or returned nothing map to None
+"""
+from contextlib import contextmanager
+from lib import metrics, monitoring
+from lib.monitoring import Monitor, interface_job
+from lib.interface_parser import interface_command
+
+IOS_OUTPUT = """GigabitEthernet0/1 is up, line protocol is up
+  Hardware is iGbE, address is 5254.0012.3456 (bia 5254.0012.3456)
+  Internet address is 10.0.0.1/30
+  Full-duplex, 1000Mb/s, media type is RJ45
+GigabitEthernet0/2 is administratively down, line protocol is down
+  Hardware is iGbE, address is 5254.0012.3457 (bia 5254.0012.3457)
+"""
+
+EOS_OUTPUT = """Ethernet1 is up, line protocol is up (connected)
+  Hardware is Ethernet, address is 5254.00ab.cd01 (bia 5254.00ab.cd01)
+  Full-duplex, 10Gb/s, auto negotiation: off, uni-link: n/a
+     0 input errors, 0 CRC, 0 alignment, 0 symbol, 0 input discards
+     0 output errors, 0 collisions
+"""
+
+DEVICES = [
+    {'hostname': 'poll-r1', 'device_type': 'cisco_ios'},
+    {'hostname': 'poll-sw1', 'device_type': 'arista_eos'},
+    {'hostname': 'poll-r2', 'device_type': 'cisco_ios'},
+    {'hostname': 'poll-r3', 'device_type': 'cisco_ios'}
+]
+
+class RecordingRunner:
+    """Stands in for AnsibleRunner, recording its runs and answering per host."""
+
+    runs = []
+
+    def run_playbook(self, playbook, extra_vars=None, **options):
+        self.runs.append((playbook, extra_vars, options))
+        return {'success': False, 'hosts': {
+            'poll-r1': {'success': True, 'ansible_result': {'output': IOS_OUTPUT}},
+            'poll-sw1': {'success': True, 'ansible_result': {'output': EOS_OUTPUT}},
+            'poll-r2': {'success': False, 'failures': [{'task': 'Run', 'msg': 'Timeout'}]},
+            'poll-r3': {'success': True}
+        }}
+
+@contextmanager
+def _fake_runner():
+    """Replace the Ansible runner; yields the list of recorded runs."""
+    original_runner, demo_mode = monitoring.AnsibleRunner, monitoring.DEMO_MODE
+    RecordingRunner.runs = []
+    monitoring.AnsibleRunner = RecordingRunner
+    # Other test scripts run in demo mode, where the simulator answers
+    monitoring.DEMO_MODE = False
+    try:
+        yield RecordingRunner.runs
+    finally:
+        monitoring.AnsibleRunner = original_runner
+        monitoring.DEMO_MODE = demo_mode
+        for device in DEVICES:
+            metrics.forget_device(device['hostname'])
+
+def test_single_run():
+    """The whole group is polled in one run with per-device jobs."""
+    with _fake_runner() as runs:
+        Monitor.collect_interfaces(DEVICES, forks=10)
+
+    ((playbook, extra_vars, options),) = runs
+    assert playbook == 'playbooks/get_interfaces.yml'
+    assert options == {'limit': ['poll-r1', 'poll-sw1', 'poll-r2', 'poll-r3'], 'forks': 10, 'strategy': 'free'}
+    jobs = extra_vars['netman_interface_commands']
+    assert sorted(jobs) == sorted(device['hostname'] for device in DEVICES)
+    assert jobs['poll-sw1'] == interface_job('arista_eos')
+    assert jobs['poll-r1']['command'] == interface_command('cisco_ios')
+    assert jobs['poll-r1']['module'] != jobs['poll-sw1']['module']
+
+def test_parsed_and_recorded():
+    """Each output is parsed for its vendor and lands in the metrics."""
+    with _fake_runner():
+        results = Monitor.collect_interfaces(DEVICES)
+
+        assert results['poll-r1']['raw_output'] == IOS_OUTPUT
+        assert sorted(results['poll-r1']['parsed']) == ['GigabitEthernet0/1', 'GigabitEthernet0/2']
+        assert results['poll-sw1']['parsed']['Ethernet1']['status'] == 'up'
+
+        assert metrics.INTERFACE_UP.value(hostname='poll-r1', interface='GigabitEthernet0/1') == 1
+        assert metrics.INTERFACE_UP.value(hostname='poll-r1', interface='GigabitEthernet0/2') == 0
+        assert metrics.INTERFACE_UP.value(hostname='poll-sw1', interface='Ethernet1') == 1
+
+def test_failed_devices():
+    """Failed devices and devices without a result are None."""
+    with _fake_runner():
+        results = Monitor.collect_interfaces(DEVICES)
+        assert results['poll-r2'] is None and results['poll-r3'] is None
+        assert 'poll-r2' not in metrics.INTERFACE_UP.render()
+
+    with _fake_runner() as runs:
+        assert Monitor.collect_interfaces([]) == {}
+        assert runs == []
+
+def main():
+    """Run all checks."""
+    for test in (test_single_run, test_parsed_and_recorded, test_failed_devices):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+NetMan Interface Parser Test Script
+
+This script checks that interface output parses for every vendor:
+1. The simulator's sample output parses for each supported platform
+2. IOS link and line-protocol states map to status and admin status
+3. EOS samples give addresses, speeds and counters
+4. One NX-OS interface never picks up fields from the next
+"""
+from lib.simulator import DeviceSimulator
+from lib.interface_parser import parse_interfaces, interface_command
+
+IOS_OUTPUT = """GigabitEthernet0/1 is down, line protocol is up
+  Hardware is iGbE, address is 5254.0012.3456 (bia 5254.0012.3456)
+  Description: Uplink
+  Internet address is 10.0.0.1/30
+  Full-duplex, 1000Mb/s, media type is RJ45
+GigabitEthernet0/2 is administratively down, line protocol is down
+  Hardware is iGbE, address is 5254.0012.3457 (bia 5254.0012.3457)
+  Auto-duplex, Auto-speed, media type is RJ45
+"""
+
+EOS_OUTPUT = """Ethernet1 is up, line protocol is up (connected)
+  Hardware is Ethernet, address is 5254.00ab.cd01 (bia 5254.00ab.cd01)
+  Description: core-1
+  Internet address is 10.1.0.1/31
+  Full-duplex, 10Gb/s, auto negotiation: off, uni-link: n/a
+     1234 packets input, 567890 bytes
+     0 input errors, 0 CRC, 0 alignment, 0 symbol, 0 input discards
+     4321 packets output, 98765 bytes
+     0 output errors, 0 collisions
+"""
+
+NXOS_OUTPUT = """Ethernet1/2 is down (Link not connected)
+admin state is up, Dedicated Interface
+  Hardware: 1000/10000 Ethernet, address: 0050.5600.0002 (bia 0050.5600.0002)
+  auto-duplex, auto-speed
+mgmt0 is up
+admin state is up,
+  Hardware: GigabitEthernet, address: 0050.5600.00ff (bia 0050.5600.00ff)
+  Internet Address is 192.168.1.10/24
+  full-duplex, 1000 Mb/s
+"""
+
+def test_simulator_samples_parse():
+    """Simulator output parses into interfaces for every platform."""
+    simulator = DeviceSimulator()
+    for device_type in ('cisco_ios', 'arista_eos', 'junos', 'panos', 'cisco_aci'):
+        output = simulator.get_response(device_type, interface_command(device_type))
+        interfaces = parse_interfaces(output, device_type)
+        assert interfaces, f"no interfaces parsed for {device_type}"
+        assert all(info.get('status') in ('up', 'down') for info in interfaces.values())
+
+def test_ios_link_states():
+    """IOS link state and administrative shutdown are reported separately."""
+    interfaces = parse_interfaces(IOS_OUTPUT, 'cisco_ios')
+    assert interfaces['GigabitEthernet0/1']['status'] == 'down'
+    assert interfaces['GigabitEthernet0/1']['admin_status'] == 'up'
+    assert interfaces['GigabitEthernet0/1']['ip_addresses'] == ['10.0.0.1/30']
+    assert interfaces['GigabitEthernet0/1']['speed'] == '1000Mb/s'
+    assert interfaces['GigabitEthernet0/2']['status'] == 'down'
+    assert interfaces['GigabitEthernet0/2']['admin_status'] == 'down'
+    assert interfaces['GigabitEthernet0/2']['ip_addresses'] == []
+
+def test_eos_fields():
+    """EOS output gives description, address, speed and counters."""
+    ethernet1 = parse_interfaces(EOS_OUTPUT, 'arista_eos')['Ethernet1']
+    assert ethernet1['status'] == 'up'
+    assert ethernet1['description'] == 'core-1'
+    assert ethernet1['ip_addresses'] == ['10.1.0.1/31']
+    assert ethernet1['speed'] == '10Gb/s'
+    assert ethernet1['counters']['in_bytes'] == 567890
+    assert ethernet1['counters']['out_packets'] == 4321
+
+def test_nxos_fields_stay_on_their_interface():
+    """An NX-OS interface never takes fields from the one after it."""
+    interfaces = parse_interfaces(NXOS_OUTPUT, 'cisco_aci')
+    assert list(interfaces) == ['Ethernet1/2', 'mgmt0']
+    assert interfaces['Ethernet1/2']['speed'] == 'auto-speed'
+    assert interfaces['Ethernet1/2']['ip_addresses'] == []
+    assert interfaces['mgmt0']['ip_addresses'] == ['192.168.1.10/24']
+    assert interfaces['mgmt0']['speed'] == '1000 Mb/s'
+
+def main():
+    """Run all checks."""
+    for test in (test_simulator_samples_parse, test_ios_link_states,
+                 test_eos_fields, test_nxos_fields_stay_on_their_interface):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+NetMan Job Files Test Script
+
+This script checks how inputs reach Ansible jobs:
+1. Job files live in a private directory that exists only while needed
+2. Extra vars and module args are passed inline, and only extra vars too
+   large for the command line go to a job file
+3. A pushed configuration is written to the job's directory and removed
+   once the push is done
+"""
+import os
+import json
+import stat
+from lib.ansible_runner import AnsibleRunner, MAX_INLINE_JSON
+from lib.config_manager import ConfigManager, config_file_name
+from lib.job_files import JobFiles
+
+class ReadingRunner:
+    """Stands in for AnsibleRunner and reads the config file of each push."""
+
+    def __init__(self):
+        self.pushes = []
+
+    def run_playbook(self, playbook, extra_vars=None, **options):
+        config_file = extra_vars['config_file']
+        with open(config_file) as f:
+            self.pushes.append((config_file, f.read()))
+        return {'success': True, 'hosts': {}, 'ansible_result': {'success': True}}
+
+def test_job_directory():
+    """The job directory is private, created on first write and removed after."""
+    with JobFiles() as job_files:
+        assert job_files.path is None
+        config_file = job_files.write('r1_config.txt', "hostname r1\n")
+        chunks_file = job_files.write('r2_config.txt', iter(["hostname ", "r2\n"]))
+
+        directory = job_files.path
+        assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+        with open(chunks_file) as f:
+            assert f.read() == "hostname r2\n"
+        try:
+            job_files.write('r1_config.txt', "hostname other\n")
+            assert False, "an existing job file was overwritten"
+        except FileExistsError:
+            pass
+        assert os.path.dirname(config_file) == directory
+
+    assert not os.path.exists(directory) and job_files.path is None
+
+def test_inline_inputs():
+    """Inputs go on the command line unless they are too large for it."""
+    runner = AnsibleRunner(inventory_file='inventory.yml')
+    with JobFiles() as job_files:
+        cmd = runner._playbook_command('site.yml', {'target_host': 'r1'}, 'r1', 5, job_files)
+        assert cmd == ['ansible-playbook', '-i', 'inventory.yml', 'site.yml',
+                       '-e', '{"target_host": "r1"}', '--limit', 'r1', '--forks', '5']
+        assert job_files.path is None
+
+        large = {'lines': ['x' * 100] * (MAX_INLINE_JSON // 100)}
+        cmd = runner._playbook_command('site.yml', large, None, None, job_files)
+        assert cmd[-2] == '-e' and cmd[-1].startswith('@' + job_files.path)
+        with open(cmd[-1][1:]) as f:
+            assert json.load(f) == large
+
+    cmd = runner._module_command('r1', 'ios_command', {'commands': ['show version']}, None)
+    assert cmd[-2:] == ['-a', '{"commands": ["show version"]}']
+
+def test_push_config_file():
+    """A push writes its config to a job file that is gone afterwards."""
+    config_manager = ConfigManager()
+    config_manager.ansible_runner = ReadingRunner()
+
+    assert config_manager.push_config('r1', iter(["hostname r1\n", "ntp server 10.0.0.1\n"]))
+    ((config_file, content),) = config_manager.ansible_runner.pushes
+    assert content == "hostname r1\nntp server 10.0.0.1\n"
+    assert os.path.basename(config_file) == config_file_name('r1')
+    assert not os.path.exists(os.path.dirname(config_file))
+
+def main():
+    """Run all checks."""
+    for test in (test_job_directory, test_inline_inputs, test_push_config_file):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
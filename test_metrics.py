@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+NetMan Metrics Test Script
+
+This script checks the Prometheus metrics kept for the exporter:
+1. Gauges, counters and histograms render in the Prometheus text format
+   and in OpenMetrics, re-rendering only what changed
+2. Probes, interface polls, backups and Ansible runs update their series,
+   and a removed device loses all of them
+3. The HTTP endpoint serves either format as the scraper asks
+4. A collection probes the devices, polls their interfaces and reads the
+   time of their latest backup
+"""
+import os
+import time
+import socket
+import tempfile
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from lib import metrics
+from lib.metrics import Registry, MetricsCollector, serve_metrics, OPENMETRICS_CONTENT_TYPE, TEXT_CONTENT_TYPE
+from lib.monitoring import Monitor
+
+def test_render():
+    """Families render in both formats and keep unchanged text."""
+    registry = Registry()
+    up = registry.gauge('test_up', 'Whether it is up.', ('hostname',))
+    jobs = registry.counter('test_jobs', 'Jobs run.', ('result',))
+    duration = registry.histogram('test_duration_seconds', 'Durations.', (), buckets=(1.0, 0.5))
+
+    up.set(1, hostname='r"1')
+    jobs.inc(result='success')
+    jobs.inc(2, result='success')
+    duration.observe(0.5)
+    duration.observe(3)
+
+    assert registry.render() == (
+        '# HELP test_up Whether it is up.\n'
+        '# TYPE test_up gauge\n'
+        'test_up{hostname="r\\"1"} 1\n'
+        '# HELP test_jobs_total Jobs run.\n'
+        '# TYPE test_jobs_total counter\n'
+        'test_jobs_total{result="success"} 3\n'
+        '# HELP test_duration_seconds Durations.\n'
+        '# TYPE test_duration_seconds histogram\n'
+        'test_duration_seconds_bucket{le="0.5"} 1\n'
+        'test_duration_seconds_bucket{le="1.0"} 1\n'
+        'test_duration_seconds_bucket{le="+Inf"} 2\n'
+        'test_duration_seconds_sum 3.5\n'
+        'test_duration_seconds_count 2\n'
+    )
+    openmetrics = registry.render(openmetrics=True)
+    assert '# TYPE test_jobs counter\ntest_jobs_total{result="success"} 3\n' in openmetrics
+    assert openmetrics.endswith('# EOF\n')
+
+    text = up.render()
+    up.set(1, hostname='r"1')
+    assert up.render() is text
+    up.set(0, hostname='r"1')
+    assert up.render().endswith('} 0\n')
+
+    try:
+        registry.counter('test_up', 'Again.', ('hostname',))
+        assert False, "a gauge was registered again as a counter"
+    except ValueError:
+        pass
+    try:
+        up.set(1)
+        assert False, "a series was set without its labels"
+    except ValueError:
+        pass
+
+def test_records():
+    """The record functions update the device series; forget_device removes them."""
+    try:
+        metrics.record_probe('metrics-r1', True, 0.02, timestamp=1000)
+        metrics.record_interfaces('metrics-r1', {
+            'Gi0/1': {'status': 'up', 'counters': {'in_errors': 7}},
+            'Gi0/2': {'status': 'down'}
+        })
+        metrics.record_backup('metrics-r1', timestamp=2000)
+        metrics.record_job('playbook', 'metrics_test', 4.0, False)
+
+        assert metrics.DEVICE_UP.value(hostname='metrics-r1') == 1
+        assert metrics.LAST_PROBE.value(hostname='metrics-r1') == 1000
+        assert metrics.PROBE_DURATION.value(hostname='metrics-r1')[2] == 1
+        assert metrics.BACKUP_TIMESTAMP.value(hostname='metrics-r1') == 2000
+        assert metrics.JOBS.value(kind='playbook', name='metrics_test', result='failure') == 1
+        text = metrics.registry.render()
+        assert 'netman_interface_in_errors_total{hostname="metrics-r1",interface="Gi0/1"} 7\n' in text
+
+        # A down device keeps its last round trip; a vanished interface goes
+        metrics.record_probe('metrics-r1', False, 5.0)
+        assert metrics.DEVICE_UP.value(hostname='metrics-r1') == 0
+        assert metrics.PROBE_DURATION.value(hostname='metrics-r1')[2] == 1
+        metrics.record_interfaces('metrics-r1', {'Gi0/1': {'status': 'down', 'counters': {'in_errors': 9}}})
+        assert metrics.INTERFACE_UP.value(hostname='metrics-r1', interface='Gi0/2') is None
+        assert metrics.INTERFACE_UP.value(hostname='metrics-r1', interface='Gi0/1') == 0
+
+        metrics.forget_device('metrics-r1')
+        assert 'metrics-r1' not in metrics.registry.render()
+    finally:
+        metrics.forget_device('metrics-r1')
+        metrics.JOBS.remove(name='metrics_test')
+        metrics.JOB_DURATION.remove(name='metrics_test')
+
+def _free_port():
+    """Find a local port nothing listens on."""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def test_http_endpoint():
+    """/metrics serves the text format, or OpenMetrics when asked for it."""
+    registry = Registry()
+    registry.gauge('test_up', 'Whether it is up.').set(1)
+    server = serve_metrics('127.0.0.1', _free_port(), registry)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers['Content-Type'] == TEXT_CONTENT_TYPE
+            assert response.read().decode() == registry.render()
+
+        request = urllib.request.Request(url, headers={'Accept': 'application/openmetrics-text; version=1.0.0'})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.headers['Content-Type'] == OPENMETRICS_CONTENT_TYPE
+            assert response.read().decode().endswith('# EOF\n')
+
+        try:
+            urllib.request.urlopen(url.replace('/metrics', '/other'), timeout=5)
+            assert False, "an unknown path was served"
+        except urllib.error.HTTPError as e:
+            assert e.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+@contextmanager
+def _fake_monitor(up_hosts):
+    """Replace probes and interface polls; yields the list of polled device lists."""
+    polls = []
+
+    def check_device_status(cls, device_info):
+        return device_info['hostname'] in up_hosts, {}
+
+    def collect_interfaces(cls, devices, forks=None, workers=None):
+        polls.append([device['hostname'] for device in devices])
+        return {}
+
+    originals = Monitor.__dict__['check_device_status'], Monitor.__dict__['collect_interfaces']
+    Monitor.check_device_status = classmethod(check_device_status)
+    Monitor.collect_interfaces = classmethod(collect_interfaces)
+    try:
+        yield polls
+    finally:
+        Monitor.check_device_status, Monitor.collect_interfaces = originals
+
+def test_collect():
+    """A collection counts devices up and down and records backup times."""
+    devices = [{'hostname': 'metrics-r1', 'device_type': 'cisco_ios'},
+               {'hostname': 'metrics-r2', 'device_type': 'cisco_ios'}]
+    with tempfile.TemporaryDirectory() as directory:
+        backup_file = os.path.join(directory, 'metrics-r1', 'metrics-r1_latest.cfg')
+        os.makedirs(os.path.dirname(backup_file))
+        open(backup_file, 'w').close()
+        backup_time = time.time() - 3600
+        os.utime(backup_file, (backup_time, backup_time))
+
+        try:
+            with _fake_monitor({'metrics-r1'}) as polls:
+                result = MetricsCollector(devices, directory, poll_interfaces=True).collect()
+                assert (result['up'], result['down']) == (1, 1)
+                assert polls == [['metrics-r1', 'metrics-r2']]
+                assert metrics.BACKUP_TIMESTAMP.value(hostname='metrics-r1') == backup_time
+                assert metrics.BACKUP_TIMESTAMP.value(hostname='metrics-r2') is None
+
+                MetricsCollector(devices, directory, poll_interfaces=False).collect()
+                assert len(polls) == 1
+        finally:
+            for device in devices:
+                metrics.forget_device(device['hostname'])
+
+def main():
+    """Run all checks."""
+    for test in (test_render, test_records, test_http_endpoint, test_collect):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
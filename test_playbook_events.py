@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+NetMan Playbook Events Test Script
+
+This script streams playbook runs of a fake `ansible-playbook`, a small
+Python script printing jsonl callback events, and checks that:
+1. Events arrive while the run is still going, and the run ends with a
+   run_end event pointing at the log of its raw output
+2. run_playbook passes every event to on_event and collects the results
+3. Closing the stream early stops the run
+4. Only the newest run logs are kept, and other logs are left alone
+"""
+import os
+import sys
+import time
+import tempfile
+from lib.ansible_runner import AnsibleRunner, _prune_logs
+
+# Fake ansible-playbook: reports a task on r1, waits for argv[1] to exist
+# (up to 30 seconds), then reports the recap and exits with argv[2]
+FAKE_PLAYBOOK = """
+import os, sys, json, time
+def emit(event):
+    print(json.dumps(event), flush=True)
+emit({'_event': 'v2_playbook_on_play_start', 'play': {'name': 'Backup'}})
+emit({'_event': 'v2_playbook_on_task_start', 'task': {'name': 'Get config'}})
+emit({'_event': 'v2_runner_on_ok', 'hosts': {'r1': {'ansible_facts': {'ansible_result': {'success': True}}}}})
+deadline = time.time() + 30
+while not os.path.exists(sys.argv[1]) and time.time() < deadline:
+    time.sleep(0.01)
+emit({'_event': 'v2_playbook_on_stats', 'stats': {'r1': {'ok': 1, 'failures': 0, 'unreachable': 0}}})
+print("playbook finished", file=sys.stderr)
+sys.exit(int(sys.argv[2]))
+"""
+
+class FakePlaybookRunner(AnsibleRunner):
+    """Runs the fake playbook script instead of ansible-playbook."""
+
+    def __init__(self, directory, returncode=0):
+        super().__init__(log_dir=os.path.join(directory, 'logs'), backend='subprocess')
+        self.flag = os.path.join(directory, 'continue')
+        self.returncode = returncode
+
+    @classmethod
+    def _get_simulator(cls):
+        # Test scripts run before this one may have set NETMAN_DEMO_MODE
+        return None
+
+    def _playbook_command(self, playbook_path, extra_vars, limit, forks, job_files):
+        return [sys.executable, '-c', FAKE_PLAYBOOK, self.flag, str(self.returncode)]
+
+def test_stream():
+    """Events stream while Ansible runs; run_end points at the raw log."""
+    with tempfile.TemporaryDirectory() as directory:
+        runner = FakePlaybookRunner(directory, returncode=2)
+        events = runner.stream_playbook('playbooks/backup_config.yml', {'target_host': 'r1'})
+
+        types = [next(events)['type'] for _ in range(3)]
+        assert types == ['play_start', 'task_start', 'host_ok']
+        open(runner.flag, 'w').close()
+
+        rest = list(events)
+        assert [event['type'] for event in rest] == ['recap', 'run_end']
+        run_end = rest[-1]
+        assert run_end['returncode'] == 2 and run_end['error'] == "playbook finished"
+        with open(run_end['log_file']) as f:
+            log = f.read()
+        assert '"v2_playbook_on_stats"' in log and log.endswith("playbook finished\n")
+
+def test_run_playbook_events():
+    """run_playbook hands every event to on_event and collects results."""
+    with tempfile.TemporaryDirectory() as directory:
+        runner = FakePlaybookRunner(directory)
+        open(runner.flag, 'w').close()
+        events = []
+        result = runner.run_playbook('playbooks/backup_config.yml', {'target_host': 'r1'}, on_event=events.append)
+
+        assert [event['type'] for event in events] == ['play_start', 'task_start', 'host_ok', 'recap', 'run_end']
+        assert result['success'] and result['ansible_result'] == {'success': True}
+        assert result['log_file'] == events[-1]['log_file']
+
+def test_close_stops_run():
+    """Closing the event stream stops ansible-playbook."""
+    with tempfile.TemporaryDirectory() as directory:
+        runner = FakePlaybookRunner(directory)
+        events = runner.stream_playbook('playbooks/backup_config.yml', {'target_host': 'r1'})
+        start_time = time.monotonic()
+        next(events)
+        events.close()
+        assert time.monotonic() - start_time < 5
+
+def test_prune_logs():
+    """The oldest run logs beyond the limit are removed."""
+    with tempfile.TemporaryDirectory() as directory:
+        names = [f"backup_config_20250101_00000{n}_abc{n}.log" for n in range(5)]
+        for age, name in enumerate(reversed(names)):
+            path = os.path.join(directory, name)
+            open(path, 'w').close()
+            os.utime(path, (time.time() - age * 60,) * 2)
+        open(os.path.join(directory, 'alerts.log'), 'w').close()
+
+        _prune_logs(directory, 3)
+        assert sorted(os.listdir(directory)) == sorted(names[2:] + ['alerts.log'])
+
+def main():
+    """Run all checks."""
+    for test in (test_stream, test_run_playbook_events, test_close_stops_run, test_prune_logs):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+NetMan Playbook Variables Test Script
+
+This script renders the play variables of the playbooks with the extra vars
+NetMan passes them, using StrictUndefined like Ansible does:
+1. A single-host backup and a group backup name the same backup file
+2. A single-host push and a rollout each find the device's config file
+"""
+import os
+import tempfile
+import yaml
+from jinja2 import Environment, StrictUndefined
+from lib.config_manager import ConfigManager, config_file_name
+
+class RecordingRunner:
+    """Stands in for AnsibleRunner and keeps the extra vars of each run."""
+
+    def __init__(self):
+        self.runs = []
+
+    def run_playbook(self, playbook, extra_vars=None, **options):
+        self.runs.append((playbook, dict(extra_vars or {})))
+        return {'success': False, 'hosts': {}}
+
+def render_play_var(playbook, name, extra_vars, hostname):
+    """Render one play variable for a host the way Ansible would."""
+    with open(playbook) as f:
+        play = yaml.safe_load(f)[0]
+    environment = Environment(undefined=StrictUndefined)
+    return environment.from_string(play['vars'][name]).render(extra_vars, inventory_hostname=hostname)
+
+def _config_manager(directory):
+    """Create a config manager whose Ansible runs are only recorded."""
+    config_manager = ConfigManager(directory)
+    config_manager.ansible_runner = RecordingRunner()
+    return config_manager
+
+def test_backup_file():
+    """Single-host and group backups both get a backup file name."""
+    with tempfile.TemporaryDirectory() as directory:
+        config_manager = _config_manager(directory)
+        config_manager.backup_config('r1')
+        config_manager.backup_configs(['r1', 'r2'])
+        (_, single), (_, group) = config_manager.ansible_runner.runs
+
+        assert render_play_var('playbooks/backup_config.yml', 'host_backup_file', single, 'r1') == single['backup_file']
+        expected = os.path.join(directory, 'r2', f"r2_{group['backup_timestamp']}.cfg")
+        assert render_play_var('playbooks/backup_config.yml', 'host_backup_file', group, 'r2') == expected
+
+def test_config_file():
+    """Single-host pushes and rollouts both get the device's config file."""
+    with tempfile.TemporaryDirectory() as directory:
+        config_manager = _config_manager(directory)
+        config_file = os.path.join(directory, 'r1.txt')
+        config_manager.push_config_file('r1', config_file)
+        config_manager.push_configs(directory, ['r1', 'r2'])
+        (_, single), (_, rollout) = config_manager.ansible_runner.runs
+
+        assert render_play_var('playbooks/configure_device.yml', 'host_config_file', single, 'r1') == config_file
+        expected = os.path.join(directory, config_file_name('r2'))
+        assert render_play_var('playbooks/configure_device.yml', 'host_config_file', rollout, 'r2') == expected
+
+def main():
+    """Run all checks."""
+    for test in (test_backup_file, test_config_file):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
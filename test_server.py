@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+NetMan Server Test Script
+
+This script checks the protocol between `netman serve` and its clients:
+1. A forwarded command gets its exit code and output back, and the
+   client's directory travels with it
+2. Relative path options resolve against the client's directory
+3. No listening server means the command runs locally
+"""
+import os
+import time
+import tempfile
+import threading
+import click
+import click.testing
+import netman
+from lib.server import NetManServer, forward_command, is_server_running
+
+def _start_server(socket_path, run_command):
+    """Serve commands on a socket from a background thread."""
+    server = NetManServer(run_command, socket_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for _ in range(100):
+        if is_server_running(socket_path):
+            return server
+        time.sleep(0.01)
+    raise RuntimeError("Server did not start")
+
+def test_forwarded_command():
+    """A command is run on the server with the client's directory."""
+    requests = []
+
+    def run_command(argv, width, color, cwd):
+        requests.append((argv, width, color, cwd))
+        return 3, "done\n"
+
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, 'netman.sock')
+        server = _start_server(socket_path, run_command)
+        assert forward_command(socket_path, ['inventory', 'list'], width=120) == (3, "done\n")
+        assert forward_command(socket_path, ['template', 'list'], cwd='/srv/jobs') == (3, "done\n")
+        assert requests == [
+            (['inventory', 'list'], 120, False, os.getcwd()),
+            (['template', 'list'], 80, False, '/srv/jobs')
+        ]
+        assert server.requests_served == 2
+
+def test_paths_resolve_against_client_directory():
+    """Relative path options are joined to the client's directory."""
+    @click.command()
+    @click.option("--vars", type=netman.ClientPath(dir_okay=False))
+    @click.option("--rules", type=netman.ClientPath(exists=True, dir_okay=False))
+    def command(vars, rules):
+        click.echo(f"{vars} {rules}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, 'rules.yml'), 'w') as f:
+            f.write("rules: []\n")
+
+        netman.client_directory = directory
+        try:
+            result = click.testing.CliRunner().invoke(command, ['--vars', 'r1.yml', '--rules', 'rules.yml'])
+            absolute = click.testing.CliRunner().invoke(command, ['--vars', '/etc/r1.yml'])
+        finally:
+            netman.client_directory = None
+
+        assert result.output.split() == [os.path.join(directory, 'r1.yml'), os.path.join(directory, 'rules.yml')]
+        assert absolute.output.split() == ['/etc/r1.yml', 'None']
+
+        local = click.testing.CliRunner().invoke(command, ['--vars', 'r1.yml'])
+        assert local.output.split() == ['r1.yml', 'None']
+
+def test_no_server():
+    """Without a listening server the client gets None and runs locally."""
+    with tempfile.TemporaryDirectory() as directory:
+        assert forward_command(os.path.join(directory, 'missing.sock'), ['inventory', 'list']) is None
+
+def main():
+    """Run all checks."""
+    for test in (test_forwarded_command, test_paths_resolve_against_client_directory, test_no_server):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
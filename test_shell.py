@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+NetMan Shell Test Script
+
+This script drives the interactive shell without a terminal and checks that:
+1. Command lines are split and run, and serve and shell are refused
+2. Tab completion offers commands, options, groups, templates and hostnames
+3. Commands that fail are reported and the shell keeps going
+"""
+import io
+import contextlib
+import click
+import netman
+from lib.shell import NetManShell
+
+class FakeInventory:
+    """Inventory with two devices in one group."""
+
+    def list_groups(self):
+        return ['core']
+
+    def list_hostnames(self):
+        return ['r1', 'r2']
+
+class FakeTemplates:
+    """Template manager with one template."""
+
+    def list_templates(self, vendor=None, tag=None):
+        return [{'name': 'cisco_base'}]
+
+def _shell():
+    """Create a shell that records the commands it runs."""
+    commands = []
+    shell = NetManShell(netman.cli, commands.append, FakeInventory(), FakeTemplates(), history_file='/dev/null')
+    return shell, commands
+
+def _complete(shell, line):
+    """Complete the last word of a line like readline would."""
+    begidx = line.rfind(' ') + 1
+    return shell.completedefault(line[begidx:], line, begidx, len(line))
+
+def test_run_lines():
+    """Lines become argv lists; nested commands and bad quoting are refused."""
+    shell, commands = _shell()
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        assert not shell.onecmd('config push r1 --template "cisco base"')
+        assert not shell.onecmd('help inventory')
+        assert not shell.onecmd('serve')
+        assert not shell.onecmd('inventory list --group "core')
+        assert shell.onecmd('exit')
+
+    assert commands == [['config', 'push', 'r1', '--template', 'cisco base'], ['inventory', '--help']]
+    assert "'serve' is not available inside the shell" in output.getvalue()
+    assert "Error: No closing quotation" in output.getvalue()
+
+def test_completion():
+    """Completion follows the command tree and the inventory."""
+    shell, _ = _shell()
+    assert 'serve' not in shell.completenames('') and 'shell' not in shell.completenames('')
+    assert shell.completenames('inv') == ['inventory']
+    assert 'list' in _complete(shell, 'inventory ')
+    assert _complete(shell, 'inventory list --group ') == ['core']
+    assert _complete(shell, 'config push r1 --template cis') == ['cisco_base']
+    assert _complete(shell, 'config push r') == ['r1', 'r2']
+    assert '--group' in _complete(shell, 'inventory list --')
+
+def test_errors_keep_the_shell_running():
+    """Usage errors and exceptions give an exit code instead of exiting."""
+    @click.command('boom')
+    def boom():
+        raise RuntimeError("device unreachable")
+
+    netman.cli.add_command(boom)
+    try:
+        assert netman.run_in_process(['no-such-command'])[0] == 2
+        exit_code, output = netman.run_in_process(['boom'])
+        assert exit_code == 1 and "Error: device unreachable" in output
+    finally:
+        del netman.cli.commands['boom']
+
+def main():
+    """Run all checks."""
+    for test in (test_run_lines, test_completion, test_errors_keep_the_shell_running):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
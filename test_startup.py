@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+NetMan Startup Test Script
+
+This script checks that short commands do not pay for heavy imports:
+1. Importing the CLI loads none of Rich, Jinja2, GitPython or PyYAML
+2. Creating a template manager leaves Jinja2 unloaded until a render
+"""
+import sys
+import subprocess
+
+HEAVY_MODULES = ('rich', 'jinja2', 'git', 'yaml')
+
+def _loaded_modules(code):
+    """Run code in a fresh interpreter and get the heavy modules it loaded."""
+    result = subprocess.run(
+        [sys.executable, '-c', code + f"\nimport sys\nprint(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"],
+        capture_output=True, text=True, check=True
+    )
+    return result.stdout.split()
+
+def test_cli_import_is_light():
+    """Importing the CLI loads no heavy library."""
+    assert _loaded_modules("import netman") == []
+
+def test_template_manager_defers_jinja2():
+    """Jinja2 is imported on the first render, not with the manager."""
+    assert 'jinja2' not in _loaded_modules("from lib.template_manager import TemplateManager\nTemplateManager()")
+    assert 'jinja2' in _loaded_modules("from lib.template_manager import TemplateManager\n"
+                                       "TemplateManager().render_template('cisco_base')")
+
+def main():
+    """Run all checks."""
+    for test in (test_cli_import_is_light, test_template_manager_defers_jinja2):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
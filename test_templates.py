@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+NetMan Templates Test Script
+
+This script checks the template catalog and rendering against templates
+written for the test:
+1. Metadata comes from the header comments, and the vendor from the file
+   name when the header has none
+2. The index is reused until a template changes, and forgets deleted ones
+3. Only the start of a template is read
+4. Rendering to a file writes what rendering in memory returns, and a
+   failed render leaves no partial file behind
+"""
+import os
+import tempfile
+from lib.template_catalog import TemplateCatalog, HEADER_BYTES
+from lib.template_manager import TemplateManager
+
+def _write(directory, name, text):
+    """Write a template."""
+    with open(os.path.join(directory, name), 'w') as f:
+        f.write(text)
+
+def _templates(directory):
+    """Write a template with single-line header comments and one with a comment block."""
+    _write(directory, 'cisco_base.j2',
+           "{# description: Base IOS configuration #}\n{# tags: IOS, Base #}\n"
+           "{# variables: hostname, ntp_servers #}\nhostname {{ hostname }}\n")
+    _write(directory, 'edge_fw.j2',
+           "{#\n  Edge firewall policy\n  vendor: PaloAlto\n  tags: firewall\n#}\nset deviceconfig\n")
+
+class CountingCatalog(TemplateCatalog):
+    """Counts the template headers it reads."""
+
+    def __init__(self, templates_dir):
+        super().__init__(templates_dir)
+        self.reads = []
+
+    def _read_header(self, file_path):
+        self.reads.append(os.path.basename(file_path))
+        return super()._read_header(file_path)
+
+def test_metadata():
+    """Header comments give the description, vendor, tags and variables."""
+    with tempfile.TemporaryDirectory() as directory:
+        _templates(directory)
+        base, firewall = TemplateCatalog(directory).list_templates()
+
+        assert (base['name'], base['description'], base['vendor']) == ('cisco_base', 'Base IOS configuration', 'cisco')
+        assert base['tags'] == ['ios', 'base'] and base['variables'] == ['hostname', 'ntp_servers']
+        assert (firewall['description'], firewall['vendor'], firewall['tags']) == (
+            'Edge firewall policy', 'paloalto', ['firewall'])
+
+        catalog = TemplateCatalog(directory)
+        assert [t['name'] for t in catalog.list_templates(vendor='PaloAlto')] == ['edge_fw']
+        assert [t['name'] for t in catalog.list_templates(tag='ios')] == ['cisco_base']
+
+def test_index():
+    """Headers are read again only for changed templates."""
+    with tempfile.TemporaryDirectory() as directory:
+        _templates(directory)
+        TemplateCatalog(directory).list_templates()
+
+        catalog = CountingCatalog(directory)
+        assert len(catalog.list_templates()) == 2 and catalog.reads == []
+
+        _write(directory, 'cisco_base.j2', "{# description: Changed #}\nhostname {{ hostname }}\n")
+        os.remove(os.path.join(directory, 'edge_fw.j2'))
+        templates = catalog.list_templates()
+        assert catalog.reads == ['cisco_base.j2']
+        assert [(t['name'], t['description']) for t in templates] == [('cisco_base', 'Changed')]
+
+        catalog.reads.clear()
+        assert len(catalog.list_templates()) == 1 and catalog.reads == []
+
+def test_header_only():
+    """Metadata after the header is ignored, however large the template."""
+    with tempfile.TemporaryDirectory() as directory:
+        _write(directory, 'big.j2', "{# description: Big #}\n" + "x" * HEADER_BYTES * 100 +
+               "\n{# tags: hidden #}\n")
+        (template,) = TemplateCatalog(directory).list_templates()
+        assert template['description'] == 'Big' and template['tags'] == []
+
+def test_render_to_file():
+    """Streamed renders match in-memory ones; failed ones remove the file."""
+    with tempfile.TemporaryDirectory() as directory:
+        _templates(directory)
+        _write(directory, 'broken.j2', "hostname {{ hostname }}\n{{ missing.name }}\n")
+        template_manager = TemplateManager(directory)
+        variables = {'hostname': 'r1'}
+
+        output_path = os.path.join(directory, 'r1.txt')
+        assert template_manager.render_to_file('cisco_base', output_path, variables=variables) == output_path
+        with open(output_path) as f:
+            assert f.read() == template_manager.render_template('cisco_base', variables=variables)
+
+        broken_path = os.path.join(directory, 'broken.txt')
+        assert template_manager.render_to_file('broken', broken_path, variables=variables) is None
+        assert not os.path.exists(broken_path)
+
+        missing_path = os.path.join(directory, 'missing.txt')
+        assert template_manager.render_to_file('missing', missing_path) is None
+        assert not os.path.exists(missing_path)
+
+def main():
+    """Run all checks."""
+    for test in (test_metadata, test_index, test_header_only, test_render_to_file):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
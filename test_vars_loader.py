@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+NetMan Variables Loader Test Script
+
+This script checks how template variables are loaded and cached:
+1. Layers apply in order: all, groups, host, then the --vars file
+2. A changed file is parsed again; an unchanged one comes from the cache
+3. Inside a batch files are checked on disk once
+4. Stats count parsed files and cache hits
+"""
+import os
+import json
+import tempfile
+from lib.vars_loader import VarsLoader
+
+def _write(path, text):
+    """Write a file, creating its directory."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+def _rewrite(path, text):
+    """Change a file and move its modification time forward."""
+    _write(path, text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def _vars_dir(directory):
+    """Create group_vars and host_vars layers setting overlapping keys."""
+    _write(os.path.join(directory, 'group_vars', 'all.yml'), "ntp: 10.0.0.1\nsite: any\nlayer: all\n")
+    _write(os.path.join(directory, 'group_vars', 'core.yml'), "site: dc1\nlayer: core\n")
+    _write(os.path.join(directory, 'group_vars', 'edge.json'), json.dumps({'layer': 'edge'}))
+    _write(os.path.join(directory, 'host_vars', 'r1.yaml'), "layer: host\nloopback: 10.255.0.1\n")
+    _write(os.path.join(directory, 'extra.yml'), "layer: file\n")
+
+def test_layer_order():
+    """Later layers replace top-level keys of earlier ones."""
+    with tempfile.TemporaryDirectory() as directory:
+        _vars_dir(directory)
+        loader = VarsLoader(directory)
+        extra = os.path.join(directory, 'extra.yml')
+
+        assert loader.load_layered() == {'ntp': '10.0.0.1', 'site': 'any', 'layer': 'all'}
+        assert loader.load_layered(groups=['core', 'edge'])['layer'] == 'edge'
+        assert loader.load_layered(groups=['edge', 'core'])['layer'] == 'core'
+        assert loader.load_layered('r1', ['core']) == {
+            'ntp': '10.0.0.1', 'site': 'dc1', 'layer': 'host', 'loopback': '10.255.0.1'
+        }
+        assert loader.load_layered('r1', ['core'], extra)['layer'] == 'file'
+
+def test_changed_file_is_parsed_again():
+    """A file is parsed again once its modification time changes."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'vars.yml')
+        _write(path, "vlan: 10\n")
+        loader = VarsLoader(directory)
+        assert loader.load(path) == {'vlan': 10}
+        assert loader.load(path) == {'vlan': 10}
+        assert loader.stats['files_parsed'] == 1
+        assert loader.stats['cache_hits'] == 1
+
+        _rewrite(path, "vlan: 20\n")
+        assert loader.load(path) == {'vlan': 20}
+        assert loader.stats['files_parsed'] == 2
+
+def test_batch_reuses_layers():
+    """Inside a batch changed files are not noticed; afterwards they are."""
+    with tempfile.TemporaryDirectory() as directory:
+        _vars_dir(directory)
+        loader = VarsLoader(directory)
+        core = os.path.join(directory, 'group_vars', 'core.yml')
+        with loader.batch():
+            assert loader.load_layered('r1', ['core'])['site'] == 'dc1'
+            parsed = loader.stats['files_parsed']
+            _rewrite(core, "site: dc2\n")
+            assert loader.load_layered('r1', ['core'])['site'] == 'dc1'
+            assert loader.load_layered('r2', ['core'])['layer'] == 'core'
+            assert loader.stats['files_parsed'] == parsed
+
+        assert loader.load_layered('r1', ['core'])['site'] == 'dc2'
+
+def test_returned_vars_are_copies():
+    """Changing returned variables does not change the cache."""
+    with tempfile.TemporaryDirectory() as directory:
+        _vars_dir(directory)
+        loader = VarsLoader(directory)
+        with loader.batch():
+            loader.load_layered('r1', ['core'])['site'] = 'changed'
+            assert loader.load_layered('r2', ['core'])['site'] == 'dc1'
+
+def main():
+    """Run all checks."""
+    for test in (test_layer_order, test_changed_file_is_parsed_again,
+                 test_batch_reuses_layers, test_returned_vars_are_copies):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()
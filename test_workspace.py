@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+NetMan Workspace Test Script
+
+This script bootstraps workspaces in temporary directories and checks that:
+1. `netman init` creates the directories, inventory files, Git repository
+   and marker, and running it again keeps what is there
+2. Commands set up a workspace only while it has no marker
+"""
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+import click.testing
+import netman
+from lib import workspace
+
+@contextmanager
+def _in_directory(directory):
+    """Run a block from another directory."""
+    previous = os.getcwd()
+    os.chdir(directory)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def test_bootstrap():
+    """A bootstrapped workspace has everything and survives a second run."""
+    with tempfile.TemporaryDirectory() as directory, _in_directory(directory):
+        assert not workspace.is_workspace_ready()
+        assert workspace.bootstrap_workspace()
+
+        assert all(os.path.isdir(name) for name in workspace.WORKSPACE_DIRS)
+        assert os.path.isdir(os.path.join('configs', '.git'))
+        with open(os.path.join('data', 'inventory.json')) as f:
+            assert json.load(f) == []
+        with open(workspace.MARKER_FILE) as f:
+            assert json.load(f)['version'] == workspace.WORKSPACE_VERSION
+        assert workspace.is_workspace_ready()
+
+        with open(os.path.join('data', 'inventory.json'), 'w') as f:
+            json.dump([{'hostname': 'r1'}], f)
+        assert workspace.bootstrap_workspace()
+        with open(os.path.join('data', 'inventory.json')) as f:
+            assert json.load(f) == [{'hostname': 'r1'}]
+
+def test_commands_skip_setup():
+    """Only commands run before the workspace is marked ready set it up."""
+    calls = []
+    bootstrap = workspace.bootstrap_workspace
+
+    def recording_bootstrap():
+        calls.append(os.getcwd())
+        return bootstrap()
+
+    workspace.bootstrap_workspace = recording_bootstrap
+    try:
+        with tempfile.TemporaryDirectory() as directory, _in_directory(directory):
+            runner = click.testing.CliRunner()
+            assert runner.invoke(netman.cli, ['inventory', 'list']).exit_code == 0
+            assert len(calls) == 1 and workspace.is_workspace_ready()
+
+            assert runner.invoke(netman.cli, ['inventory', 'list']).exit_code == 0
+            assert len(calls) == 1
+
+            result = runner.invoke(netman.cli, ['init'])
+            assert "NetMan workspace initialized" in result.output and len(calls) == 2
+    finally:
+        workspace.bootstrap_workspace = bootstrap
+
+def main():
+    """Run all checks."""
+    for test in (test_bootstrap, test_commands_skip_setup):
+        test()
+        print(f"✓ {test.__doc__}")
+    print("\nAll tests completed!")
+
+if __name__ == "__main__":
+    main()